@@ -1,9 +1,13 @@
 # admin.py - tam güncel hali
 
+from datetime import timedelta
+
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     CariKart, CariGrup, StokGrup, Il, Ilce, Kasa, Banka, StokKart, Fatura, 
-    FaturaKalem, KasaHareket, ParaBirimi, Pos, CariHareket,
+    FaturaKalem, KasaHareket, ParaBirimi, Pos, CariHareket, CariBakiye, BelgeSira, StokHareket, DovizKuru, IstekOlcumu,
+    DonemKapanis, CariDonemBakiye,
     StokGrupFiyat, StokSecenek, StokSecenekDeger
 )
 
@@ -34,6 +38,7 @@ class KasaAdmin(admin.ModelAdmin):
     list_display = ['kod', 'ad', 'para_birimi', 'bakiye', 'aktif']
     list_filter = ['para_birimi', 'aktif']
     search_fields = ['kod', 'ad']
+    list_select_related = ['para_birimi', 'bakiye_ozet']
 
 # Banka Admin
 @admin.register(Banka)
@@ -41,6 +46,7 @@ class BankaAdmin(admin.ModelAdmin):
     list_display = ['kod', 'ad', 'para_birimi', 'bakiye', 'aktif']
     list_filter = ['para_birimi', 'aktif']
     search_fields = ['kod', 'ad', 'iban']
+    list_select_related = ['para_birimi', 'bakiye_ozet']
 
 # Pos Admin
 @admin.register(Pos)
@@ -150,4 +156,114 @@ class CariHareketAdmin(admin.ModelAdmin):
     list_display = ['tarih', 'cari', 'para_birimi', 'tutar', 'hareket_yonu', 'islem_tipi']
     list_filter = ['hareket_yonu', 'islem_tipi', 'para_birimi']
     search_fields = ['cari__unvan', 'aciklama']
-    date_hierarchy = 'tarih'
\ No newline at end of file
+    date_hierarchy = 'tarih'
+
+# Cari Bakiye Admin (özet tablo, sadece okunur)
+@admin.register(CariBakiye)
+class CariBakiyeAdmin(admin.ModelAdmin):
+    list_display = ['cari', 'para_birimi', 'toplam_giris', 'toplam_cikis', 'bakiye', 'guncelleme_tarihi']
+    list_filter = ['para_birimi']
+    search_fields = ['cari__kod', 'cari__unvan']
+    list_select_related = ['cari', 'para_birimi']
+    readonly_fields = ['cari', 'para_birimi', 'toplam_giris', 'toplam_cikis', 'guncelleme_tarihi']
+
+
+# Dönem Kapanışı Admin (kapanış ve geri alma muhasebe/donem.py üzerinden yapılır)
+@admin.register(DonemKapanis)
+class DonemKapanisAdmin(admin.ModelAdmin):
+    list_display = ['tarih', 'tip', 'kapatan', 'olusturma_tarihi']
+    list_filter = ['tip']
+    readonly_fields = ['tarih', 'tip', 'kapatan', 'olusturma_tarihi']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CariDonemBakiye)
+class CariDonemBakiyeAdmin(admin.ModelAdmin):
+    list_display = ['kapanis', 'cari', 'para_birimi', 'toplam_giris', 'toplam_cikis', 'bakiye']
+    list_filter = ['kapanis', 'para_birimi']
+    search_fields = ['cari__kod', 'cari__unvan']
+    list_select_related = ['kapanis', 'cari', 'para_birimi']
+    readonly_fields = ['kapanis', 'cari', 'para_birimi', 'toplam_giris', 'toplam_cikis']
+
+
+# Belge Sırası Admin
+@admin.register(BelgeSira)
+class BelgeSiraAdmin(admin.ModelAdmin):
+    list_display = ['seri', 'yil', 'son_numara']
+    list_filter = ['yil']
+    search_fields = ['seri']
+
+
+# Stok Hareket Admin (stok defteri)
+@admin.register(StokHareket)
+class StokHareketAdmin(admin.ModelAdmin):
+    list_display = ['tarih', 'stok', 'tip', 'miktar', 'fatura', 'aciklama']
+    list_filter = ['tip']
+    search_fields = ['stok__kod', 'stok__ad', 'aciklama']
+    list_select_related = ['stok', 'fatura']
+    date_hierarchy = 'tarih'
+
+
+# Döviz Kuru Admin
+@admin.register(DovizKuru)
+class DovizKuruAdmin(admin.ModelAdmin):
+    list_display = ['tarih', 'kod', 'birim', 'alis', 'satis']
+    list_filter = ['kod']
+    date_hierarchy = 'tarih'
+
+
+def yuzdelik(degerler, oran):
+    """Sıralı listede en yakın sıra yöntemiyle yüzdelik değer"""
+    if not degerler:
+        return 0
+    return degerler[min(len(degerler) - 1, int(len(degerler) * oran))]
+
+
+# İstek Ölçümü Admin (SORGU_OLCUMU açıkken dolar)
+@admin.register(IstekOlcumu)
+class IstekOlcumuAdmin(admin.ModelAdmin):
+    list_display = ['tarih', 'url_adi', 'metot', 'durum_kodu', 'sure_ms', 'sql_ms', 'sorgu_sayisi', 'tekrar_eden_sorgu']
+    list_filter = ['url_adi', 'metot', 'durum_kodu']
+    search_fields = ['url_adi', 'yol']
+    date_hierarchy = 'tarih'
+    readonly_fields = [f.name for f in IstekOlcumu._meta.fields]
+    ozet_gun_sayisi = 7
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['ozet'] = self.url_ozeti()
+        extra_context['ozet_gun_sayisi'] = self.ozet_gun_sayisi
+        return super().changelist_view(request, extra_context=extra_context)
+    
+    def url_ozeti(self):
+        """Son günlerdeki ölçümlerden URL adı bazında p50/p95 süre ve sorgu sayısı"""
+        baslangic = timezone.now() - timedelta(days=self.ozet_gun_sayisi)
+        olcumler = {}
+        for url_adi, sure, sorgu in IstekOlcumu.objects.filter(tarih__gte=baslangic).values_list(
+            'url_adi', 'sure_ms', 'sorgu_sayisi'
+        ).order_by():
+            kayit = olcumler.setdefault(url_adi, ([], []))
+            kayit[0].append(sure)
+            kayit[1].append(sorgu)
+        
+        ozet = []
+        for url_adi, (sureler, sorgular) in olcumler.items():
+            sureler.sort()
+            sorgular.sort()
+            ozet.append({
+                'url_adi': url_adi,
+                'adet': len(sureler),
+                'sure_p50': yuzdelik(sureler, 0.5),
+                'sure_p95': yuzdelik(sureler, 0.95),
+                'sorgu_p50': yuzdelik(sorgular, 0.5),
+                'sorgu_p95': yuzdelik(sorgular, 0.95),
+            })
+        return sorted(ozet, key=lambda o: o['sure_p95'], reverse=True)
@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CariHareket, Fatura, FaturaKalem
+
+# Parquet dosyalarına bu kadar satırlık gruplar halinde yazılır (bellekte en fazla bu kadar satır tutulur)
+PARCA_BOYUTU = 50_000
+
+# Uzun süren işlemler aktarım başladıktan sonra daha eski bir guncelleme_tarihi ile
+# commit edilebilir; bu süre kadar geriye taşan kayıtlar tekrar aktarılır
+GECIKME_PAYI = timedelta(minutes=5)
+
+DURUM_DOSYASI = '_durum.json'
+
+_TUTAR = pa.decimal128(15, 2)
+_KUR = pa.decimal128(15, 4)
+_ZAMAN = pa.timestamp('us', tz='UTC')
+
+# tablo adı -> (model, değişiklik alanı, bölümleme tarihi, [(sütun, alan, tip)])
+# Değişiklik alanı koşulu sağlayan her kayıt yeni bir dosyada tekrar yazılır; analiz tarafı
+# id başına en son guncelleme_tarihi'ni, fatura kalemlerinde ise fatura başına en son aktarımı alır
+# (kalemler fatura düzenlenince silinip yeniden oluşturulur).
+TABLOLAR = {
+    'cari_hareketler': (CariHareket, 'guncelleme_tarihi', 'tarih', [
+        ('id', 'id', pa.int64()),
+        ('tarih', 'tarih', _ZAMAN),
+        ('cari_kod', 'cari__kod', pa.string()),
+        ('cari_unvan', 'cari__unvan', pa.string()),
+        ('islem_tipi', 'islem_tipi', pa.string()),
+        ('hareket_yonu', 'hareket_yonu', pa.string()),
+        ('tutar', 'tutar', _TUTAR),
+        ('para_birimi', 'para_birimi__kod', pa.string()),
+        ('doviz_kuru', 'doviz_kuru', _KUR),
+        ('tl_karsiligi', 'tl_karsiligi', _TUTAR),
+        ('kasa_kod', 'kasa__kod', pa.string()),
+        ('banka_kod', 'banka__kod', pa.string()),
+        ('pos_kod', 'pos__kod', pa.string()),
+        ('aciklama', 'aciklama', pa.string()),
+        ('olusturan', 'olusturan__username', pa.string()),
+        ('silindi', 'silindi', pa.bool_()),
+        ('guncelleme_tarihi', 'guncelleme_tarihi', _ZAMAN),
+    ]),
+    'faturalar': (Fatura, 'guncelleme_tarihi', 'tarih', [
+        ('id', 'id', pa.int64()),
+        ('fatura_no', 'fatura_no', pa.string()),
+        ('tarih', 'tarih', _ZAMAN),
+        ('tip', 'tip', pa.string()),
+        ('cari_kod', 'cari__kod', pa.string()),
+        ('cari_unvan', 'cari__unvan', pa.string()),
+        ('ara_toplam', 'ara_toplam', _TUTAR),
+        ('iskonto_tutari', 'iskonto_tutari', _TUTAR),
+        ('kdv_tutari', 'kdv_tutari', _TUTAR),
+        ('genel_toplam', 'genel_toplam', _TUTAR),
+        ('vade_tarihi', 'vade_tarihi', pa.date32()),
+        ('odendi', 'odendi', pa.bool_()),
+        ('iptal', 'iptal', pa.bool_()),
+        ('olusturan', 'olusturan__username', pa.string()),
+        ('silindi', 'silindi', pa.bool_()),
+        ('guncelleme_tarihi', 'guncelleme_tarihi', _ZAMAN),
+    ]),
+    'fatura_kalemleri': (FaturaKalem, 'fatura__guncelleme_tarihi', 'fatura__tarih', [
+        ('id', 'id', pa.int64()),
+        ('fatura_id', 'fatura_id', pa.int64()),
+        ('fatura_no', 'fatura__fatura_no', pa.string()),
+        ('fatura_tarih', 'fatura__tarih', _ZAMAN),
+        ('fatura_tip', 'fatura__tip', pa.string()),
+        ('cari_kod', 'fatura__cari__kod', pa.string()),
+        ('stok_kod', 'stok__kod', pa.string()),
+        ('stok_ad', 'stok__ad', pa.string()),
+        ('para_birimi', 'stok__para_birimi__kod', pa.string()),
+        ('miktar', 'miktar', _TUTAR),
+        ('birim_fiyat', 'birim_fiyat', _TUTAR),
+        ('secenek_fiyat_farki', 'secenek_fiyat_farki', _TUTAR),
+        ('indirim_orani', 'indirim_orani', pa.decimal128(5, 2)),
+        ('indirim_tutari', 'indirim_tutari', _TUTAR),
+        ('kdv_orani', 'kdv_orani', pa.int32()),
+        ('tutar', 'tutar', _TUTAR),
+        ('kdv_tutari', 'kdv_tutari', _TUTAR),
+        ('toplam_tutar', 'toplam_tutar', _TUTAR),
+        ('fatura_silindi', 'fatura__silindi', pa.bool_()),
+        ('guncelleme_tarihi', 'fatura__guncelleme_tarihi', _ZAMAN),
+    ]),
+}
+
+_kilit = threading.Lock()
+
+
+class AktarimCalisiyor(Exception):
+    """Aynı süreçte başka bir aktarım sürerken yeni aktarım istendi"""
+
+
+def hedef_dizini():
+    return Path(getattr(settings, 'ANALITIK_DIZINI', settings.BASE_DIR / 'analitik'))
+
+
+def _durum_oku(hedef):
+    try:
+        return json.loads((hedef / DURUM_DOSYASI).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+
+def _durum_yaz(hedef, durum):
+    # Yarım kalan yazım su seviyesini bozmasın diye geçici dosyadan taşınır
+    gecici = hedef / f'.{DURUM_DOSYASI}.tmp'
+    gecici.write_text(json.dumps(durum, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(gecici, hedef / DURUM_DOSYASI)
+
+
+def _tablo_aktar(ad, hedef, su_seviyesi, simdi, aktarim_no):
+    """Tabloyu yıl/ay bölümlerine yazar; (satır sayısı, dosya sayısı) döndürür"""
+    model, degisim_alani, tarih_alani, sutunlar = TABLOLAR[ad]
+    sema = pa.schema([(sutun, tip) for sutun, _, tip in sutunlar])
+    alanlar = [alan for _, alan, _ in sutunlar]
+    tarih_sirasi = alanlar.index(tarih_alani)
+
+    kosul = {f'{degisim_alani}__lte': simdi}
+    if su_seviyesi:
+        kosul[f'{degisim_alani}__gt'] = su_seviyesi - GECIKME_PAYI
+    # Tarih sırasıyla okununca her yıl/ay bölümü tek seferde, tek dosyaya yazılır
+    satirlar = model.objects.filter(**kosul).order_by(tarih_alani, 'id').values_list(*alanlar).iterator(
+        chunk_size=5000
+    )
+
+    satir_sayisi = dosya_sayisi = 0
+    bolum = yazici = gecici = None
+    parca = []
+
+    def parcayi_yaz():
+        yazici.write_table(pa.Table.from_pylist([dict(zip(sema.names, s)) for s in parca], schema=sema))
+        parca.clear()
+
+    def bolumu_kapat():
+        if parca:
+            parcayi_yaz()
+        yazici.close()
+        os.replace(gecici, gecici.with_name(f'{aktarim_no}.parquet'))
+
+    for satir in satirlar:
+        tarih = timezone.localtime(satir[tarih_sirasi])
+        if (tarih.year, tarih.month) != bolum:
+            if yazici:
+                bolumu_kapat()
+            bolum = (tarih.year, tarih.month)
+            dizin = hedef / ad / f'yil={tarih.year}' / f'ay={tarih.month:02d}'
+            dizin.mkdir(parents=True, exist_ok=True)
+            gecici = dizin / f'.{aktarim_no}.parquet.tmp'
+            yazici = pq.ParquetWriter(gecici, sema, compression='zstd')
+            dosya_sayisi += 1
+
+        parca.append(satir)
+        satir_sayisi += 1
+        if len(parca) >= PARCA_BOYUTU:
+            parcayi_yaz()
+
+    if yazici:
+        bolumu_kapat()
+    return satir_sayisi, dosya_sayisi
+
+
+def aktar(hedef=None, tablolar=None, tam=False):
+    """Tabloları son aktarımdan bu yana değişen kayıtlarıyla Parquet'e yazar.
+
+    Her tablo `<hedef>/<tablo>/yil=YYYY/ay=MM/<aktarim_no>.parquet` düzeninde
+    (Hive bölümleme) yazılır; su seviyeleri `<hedef>/_durum.json` içinde tutulur.
+    `tam` verilirse tablonun dizini silinip tüm kayıtlar baştan aktarılır.
+    Kalıcı silinen kayıtlar artımlı aktarımda yansımaz, bunun için tam aktarım gerekir.
+    {tablo: {'satir', 'dosya'}} döndürür.
+    """
+    if not _kilit.acquire(blocking=False):
+        raise AktarimCalisiyor('Analitik aktarım zaten çalışıyor')
+    try:
+        hedef = Path(hedef) if hedef else hedef_dizini()
+        hedef.mkdir(parents=True, exist_ok=True)
+        durum = _durum_oku(hedef)
+        simdi = timezone.now()
+        aktarim_no = simdi.strftime('%Y%m%dT%H%M%S%fZ')
+
+        sonuc = {}
+        for ad in tablolar or TABLOLAR:
+            if tam:
+                shutil.rmtree(hedef / ad, ignore_errors=True)
+                durum.pop(ad, None)
+            su_seviyesi = parse_datetime(durum[ad]) if ad in durum else None
+            satir, dosya = _tablo_aktar(ad, hedef, su_seviyesi, simdi, aktarim_no)
+            durum[ad] = simdi.isoformat()
+            _durum_yaz(hedef, durum)
+            sonuc[ad] = {'satir': satir, 'dosya': dosya}
+        return sonuc
+    finally:
+        _kilit.release()
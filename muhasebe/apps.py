@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class MuhasebeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'muhasebe'
\ No newline at end of file
+    name = 'muhasebe'
+
+    def ready(self):
+        # Öneri indekslerini ve fiyat matrislerini güncel tutan sinyal alıcıları
+        from . import fiyat, oneri  # noqa: F401
@@ -0,0 +1,203 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+ARAMA_TABLOSU = 'cari_arama'
+
+# Türkçe büyük/küçük harf dönüşümü (I -> ı, İ -> i); str.lower() bunları yanlış çevirir
+_TURKCE_KUCUK = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Türkçe karakter girmeden yazılan aramaların da eşleşmesi için karakterler sadeleştirilir
+_SADELESTIR = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+
+def arama_metni(metin):
+    """Metni Türkçe kurallarıyla küçültüp indekste ve sorguda kullanılan sade biçime çevirir"""
+    return (metin or '').translate(_TURKCE_KUCUK).lower().translate(_SADELESTIR)
+
+
+def kelimeler(metin):
+    return re.findall(r'\w+', arama_metni(metin))
+
+
+def telefon_metni(telefon):
+    """Telefonu yazıldığı gibi, sadece rakamlarıyla ve başındaki 0/90 olmadan indekslenecek hale getirir"""
+    rakamlar = re.sub(r'\D', '', telefon or '')
+    varyantlar = {telefon or '', rakamlar, rakamlar.lstrip('0')}
+    if rakamlar.startswith('90'):
+        varyantlar.add(rakamlar[2:])
+    return ' '.join(v for v in varyantlar if v)
+
+
+def cari_alanlari(cari):
+    """İndekslenecek sütunlar: (unvan, kod, yetkili, kimlik, iletişim, adres)"""
+    return (
+        arama_metni(cari.unvan),
+        arama_metni(cari.kod),
+        arama_metni(cari.yetkili_adi),
+        arama_metni(f"{cari.vergi_no or ''} {cari.tc_kimlik or ''}"),
+        arama_metni(f"{telefon_metni(cari.telefon)} {cari.email or ''}"),
+        arama_metni(cari.adres),
+    )
+
+
+class AramaMotoru:
+    """Cari arama motoru arayüzü; veritabanına göre alt sınıfı seçilir"""
+
+    def olustur(self, cursor):
+        """İndeks tablosunu oluşturur"""
+
+    def kaldir(self, cursor):
+        """İndeks tablosunu siler"""
+
+    def guncelle(self, cari):
+        """Kaydedilen carinin indeks satırını yeniler, silinmişse indeksten çıkarır"""
+
+    def yeniden_olustur(self, cariler):
+        """İndeksi verilen (silinmemiş) carilerden baştan kurar"""
+
+    def filtrele(self, queryset, metin):
+        """Queryset'i aramaya uyan carilerle sınırlar ve `arama_skoru` ekler (büyük olan daha ilgili)"""
+        raise NotImplementedError
+
+    def bos(self, queryset):
+        """Aranacak kelime kalmadığında boş sonuç (sıralama alanı yine eklenir)"""
+        return queryset.annotate(arama_skoru=Value(0.0, output_field=FloatField())).none()
+
+
+class BasitArama(AramaMotoru):
+    """Tam metin indeksi olmayan veritabanları için icontains ile arama"""
+
+    ALANLAR = ('unvan', 'kod', 'yetkili_adi', 'vergi_no', 'tc_kimlik', 'telefon', 'email', 'adres')
+
+    def filtrele(self, queryset, metin):
+        kosul = Q()
+        for alan in self.ALANLAR:
+            kosul |= Q(**{f'{alan}__icontains': metin})
+        return queryset.filter(kosul).annotate(arama_skoru=Value(0.0, output_field=FloatField()))
+
+
+class SqliteArama(AramaMotoru):
+    """SQLite FTS5 sanal tablosu; rowid cari id'sidir, sıralama bm25 ile yapılır"""
+
+    # bm25 sütun ağırlıkları: unvan, kod, yetkili, kimlik, iletişim, adres
+    AGIRLIKLAR = '10.0, 8.0, 4.0, 6.0, 3.0, 1.0'
+
+    def olustur(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARAMA_TABLOSU} USING fts5("
+            "unvan, kod, yetkili, kimlik, iletisim, adres, "
+            "tokenize='unicode61', prefix='2 3')"
+        )
+
+    def kaldir(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {ARAMA_TABLOSU}")
+
+    def guncelle(self, cari):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {ARAMA_TABLOSU} WHERE rowid = %s", [cari.pk])
+            if not cari.silindi:
+                cursor.execute(
+                    f"INSERT INTO {ARAMA_TABLOSU} (rowid, unvan, kod, yetkili, kimlik, iletisim, adres) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    [cari.pk, *cari_alanlari(cari)]
+                )
+
+    def yeniden_olustur(self, cariler):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {ARAMA_TABLOSU}")
+            cursor.executemany(
+                f"INSERT INTO {ARAMA_TABLOSU} (rowid, unvan, kod, yetkili, kimlik, iletisim, adres) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                ([cari.pk, *cari_alanlari(cari)] for cari in cariler)
+            )
+
+    def filtrele(self, queryset, metin):
+        parcalar = kelimeler(metin)
+        if not parcalar:
+            return self.bos(queryset)
+        # Her kelime ön ek olarak aranır ve hepsi eşleşmelidir
+        sorgu = ' '.join(f'"{p}"*' for p in parcalar)
+        tablo = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {ARAMA_TABLOSU} WHERE {ARAMA_TABLOSU} MATCH %s", [sorgu])
+        ).annotate(arama_skoru=RawSQL(
+            f"SELECT -bm25({ARAMA_TABLOSU}, {self.AGIRLIKLAR}) FROM {ARAMA_TABLOSU} "
+            f"WHERE {ARAMA_TABLOSU} MATCH %s AND rowid = \"{tablo}\".\"id\"",
+            [sorgu], output_field=FloatField()
+        ))
+
+
+class PostgresArama(AramaMotoru):
+    """PostgreSQL tsvector tablosu ve GIN indeksi; sıralama ts_rank ile yapılır"""
+
+    VEKTOR = (
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'C') || setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C') || setweight(to_tsvector('simple', %s), 'D')"
+    )
+
+    def olustur(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARAMA_TABLOSU} ("
+            "cari_id bigint PRIMARY KEY REFERENCES cari_kartlar (id) ON DELETE CASCADE, "
+            "vektor tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {ARAMA_TABLOSU}_vektor_idx ON {ARAMA_TABLOSU} USING GIN (vektor)"
+        )
+
+    def kaldir(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {ARAMA_TABLOSU}")
+
+    def guncelle(self, cari):
+        with connection.cursor() as cursor:
+            if cari.silindi:
+                cursor.execute(f"DELETE FROM {ARAMA_TABLOSU} WHERE cari_id = %s", [cari.pk])
+            else:
+                cursor.execute(
+                    f"INSERT INTO {ARAMA_TABLOSU} (cari_id, vektor) VALUES (%s, {self.VEKTOR}) "
+                    "ON CONFLICT (cari_id) DO UPDATE SET vektor = EXCLUDED.vektor",
+                    [cari.pk, *cari_alanlari(cari)]
+                )
+
+    def yeniden_olustur(self, cariler):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {ARAMA_TABLOSU}")
+            cursor.executemany(
+                f"INSERT INTO {ARAMA_TABLOSU} (cari_id, vektor) VALUES (%s, {self.VEKTOR})",
+                ([cari.pk, *cari_alanlari(cari)] for cari in cariler)
+            )
+
+    def filtrele(self, queryset, metin):
+        parcalar = kelimeler(metin)
+        if not parcalar:
+            return self.bos(queryset)
+        sorgu = ' & '.join(f'{p}:*' for p in parcalar)
+        tablo = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT cari_id FROM {ARAMA_TABLOSU} WHERE vektor @@ to_tsquery('simple', %s)", [sorgu]
+            )
+        ).annotate(arama_skoru=RawSQL(
+            f"SELECT ts_rank(vektor, to_tsquery('simple', %s)) FROM {ARAMA_TABLOSU} "
+            f"WHERE cari_id = \"{tablo}\".\"id\"",
+            [sorgu], output_field=FloatField()
+        ))
+
+
+ARAMA_MOTORLARI = {
+    'sqlite': SqliteArama,
+    'postgresql': PostgresArama,
+}
+
+
+def arama_motoru(vendor=None):
+    """Ayarlarda CARI_ARAMA_MOTORU verilmişse onu, yoksa veritabanına uygun motoru döndürür"""
+    yol = getattr(settings, 'CARI_ARAMA_MOTORU', None)
+    if yol:
+        return import_string(yol)()
+    return ARAMA_MOTORLARI.get(vendor or connection.vendor, BasitArama)()
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .donem import donem_siniri
+from .models import (
+    CariHareket, CariHareketArsiv, CariHareketTumu, DonemKapanis, Fatura, FaturaArsiv, FaturaKalem,
+    FaturaKalemArsiv, FaturaTumu,
+)
+
+# Kayıtlar bu kadarlık gruplar halinde, her grup kendi transaction'ında taşınır
+PARCA_BOYUTU = 2000
+
+# sıcak model -> (arşiv modeli, birleşik görünüm modeli)
+ARSIVLER = {
+    CariHareket: (CariHareketArsiv, CariHareketTumu),
+    Fatura: (FaturaArsiv, FaturaTumu),
+}
+
+
+def okuma_modeli(model, baslangic=None, bitis=None):
+    """[baslangic, bitis) aralığı arşivdeki aktif kayıtlara uzanıyorsa birleşik görünüm, yoksa sıcak model.
+
+    Sınır verilmeyen taraf açık kabul edilir; arşiv boşsa ya da aralık
+    arşive ulaşmıyorsa sorgular küçük sıcak tablodan okunmaya devam eder.
+    """
+    arsiv, tumu = ARSIVLER[model]
+    kayitlar = arsiv.objects.filter(silindi=False)
+    if baslangic:
+        kayitlar = kayitlar.filter(tarih__gte=baslangic)
+    if bitis:
+        kayitlar = kayitlar.filter(tarih__lt=bitis)
+    return tumu if kayitlar.exists() else model
+
+
+def _tasi(kaynak, arsiv, alan, idler):
+    """Satırları INSERT ... SELECT ile olduğu gibi kopyalar (değerler Python'dan geçip yuvarlanmaz)"""
+    sutunlar = ', '.join(connection.ops.quote_name(f.column) for f in arsiv._meta.concrete_fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {arsiv._meta.db_table} ({sutunlar}) SELECT {sutunlar} FROM {kaynak._meta.db_table} "
+            f"WHERE {alan} IN ({', '.join(['%s'] * len(idler))})",
+            idler
+        )
+
+
+def _parcalar_halinde(kayitlar, tasi):
+    """Kayıtların id'lerini PARCA_BOYUTU'luk gruplarla taşır, taşınan kayıt sayısını döndürür"""
+    toplam = 0
+    while True:
+        with transaction.atomic():
+            idler = list(kayitlar.order_by('pk').values_list('pk', flat=True)[:PARCA_BOYUTU])
+            if not idler:
+                return toplam
+            tasi(idler)
+            toplam += len(idler)
+
+
+def _cari_hareketleri_tasi(idler):
+    _tasi(CariHareket, CariHareketArsiv, 'id', idler)
+    # Sinyal ve model delete() çalışmaz; özet bakiyeler arşivlenen hareketleri içermeye devam eder
+    CariHareket.objects.filter(pk__in=idler).delete()
+
+
+def _faturalari_tasi(idler):
+    _tasi(Fatura, FaturaArsiv, 'id', idler)
+    _tasi(FaturaKalem, FaturaKalemArsiv, 'fatura_id', idler)
+    # Kalemler cascade ile silinir; stok defterindeki satırlar kalır (fatura bağı boşalır, açıklamada fatura no var)
+    Fatura.objects.filter(pk__in=idler).delete()
+
+
+def arsivle(yil=None, silinen_gun=None):
+    """Kapanmış yılların ve süresi dolan silinmiş kayıtların hareket/faturalarını arşive taşır.
+
+    `yil` verilirse o yıl ve öncesindeki tüm kayıtlar taşınır; yıl sonu
+    kapanmış olmalıdır (kapanış sınırı yıl sonunu kapsamalı). `silinen_gun`
+    verilirse bu kadar günden önce silinmiş kayıtlar tarihinden bağımsız
+    taşınır. Kasa hareketlerinin bağlı olduğu faturalar taşınmaz.
+    {'cari_hareketler': adet, 'faturalar': adet} döndürür.
+    """
+    if yil is None and silinen_gun is None:
+        raise ValueError('Arşivlenecek yıl ya da silinen kayıt süresi verilmelidir.')
+
+    kosullar = []
+    if yil is not None:
+        sinir = donem_siniri(yil)
+        kilit = DonemKapanis.kilit_tarihi()
+        if kilit is None or kilit < sinir:
+            raise ValueError(f'{yil} yılı kapanmadan arşivlenemez.')
+        kosullar.append({'tarih__lt': sinir})
+    if silinen_gun is not None:
+        kosullar.append({'silindi': True, 'silinme_tarihi__lt': timezone.now() - timedelta(days=silinen_gun)})
+
+    sonuc = {'cari_hareketler': 0, 'faturalar': 0}
+    for kosul in kosullar:
+        sonuc['cari_hareketler'] += _parcalar_halinde(
+            CariHareket.objects.filter(**kosul), _cari_hareketleri_tasi
+        )
+        sonuc['faturalar'] += _parcalar_halinde(
+            Fatura.objects.filter(kasa_hareketleri__isnull=True, **kosul), _faturalari_tasi
+        )
+    return sonuc
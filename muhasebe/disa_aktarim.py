@@ -0,0 +1,391 @@
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# XLSX satırları bu kadar satırlık parçalar halinde sıkıştırılıp gönderilir
+XLSX_PARCA = 500
+
+# Excel'in tarih seri numaralarının başlangıcı
+_EXCEL_BASLANGIC = datetime(1899, 12, 30)
+
+# XML'de bulunamayacak kontrol karakterleri
+_GECERSIZ_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class _Yanki:
+    """csv.writer için yazılanı geri döndüren sahte dosya"""
+
+    def write(self, deger):
+        return deger
+
+
+class _Tampon(io.RawIOBase):
+    """zipfile'ın yazdıklarını biriktiren, akışa verildikçe boşaltılan sahte dosya"""
+
+    def __init__(self):
+        self._parcalar = []
+
+    def writable(self):
+        return True
+
+    def write(self, veri):
+        self._parcalar.append(bytes(veri))
+        return len(veri)
+
+    def bosalt(self):
+        veri = b''.join(self._parcalar)
+        self._parcalar = []
+        return veri
+
+
+def ondalik(deger):
+    """Decimal değeri Excel'in Türkçe ayarında sayı olarak okuyacağı biçime çevirir"""
+    return '' if deger is None else str(deger).replace('.', ',')
+
+
+def yerel(deger):
+    """Saat dilimli tarih-saati yerel saate çevirip saat dilimini kaldırır"""
+    if timezone.is_aware(deger):
+        deger = timezone.localtime(deger)
+    return deger.replace(tzinfo=None)
+
+
+def hucre_metni(deger):
+    """CSV hücresi: ondalıklar virgüllü, tarihler gün.ay.yıl, mantıksal değerler Evet/Hayır"""
+    if deger is None:
+        return ''
+    if isinstance(deger, bool):
+        return 'Evet' if deger else 'Hayır'
+    if isinstance(deger, (Decimal, float)):
+        return ondalik(deger)
+    if isinstance(deger, datetime):
+        return yerel(deger).strftime('%d.%m.%Y %H:%M')
+    if isinstance(deger, date):
+        return deger.strftime('%d.%m.%Y')
+    return deger
+
+
+def csv_yanit(dosya_adi, basliklar, satirlar):
+    """Satırları belleğe almadan akış halinde CSV olarak indirir.
+
+    Excel'in Türkçe karakterleri ve ondalıkları doğru açması için UTF-8 BOM
+    ve ';' ayırıcı kullanılır. `satirlar` bir iterator olmalıdır (ör.
+    queryset.values_list(...).iterator()); hücreler hucre_metni ile yazılır.
+    """
+    yazici = csv.writer(_Yanki(), delimiter=';')
+
+    def akis():
+        yield '\ufeff' + yazici.writerow(basliklar)
+        for satir in satirlar:
+            yield yazici.writerow([hucre_metni(deger) for deger in satir])
+
+    response = StreamingHttpResponse(akis(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{dosya_adi}"'
+    return response
+
+
+def _xlsx_hucre(deger):
+    if deger is None or deger == '':
+        return '<c/>'
+    if isinstance(deger, bool):
+        deger = 'Evet' if deger else 'Hayır'
+    elif isinstance(deger, (int, float, Decimal)):
+        return f'<c><v>{deger}</v></c>'
+    elif isinstance(deger, datetime):
+        gun = (yerel(deger) - _EXCEL_BASLANGIC).total_seconds() / 86400
+        return f'<c s="2"><v>{gun:.6f}</v></c>'
+    elif isinstance(deger, date):
+        return f'<c s="1"><v>{(deger - _EXCEL_BASLANGIC.date()).days}</v></c>'
+    metin = escape(_GECERSIZ_XML.sub('', str(deger)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{metin}</t></is></c>'
+
+
+def _xlsx_satir(satir):
+    return '<row>' + ''.join(_xlsx_hucre(deger) for deger in satir) + '</row>'
+
+
+_XLSX_SABIT_DOSYALAR = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # 1: tarih (gg.aa.yyyy), 2: tarih-saat (gg.aa.yyyy ss:dd)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="2"><numFmt numFmtId="164" formatCode="dd.mm.yyyy"/>'
+        '<numFmt numFmtId="165" formatCode="dd.mm.yyyy hh:mm"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def xlsx_yanit(dosya_adi, basliklar, satirlar, sayfa_adi='Sayfa1'):
+    """Satırları belleğe almadan akış halinde Excel (XLSX) dosyası olarak indirir.
+
+    Çalışma sayfası satır satır XML olarak yazılıp zip akışına sıkıştırılır ve
+    her XLSX_PARCA satırda bir gönderilir; bellek kullanımı satır sayısından
+    bağımsızdır. Sayılar ve tarihler Excel'de sayı/tarih hücresi olur.
+    """
+    def akis():
+        tampon = _Tampon()
+        with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_DEFLATED) as arsiv:
+            for ad, icerik in _XLSX_SABIT_DOSYALAR.items():
+                arsiv.writestr(ad, icerik)
+            arsiv.writestr('xl/workbook.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<sheets><sheet name="{escape(sayfa_adi[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+                '</workbook>'
+            ))
+            yield tampon.bosalt()
+
+            with arsiv.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sayfa:
+                sayfa.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+                    '<sheetData>' + _xlsx_satir(basliklar)
+                ).encode('utf-8'))
+
+                parca = []
+                for satir in satirlar:
+                    parca.append(_xlsx_satir(satir))
+                    if len(parca) == XLSX_PARCA:
+                        sayfa.write(''.join(parca).encode('utf-8'))
+                        parca = []
+                        yield tampon.bosalt()
+                sayfa.write((''.join(parca) + '</sheetData></worksheet>').encode('utf-8'))
+        yield tampon.bosalt()
+
+    response = StreamingHttpResponse(
+        akis(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dosya_adi}"'
+    return response
+
+
+# PDF: A4 yatay, Helvetica. Türkçe harfler cp1254 kod sayfasıyla yazılır; cp1254'ün
+# WinAnsi'den farklı olan konumları yazı tipi kodlamasında Türkçe glif adlarına eşlenir.
+_PDF_GENISLIK, _PDF_YUKSEKLIK = 842, 595
+_PDF_KENAR = 36
+_PDF_PUNTO = 8
+_PDF_SATIR = 12
+_PDF_KODLAMA = (
+    b'<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences '
+    b'[208 /Gbreve 221 /Idotaccent 222 /Scedilla 240 /gbreve 253 /dotlessi 254 /scedilla] >>'
+)
+
+# Helvetica glif genişlikleri (punto başına binde); diğer harfler için ortalama kullanılır
+_HELVETICA = {**dict.fromkeys('0123456789', 556), '.': 278, ',': 278, '-': 333, ' ': 278, ':': 278, '…': 1000}
+
+
+def _pdf_genislik(metin, punto=_PDF_PUNTO):
+    return sum(_HELVETICA.get(harf, 667 if harf.isupper() else 500) for harf in metin) * punto / 1000
+
+
+def _pdf_kirp(metin, genislik, punto=_PDF_PUNTO):
+    """Metni sütuna sığacak şekilde sonuna … koyarak kısaltır"""
+    if _pdf_genislik(metin, punto) <= genislik:
+        return metin
+    while metin and _pdf_genislik(metin + '…', punto) > genislik:
+        metin = metin[:-1]
+    return metin + '…'
+
+
+def pdf_hucre_metni(deger):
+    """PDF hücresi: sayılar 1.234,56 biçiminde, tarihler gün.ay.yıl"""
+    if isinstance(deger, Decimal):
+        basamak = max(-deger.as_tuple().exponent, 0) if deger.is_finite() else 0
+        return f'{deger:,.{basamak}f}'.translate(str.maketrans(',.', '.,'))
+    if isinstance(deger, float):
+        return f'{deger:,.2f}'.translate(str.maketrans(',.', '.,'))
+    if isinstance(deger, int) and not isinstance(deger, bool):
+        return f'{deger:,}'.replace(',', '.')
+    return str(hucre_metni(deger))
+
+
+def _pdf_metin(yazi_tipi, punto, x, y, metin):
+    veri = metin.encode('cp1254', 'replace')
+    veri = veri.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'BT /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (yazi_tipi, punto, x, y, veri)
+
+
+class _PdfYazici:
+    """Nesneleri yazıldıkça bayt olarak döndüren, xref için konumlarını tutan PDF yazıcı"""
+
+    def __init__(self):
+        self.boyut = 0
+        self.konumlar = {}
+        self.sayfalar = []
+        self.sonraki_no = 5  # 1: katalog, 2: sayfa ağacı, 3-4: yazı tipleri
+
+    def _yaz(self, veri):
+        self.boyut += len(veri)
+        return veri
+
+    def _nesne(self, no, govde):
+        self.konumlar[no] = self.boyut
+        return self._yaz(b'%d 0 obj\n%s\nendobj\n' % (no, govde))
+
+    def baslangic(self):
+        veri = self._yaz(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        veri += self._nesne(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        for no, ad in ((3, b'Helvetica'), (4, b'Helvetica-Bold')):
+            veri += self._nesne(
+                no, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding %s >>' % (ad, _PDF_KODLAMA)
+            )
+        return veri
+
+    def sayfa(self, icerik):
+        icerik = zlib.compress(icerik)
+        no = self.sonraki_no
+        self.sonraki_no += 2
+        self.sayfalar.append(no + 1)
+        return self._nesne(
+            no, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(icerik), icerik)
+        ) + self._nesne(no + 1, b'<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>' % no)
+
+    def bitis(self):
+        # Kağıt boyutu ve yazı tipleri sayfa ağacından tüm sayfalara geçer
+        veri = self._nesne(2, (
+            b'<< /Type /Pages /Kids [%s] /Count %d /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>'
+        ) % (
+            b' '.join(b'%d 0 R' % no for no in self.sayfalar), len(self.sayfalar),
+            _PDF_GENISLIK, _PDF_YUKSEKLIK,
+        ))
+        xref = self.boyut
+        veri += b'xref\n0 %d\n0000000000 65535 f \n' % self.sonraki_no
+        veri += b''.join(b'%010d 00000 n \n' % self.konumlar[no] for no in range(1, self.sonraki_no))
+        veri += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (self.sonraki_no, xref)
+        return veri
+
+
+def pdf_yanit(dosya_adi, basliklar, satirlar, baslik='', genislikler=None):
+    """Satırları belleğe almadan akış halinde A4 yatay PDF tablo olarak indirir.
+
+    Her sayfa dolunca sıkıştırılıp gönderilir; bellek kullanımı satır
+    sayısından bağımsızdır. `baslik` her sayfanın üstüne yazılır (birden çok
+    satır olabilir), `genislikler` sütunların oransal genişlikleridir.
+    Sayılar sağa yaslanır.
+    """
+    oranlar = genislikler or [1] * len(basliklar)
+    birim = (_PDF_GENISLIK - 2 * _PDF_KENAR) / sum(oranlar)
+    sutunlar = []  # (sol x, genişlik)
+    x = _PDF_KENAR
+    for oran in oranlar:
+        sutunlar.append((x, oran * birim))
+        x += oran * birim
+    baslik_satirlari = baslik.splitlines() if baslik else []
+    tablo_ustu = _PDF_YUKSEKLIK - _PDF_KENAR - len(baslik_satirlari) * 14 - 6
+    sayfa_satiri = int((tablo_ustu - _PDF_SATIR - _PDF_KENAR) // _PDF_SATIR)
+
+    def satir_komutlari(y, degerler, yazi_tipi=b'F1'):
+        komutlar = []
+        for (sol, genislik), deger in zip(sutunlar, degerler):
+            metin = _pdf_kirp(pdf_hucre_metni(deger), genislik - 4)
+            if not metin:
+                continue
+            sag = isinstance(deger, (int, float, Decimal)) and not isinstance(deger, bool)
+            x = sol + genislik - 2 - _pdf_genislik(metin) if sag else sol + 2
+            komutlar.append(_pdf_metin(yazi_tipi, _PDF_PUNTO, x, y, metin))
+        return komutlar
+
+    def sayfa_icerigi(sayfa_no, kayitlar):
+        y = _PDF_YUKSEKLIK - _PDF_KENAR
+        komutlar = []
+        for satir in baslik_satirlari:
+            komutlar.append(_pdf_metin(b'F2', 11, _PDF_KENAR, y, satir))
+            y -= 14
+        y = tablo_ustu
+        komutlar += satir_komutlari(y, basliklar, b'F2')
+        komutlar.append(b'0.5 w %.2f %.2f m %.2f %.2f l S' % (
+            _PDF_KENAR, y - 3, _PDF_GENISLIK - _PDF_KENAR, y - 3
+        ))
+        for kayit in kayitlar:
+            y -= _PDF_SATIR
+            komutlar += satir_komutlari(y, kayit)
+        metin = f'Sayfa {sayfa_no}'
+        komutlar.append(_pdf_metin(
+            b'F1', _PDF_PUNTO, _PDF_GENISLIK - _PDF_KENAR - _pdf_genislik(metin), _PDF_KENAR / 2, metin
+        ))
+        return b'\n'.join(komutlar)
+
+    def akis():
+        yazici = _PdfYazici()
+        yield yazici.baslangic()
+        parca = []
+        sayfa_no = 0
+        for satir in satirlar:
+            parca.append(satir)
+            if len(parca) == sayfa_satiri:
+                sayfa_no += 1
+                yield yazici.sayfa(sayfa_icerigi(sayfa_no, parca))
+                parca = []
+        if parca or not sayfa_no:
+            yield yazici.sayfa(sayfa_icerigi(sayfa_no + 1, parca))
+        yield yazici.bitis()
+
+    response = StreamingHttpResponse(akis(), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{dosya_adi}"'
+    return response
+
+
+BICIMLER = {
+    'csv': csv_yanit,
+    'xlsx': xlsx_yanit,
+}
+
+
+def disa_aktarim_yaniti(bicim, dosya_adi, basliklar, satirlar):
+    """İstenen biçimde (csv/xlsx, bilinmeyen biçimde csv) akış yanıtı; dosya_adi uzantısızdır"""
+    if bicim not in BICIMLER:
+        bicim = 'csv'
+    return BICIMLER[bicim](f'{dosya_adi}.{bicim}', basliklar, satirlar)
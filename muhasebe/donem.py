@@ -0,0 +1,179 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.utils import timezone
+
+from .models import (
+    BankaBakiye, BankaDonemBakiye, CariBakiye, CariDonemBakiye, CariHareket, CariHareketArsiv, DonemKapanis,
+    FaturaArsiv, KasaBakiye, KasaDonemBakiye, StokDonemMiktar, StokHareket,
+)
+
+KURUS = Decimal('0.01')
+
+# Kasa/banka için döviz işlemlerinde TL karşılığı kullanılır (CariHareket.gercek_tutar)
+GERCEK_TUTAR = Case(
+    When(
+        Q(doviz_kuru__isnull=False) &
+        Q(tl_karsiligi__isnull=False) &
+        ~Q(para_birimi__kod='TL'),
+        then=F('tl_karsiligi')
+    ),
+    default=F('tutar'),
+    output_field=DecimalField()
+)
+
+# (etiket, özet model, dönem bakiye modeli, anahtar alanları, toplanan ifade)
+BAKIYE_TABLOLARI = [
+    ('Cari', CariBakiye, CariDonemBakiye, ('cari_id', 'para_birimi_id'), F('tutar')),
+    ('Kasa', KasaBakiye, KasaDonemBakiye, ('kasa_id',), GERCEK_TUTAR),
+    ('Banka', BankaBakiye, BankaDonemBakiye, ('banka_id',), GERCEK_TUTAR),
+]
+
+
+def donem_siniri(yil, ay=None):
+    """Dönemin bitiş sınırı: ayın/yılın ertesindeki ilk günün yerel gece yarısı"""
+    if ay is not None and not 1 <= ay <= 12 or not 1900 <= yil <= 9998:
+        raise ValueError('Geçersiz dönem!')
+    if ay is None or ay == 12:
+        return timezone.make_aware(datetime(yil + 1, 1, 1))
+    return timezone.make_aware(datetime(yil, ay + 1, 1))
+
+
+def son_kapanis(tarih=None):
+    """En son kapanış; `tarih` verilirse sınırı bu andan sonra olmayan en son kapanış"""
+    kapanislar = DonemKapanis.objects.order_by('-tarih')
+    if tarih is not None:
+        kapanislar = kapanislar.filter(tarih__lte=tarih)
+    return kapanislar.first()
+
+
+def bakiye_toplamlari(model, alanlar, ifade, kapanis=None, bitis=None, **kosul):
+    """{anahtar: (giris, cikis)}: kapanıştaki görüntü + kapanıştan sonraki hareketler.
+
+    `model` dönem bakiye modelidir (CariDonemBakiye vb.); kapanış yoksa
+    hareketler baştan toplanır. `bitis` verilirse bu andan önceki hareketler,
+    `kosul` verilirse sadece ona uyan anahtarlar (örn. cari_id=5) toplanır.
+    """
+    toplamlar = {}
+    if kapanis is not None:
+        for satir in model.objects.filter(kapanis=kapanis, **kosul).values_list(
+            *alanlar, 'toplam_giris', 'toplam_cikis'
+        ):
+            toplamlar[satir[:-2]] = satir[-2:]
+
+    from .arsiv import okuma_modeli
+
+    # Arşivlenen yıllar her zaman son kapanıştan öncedir; baştan toplamada arşiv de okunur
+    kaynak = okuma_modeli(CariHareket, kapanis.tarih if kapanis is not None else None, bitis)
+    bos_olmayan = {f'{alan}__isnull': False for alan in alanlar}
+    hareketler = kaynak.objects.filter(silindi=False, **bos_olmayan, **kosul)
+    if kapanis is not None:
+        hareketler = hareketler.filter(tarih__gte=kapanis.tarih)
+    if bitis is not None:
+        hareketler = hareketler.filter(tarih__lt=bitis)
+
+    for satir in hareketler.values(*alanlar).annotate(
+        giris=Sum(ifade, filter=Q(hareket_yonu='giris')),
+        cikis=Sum(ifade, filter=Q(hareket_yonu='cikis'))
+    ).order_by():
+        anahtar = tuple(satir[alan] for alan in alanlar)
+        giris, cikis = toplamlar.get(anahtar, (Decimal('0'), Decimal('0')))
+        # SQLite ondalık toplamları float üzerinden döndürür, kuruşa yuvarlanır
+        toplamlar[anahtar] = (
+            (giris + (satir['giris'] or Decimal('0'))).quantize(KURUS),
+            (cikis + (satir['cikis'] or Decimal('0'))).quantize(KURUS),
+        )
+    return toplamlar
+
+
+def stok_miktarlari(kapanis=None, bitis=None):
+    """{stok_id: miktar}: kapanıştaki stok miktarı + kapanıştan sonraki stok defteri"""
+    miktarlar = {}
+    if kapanis is not None:
+        miktarlar.update(
+            StokDonemMiktar.objects.filter(kapanis=kapanis).values_list('stok_id', 'miktar')
+        )
+
+    defter = StokHareket.objects.all()
+    if kapanis is not None:
+        defter = defter.filter(tarih__gte=kapanis.tarih)
+    if bitis is not None:
+        defter = defter.filter(tarih__lt=bitis)
+
+    for stok_id, toplam in defter.values('stok_id').annotate(toplam=Sum('miktar')).order_by().values_list(
+        'stok_id', 'toplam'
+    ):
+        miktarlar[stok_id] = (miktarlar.get(stok_id, Decimal('0')) + (toplam or Decimal('0'))).quantize(KURUS)
+    return miktarlar
+
+
+def donemi_kapat(yil, ay=None, kullanici=None):
+    """Ayı (ya da `ay` verilmezse yılı) kapatır ve dönem sonu bakiyelerini saklar.
+
+    Görüntüler bir önceki kapanışın görüntüsüne aradaki hareketler eklenerek
+    hesaplanır; böylece her kapanış sadece kendi dönemini toplar. Kapanıştan
+    sonra sınırdan önceki hareketler ve faturalar değiştirilemez.
+    """
+    sinir = donem_siniri(yil, ay)
+    if sinir > timezone.now():
+        raise ValueError('Henüz bitmemiş bir dönem kapatılamaz.')
+
+    with transaction.atomic():
+        onceki = DonemKapanis.objects.select_for_update().order_by('-tarih').first()
+        if onceki and sinir <= onceki.tarih:
+            raise ValueError(
+                f"Dönem zaten kapalı: son kapanış {timezone.localtime(onceki.tarih):%d.%m.%Y} öncesini kapsıyor."
+            )
+
+        kapanis = DonemKapanis.objects.create(tarih=sinir, tip='yil' if ay is None else 'ay', kapatan=kullanici)
+
+        for _, _, model, alanlar, ifade in BAKIYE_TABLOLARI:
+            model.objects.bulk_create([
+                model(kapanis=kapanis, toplam_giris=giris, toplam_cikis=cikis, **dict(zip(alanlar, anahtar)))
+                for anahtar, (giris, cikis) in bakiye_toplamlari(model, alanlar, ifade, onceki, sinir).items()
+            ], batch_size=1000)
+
+        StokDonemMiktar.objects.bulk_create([
+            StokDonemMiktar(kapanis=kapanis, stok_id=stok_id, miktar=miktar)
+            for stok_id, miktar in stok_miktarlari(onceki, sinir).items()
+        ], batch_size=1000)
+    return kapanis
+
+
+def kapanisi_geri_al():
+    """En son kapanışı görüntüleriyle birlikte siler (dönem yeniden açılır); silinen kapanışı döndürür"""
+    with transaction.atomic():
+        kapanislar = list(DonemKapanis.objects.select_for_update().order_by('-tarih')[:2])
+        if not kapanislar:
+            raise ValueError('Geri alınacak dönem kapanışı yok.')
+        kapanis = kapanislar[0]
+        # Arşive taşınmış kayıtlar kapalı dönemde kalmalıdır (arşivdekiler değiştirilemez)
+        onceki = kapanislar[1].tarih if len(kapanislar) > 1 else None
+        if any(
+            model.objects.filter(silindi=False, **({'tarih__gte': onceki} if onceki else {})).exists()
+            for model in (CariHareketArsiv, FaturaArsiv)
+        ):
+            raise ValueError('Bu dönemin kayıtları arşivlendiği için kapanış geri alınamaz.')
+        kapanis.delete()
+    return kapanis
+
+
+def cari_devri(cari_id, tarih, para_birimi_id=None):
+    """Carinin `tarih` öncesindeki en son kapanıştaki bakiyeleri.
+
+    (kapanış sınırı, {para_birimi_id: bakiye}) döndürür; uygun kapanış yoksa
+    (None, {}). Ekstrede açılış bakiyesi bu devirden ve sınır ile `tarih`
+    arasındaki hareketlerden hesaplanır.
+    """
+    kapanis = son_kapanis(tarih)
+    if kapanis is None:
+        return None, {}
+    bakiyeler = CariDonemBakiye.objects.filter(kapanis=kapanis, cari_id=cari_id)
+    if para_birimi_id:
+        bakiyeler = bakiyeler.filter(para_birimi_id=para_birimi_id)
+    return kapanis.tarih, {
+        para_birimi_id: giris - cikis
+        for para_birimi_id, giris, cikis in bakiyeler.values_list('para_birimi_id', 'toplam_giris', 'toplam_cikis')
+    }
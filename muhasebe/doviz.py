@@ -0,0 +1,275 @@
+import logging
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TCMB_URL = 'https://www.tcmb.gov.tr/kurlar/today.xml'
+TCMB_ARSIV_URL = 'https://www.tcmb.gov.tr/kurlar/{tarih:%Y%m}/{tarih:%d%m%Y}.xml'
+
+# Tatil/hafta sonu için geriye doğru aranacak en fazla gün
+GERI_ARAMA_GUN = 7
+
+# Üst menüde ve formlarda kullanılan kurlar
+GOSTERILEN_KURLAR = ('USD', 'EUR')
+
+# Bellekteki kurlar bu süreden eskiyse arka planda yenilenir (saniye)
+TAZELIK_SURESI = 30 * 60
+
+# Başarısız denemeden sonra tekrar denemeden önce beklenecek süre (saniye)
+HATA_BEKLEME_SURESI = 5 * 60
+
+_kurlar = {}
+_son_guncelleme = None
+_son_deneme = None
+_yenileniyor = False
+_kilit = threading.Lock()
+
+
+def _decimal(elem):
+    if elem is None or not elem.text:
+        return None
+    try:
+        return Decimal(elem.text.strip())
+    except InvalidOperation:
+        return None
+
+
+def tcmb_xml_cozumle(icerik):
+    """TCMB kur XML'ini (tarih, {kod: {'birim', 'alis', 'satis'}}) olarak çözer"""
+    root = ET.fromstring(icerik)
+    tarih = datetime.strptime(root.get('Tarih'), '%d.%m.%Y').date()
+
+    kurlar = {}
+    for currency in root.findall('.//Currency'):
+        kod = currency.get('Kod') or currency.get('CurrencyCode')
+        if not kod:
+            continue
+
+        birim = currency.find('Unit')
+        kurlar[kod] = {
+            'birim': int(birim.text) if birim is not None and birim.text else 1,
+            'alis': _decimal(currency.find('ForexBuying')),
+            'satis': _decimal(currency.find('ForexSelling')),
+        }
+
+    return tarih, kurlar
+
+
+def tcmb_xml_getir(kaynak=None):
+    """Kur XML'ini URL'den ya da yerel dosyadan okur"""
+    kaynak = kaynak or getattr(settings, 'DOVIZ_KURU_KAYNAK', TCMB_URL)
+
+    if not str(kaynak).startswith(('http://', 'https://')):
+        return Path(kaynak).read_bytes()
+
+    response = requests.get(kaynak, timeout=5)
+    response.raise_for_status()
+    return response.content
+
+
+def kurlari_kaydet(tarih, kurlar):
+    """Çözülen kurları DovizKuru tablosuna yazar (aynı gün tekrar gelirse günceller)"""
+    from .models import DovizKuru
+
+    DovizKuru.objects.bulk_create(
+        [
+            DovizKuru(kod=kod, tarih=tarih, birim=kur['birim'], alis=kur['alis'], satis=kur['satis'])
+            for kod, kur in kurlar.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['kod', 'tarih'],
+        update_fields=['birim', 'alis', 'satis', 'guncelleme_tarihi'],
+    )
+
+
+def _bellege_al(kurlar):
+    global _kurlar, _son_guncelleme
+    _kurlar = {
+        kod: float(kurlar[kod]) if kurlar.get(kod) is not None else None
+        for kod in GOSTERILEN_KURLAR
+    }
+    _son_guncelleme = time.monotonic()
+
+
+def kurlari_guncelle(kaynak=None):
+    """TCMB'den kurları çeker, veritabanına yazar ve bellekteki kurları yeniler"""
+    tarih, kurlar = tcmb_xml_cozumle(tcmb_xml_getir(kaynak))
+    kurlari_kaydet(tarih, kurlar)
+    _bellege_al({kod: kur['satis'] for kod, kur in kurlar.items()})
+    return tarih, kurlar
+
+
+def _veritabanindan_yukle():
+    """Süreç ilk açıldığında son kaydedilmiş kurları bellek için okur"""
+    from .models import DovizKuru
+
+    kurlar = {}
+    for kur in DovizKuru.objects.filter(kod__in=GOSTERILEN_KURLAR).order_by('kod', '-tarih'):
+        kurlar.setdefault(kur.kod, kur.satis)
+
+    if kurlar:
+        global _son_guncelleme
+        _bellege_al(kurlar)
+        # Veritabanındaki kur eski olabilir, ilk istekte arka planda yenilensin
+        _son_guncelleme = None
+
+
+def _arka_planda_yenile():
+    try:
+        kurlari_guncelle()
+    except Exception as e:
+        logger.error(f"TCMB döviz kuru çekme hatası: {str(e)}")
+    finally:
+        global _yenileniyor
+        _yenileniyor = False
+        connection.close()
+
+
+def arka_planda_yenile():
+    """Kurları istek akışını bekletmeden ayrı bir thread'de yeniler"""
+    global _yenileniyor, _son_deneme
+
+    with _kilit:
+        if _yenileniyor:
+            return
+        _yenileniyor = True
+        _son_deneme = time.monotonic()
+
+    threading.Thread(target=_arka_planda_yenile, name='doviz-kuru-yenile', daemon=True).start()
+
+
+def guncel_kurlar():
+    """Bellekteki kurları döndürür; eskiyse eski değeri verip arka planda yeniler"""
+    if not _kurlar:
+        try:
+            _veritabanindan_yukle()
+        except DatabaseError as e:
+            logger.error(f"Döviz kurları veritabanından okunamadı: {str(e)}")
+
+    simdi = time.monotonic()
+    taze = _son_guncelleme is not None and simdi - _son_guncelleme < TAZELIK_SURESI
+    yeni_denendi = _son_deneme is not None and simdi - _son_deneme < HATA_BEKLEME_SURESI
+
+    if not taze and not yeni_denendi and getattr(settings, 'DOVIZ_KURU_OTOMATIK_YENILE', True):
+        arka_planda_yenile()
+
+    return dict(_kurlar) or {kod: None for kod in GOSTERILEN_KURLAR}
+
+
+class KurBulunamadi(Exception):
+    pass
+
+
+def _arsivden_getir(tarih):
+    """Tarihin TCMB bültenini arşivden çekip kaydeder; o gün bülten yoksa False döner"""
+    response = requests.get(TCMB_ARSIV_URL.format(tarih=tarih), timeout=5)
+    if response.status_code == 404:
+        return False
+    response.raise_for_status()
+
+    bulten_tarihi, kurlar = tcmb_xml_cozumle(response.content)
+    kurlari_kaydet(bulten_tarihi, kurlar)
+    return True
+
+
+@lru_cache(maxsize=1024)
+def _gecmis_kur(kod, tarih):
+    from .models import DovizKuru
+
+    # Tarihte bülten yoksa (hafta sonu, tatil) önceki iş gününün kuru geçerlidir
+    for gun in range(GERI_ARAMA_GUN + 1):
+        bulten_tarihi = tarih - timedelta(days=gun)
+        kur = DovizKuru.objects.filter(kod=kod, tarih=bulten_tarihi).first()
+        if kur is None:
+            try:
+                if not _arsivden_getir(bulten_tarihi):
+                    continue
+            except Exception as e:
+                # Hata önbelleğe alınmaz (lru_cache istisnaları saklamaz)
+                raise KurBulunamadi(f"TCMB arşiv kuru çekme hatası: {str(e)}")
+            kur = DovizKuru.objects.filter(kod=kod, tarih=bulten_tarihi).first()
+        if kur is None or kur.satis is None:
+            break
+        return kur.tarih, kur.satis / kur.birim
+
+    raise KurBulunamadi(f"{kod} için {tarih} tarihli kur bulunamadı")
+
+
+def _son_is_gunu(tarih):
+    """Hafta sonuna denk gelen tarih için önceki cuma"""
+    while tarih.weekday() >= 5:
+        tarih -= timedelta(days=1)
+    return tarih
+
+
+def kur_getir(kod, tarih, arsivden=False):
+    """Verilen tarihte geçerli TCMB döviz satış kurunu (bülten tarihi, kur) olarak döndürür.
+
+    Kurlar sadece DovizKuru tablosundan okunur: geçmiş tarih için o günün
+    (hafta sonuysa cumanın) bülteni, bugün ve sonrası için son kaydedilmiş
+    kur. `arsivden` verilirse tabloda olmayan geçmiş bültenler TCMB
+    arşivinden çekilip kaydedilir (ağ çağrısı; model kaydında kullanılmaz) ve
+    sonuç süreç içinde (kod, tarih) bazında LRU önbellekte tutulur. Kur
+    bulunamazsa (None, None) döner.
+    """
+    from .models import DovizKuru
+
+    kod = kod.upper()
+    if kod in ('TL', 'TRY'):
+        return tarih, Decimal('1')
+
+    bugun = timezone.localdate()
+    try:
+        if tarih < bugun and arsivden:
+            return _gecmis_kur(kod, tarih)
+
+        kurlar = DovizKuru.objects.filter(kod=kod).exclude(satis=None)
+        if tarih < bugun:
+            kurlar = kurlar.filter(tarih=_son_is_gunu(tarih))
+        else:
+            kurlar = kurlar.filter(tarih__lte=tarih)
+        kur = kurlar.order_by('-tarih').first()
+        if kur:
+            return kur.tarih, kur.satis / kur.birim
+    except KurBulunamadi as e:
+        logger.warning(str(e))
+
+    return None, None
+
+
+def eksik_tl_karsiliklarini_doldur():
+    """TL karşılığı boş kalmış dövizli hareketleri arşivden çekilen kurla doldurur, doldurulan sayıyı döndürür.
+
+    Kapanmış dönemlere dokunulmaz. Kur elle girilmemiş (doviz_kuru boş)
+    hareketlerde kasa/banka bakiyesi döviz tutarıyla tutulduğu için özet
+    bakiyeler değişmez; bu yüzden satırlar doğrudan güncellenir.
+    """
+    from .models import CariHareket, DonemKapanis
+
+    hareketler = CariHareket.objects.filter(
+        tl_karsiligi__isnull=True, doviz_kuru__isnull=True
+    ).exclude(para_birimi__kod='TL')
+    kilit = DonemKapanis.kilit_tarihi()
+    if kilit is not None:
+        hareketler = hareketler.filter(tarih__gte=kilit)
+
+    adet = 0
+    for pk, kod, tarih, tutar in hareketler.values_list('pk', 'para_birimi__kod', 'tarih', 'tutar').iterator():
+        _, kur = kur_getir(kod, timezone.localtime(tarih).date(), arsivden=True)
+        if kur:
+            CariHareket.objects.filter(pk=pk).update(
+                tl_karsiligi=(tutar * kur).quantize(Decimal('0.01')), guncelleme_tarihi=timezone.now()
+            )
+            adet += 1
+    return adet
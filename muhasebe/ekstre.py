@@ -0,0 +1,165 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When, Window
+from django.db.models.expressions import RowRange
+
+from .models import ParaBirimi
+
+TUTAR = DecimalField(max_digits=18, decimal_places=2)
+KURUS = Decimal('0.01')
+IMLEC_TUZU = 'muhasebe.ekstre'
+
+# Cari açısından işaretli tutar: CariBakiye.bakiye gibi giriş (alacak) artı, çıkış (borç) eksidir
+ISARETLI_TUTAR = Case(
+    When(hareket_yonu='giris', then=F('tutar')),
+    default=-F('tutar'),
+    output_field=TUTAR,
+)
+
+
+def yuruyen_bakiye(hareketler):
+    """Hareketlere para birimi içinde (tarih, id) sırasıyla yürüyen bakiye (`bakiye`) ekler.
+
+    Pencere fonksiyonu WHERE'den sonra çalıştığı için toplam queryset'teki
+    hareketlerle sınırlıdır; öncesinin bakiyesi (devir) ayrıca eklenmelidir.
+    """
+    return hareketler.annotate(bakiye=Window(
+        Sum(ISARETLI_TUTAR),
+        partition_by=[F('para_birimi_id')],
+        order_by=[F('tarih').asc(), F('id').asc()],
+        frame=RowRange(start=None, end=0),
+    )).order_by('tarih', 'id')
+
+
+def kurus(deger):
+    """SQLite'ın kayan noktalı topladığı tutarları kuruşa yuvarlar"""
+    return (deger or Decimal('0')).quantize(KURUS)
+
+
+def devir_bakiyeleri(hareketler):
+    """Hareketlerin para birimi başına bakiyesi: {para_birimi_id: bakiye} (tek sorgu)"""
+    return {
+        para_birimi_id: kurus(bakiye)
+        for para_birimi_id, bakiye in hareketler.order_by().values('para_birimi_id').annotate(
+            bakiye=Sum(ISARETLI_TUTAR)
+        ).values_list('para_birimi_id', 'bakiye')
+    }
+
+
+def ekstre_ozeti(hareketler, baslangic=None, bitis=None, devir=None, devir_tarihi=None):
+    """Para birimi başına açılış, borç, alacak, kapanış bakiyesi ve hareket sayısı.
+
+    `hareketler` carinin tarih filtresiz hareketleridir; açılış `baslangic`tan
+    önceki tüm hareketlerin bakiyesidir. Dönem kapanışı varsa (bkz. donem.cari_devri)
+    `devir` {para_birimi_id: bakiye} kapanıştaki bakiyeler, `devir_tarihi` kapanış
+    sınırıdır; açılış için sadece sınırdan sonraki hareketler toplanır.
+    Hepsi tek gruplu sorguda hesaplanır.
+    """
+    devir = devir or {}
+    if devir_tarihi:
+        hareketler = hareketler.filter(tarih__gte=devir_tarihi)
+    donem = Q(tarih__gte=baslangic) if baslangic else Q()
+    if bitis:
+        hareketler = hareketler.filter(tarih__lt=bitis)
+
+    toplamlar = {
+        'borc': Sum('tutar', filter=donem & Q(hareket_yonu='cikis')),
+        'alacak': Sum('tutar', filter=donem & Q(hareket_yonu='giris')),
+        'sayi': Count('id', filter=donem),
+    }
+    if baslangic:
+        toplamlar['acilis'] = Sum(ISARETLI_TUTAR, filter=Q(tarih__lt=baslangic))
+
+    satirlar = list(hareketler.order_by().values('para_birimi_id', 'para_birimi__kod').annotate(**toplamlar))
+    # Kapanıştan sonra hareketi olmayan para birimlerinin devri de açılışa girer
+    eksikler = devir.keys() - {satir['para_birimi_id'] for satir in satirlar}
+    if eksikler:
+        satirlar += [
+            {'para_birimi_id': pk, 'para_birimi__kod': kod, 'borc': None, 'alacak': None, 'sayi': 0}
+            for pk, kod in ParaBirimi.objects.filter(pk__in=eksikler).values_list('pk', 'kod')
+        ]
+
+    ozet = []
+    for satir in satirlar:
+        acilis = kurus(satir.get('acilis')) + devir.get(satir['para_birimi_id'], Decimal('0'))
+        borc = kurus(satir['borc'])
+        alacak = kurus(satir['alacak'])
+        if not satir['sayi'] and not acilis:
+            continue
+        ozet.append({
+            'para_birimi_id': satir['para_birimi_id'],
+            'para_birimi': satir['para_birimi__kod'],
+            'acilis': acilis,
+            'borc': borc,
+            'alacak': alacak,
+            'kapanis': acilis + alacak - borc,
+            'sayi': satir['sayi'],
+        })
+    return sorted(ozet, key=lambda satir: satir['para_birimi'])
+
+
+def ekstre_sayfasi(hareketler, sayfa_boyutu, devir, sonra=None):
+    """Dönem hareketlerinin (tarih, id) sırasıyla bir sayfası, yürüyen bakiyeleriyle.
+
+    `devir` sayfadan önceki bakiyelerdir ({para_birimi_id: bakiye}; ilk sayfada
+    açılış bakiyeleri), `sonra` önceki sayfanın son kaydının (tarih, id)
+    anahtarıdır. Sayfanın idleri indeksten alınır, yürüyen bakiye yalnızca bu
+    satırlar üzerinde pencere fonksiyonuyla hesaplanıp devre eklenir; böylece
+    hangi sayfada olunursa olunsun iş sayfa boyutuyla sınırlı kalır.
+    (kayitlar, sonraki_var, sayfa sonu bakiyeleri) döndürür.
+    """
+    if sonra:
+        tarih, pk = sonra
+        hareketler = hareketler.filter(Q(tarih__gt=tarih) | Q(tarih=tarih, pk__gt=pk))
+    idler = list(hareketler.order_by('tarih', 'id').values_list('id', flat=True)[:sayfa_boyutu + 1])
+    sonraki_var = len(idler) > sayfa_boyutu
+
+    # Sadece id ile filtrelenir; cari koşulu eklenirse SQLite carinin tüm hareketlerini tarar
+    kayitlar = list(yuruyen_bakiye(
+        hareketler.model.objects.filter(pk__in=idler[:sayfa_boyutu])
+    ).select_related('para_birimi', 'kasa', 'banka', 'pos', 'olusturan'))
+
+    bakiyeler = dict(devir)
+    for kayit in kayitlar:
+        kayit.bakiye = kurus(kayit.bakiye) + devir.get(kayit.para_birimi_id, Decimal('0'))
+        bakiyeler[kayit.para_birimi_id] = kayit.bakiye
+    return kayitlar, sonraki_var, bakiyeler
+
+
+def ekstre_imleci(kayit, bakiyeler):
+    """Sonraki sayfa imleci: son kaydın (tarih, id) anahtarı ve o andaki bakiyeler.
+
+    Bakiyeler imleçte taşındığı için sonraki sayfalarda devir yeniden
+    toplanmaz; imleç değiştirilemesin diye imzalanır.
+    """
+    return signing.dumps(
+        [kayit.tarih.isoformat(), kayit.pk, {str(pk): str(bakiye) for pk, bakiye in bakiyeler.items()}],
+        salt=IMLEC_TUZU, compress=True,
+    )
+
+
+def ekstre_imleci_coz(imlec):
+    """((tarih, id), bakiyeler) ya da geçersiz/değiştirilmiş imleçte None"""
+    try:
+        tarih, pk, bakiyeler = signing.loads(imlec, salt=IMLEC_TUZU)
+        return (
+            (datetime.fromisoformat(tarih), int(pk)),
+            {int(pb): Decimal(bakiye) for pb, bakiye in bakiyeler.items()},
+        )
+    except (signing.BadSignature, ValueError, TypeError, ArithmeticError):
+        return None
+
+
+def ekstre_satirlari(hareketler, acilislar, alanlar):
+    """Dönem hareketlerini tek sorguda akış halinde, açılışa eklenmiş yürüyen bakiyeyle üretir.
+
+    Her satır `alanlar` değerleri ve en sonda bakiyedir; `acilislar`
+    {para_birimi_id: bakiye} sözlüğüdür (ekstre_ozeti'ndeki açılışlar).
+    """
+    satirlar = yuruyen_bakiye(hareketler).values_list('para_birimi_id', *alanlar, 'bakiye').iterator(
+        chunk_size=2000
+    )
+    for para_birimi_id, *degerler, bakiye in satirlar:
+        yield [*degerler, kurus(bakiye) + acilislar.get(para_birimi_id, Decimal('0'))]
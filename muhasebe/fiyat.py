@@ -0,0 +1,156 @@
+import time
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BelgeSira, CariGrup, StokGrupFiyat, StokKart, StokSecenekDeger
+
+# Grup fiyat matrisi bellekte en fazla bu kadar tutulur (saniye)
+MATRIS_SURESI = 60 * 60
+
+# Fiyat/grup değişince artırılan sürüm sayacı (BelgeSira serisi). Sayaç veritabanında
+# tutulduğu için her çağrıda okunur; tüm süreçlerin matrisleri anında geçersiz olur
+SURUM_SERISI = 'fiyat_matrisi'
+
+_matrisler = {}  # cari_grup_id -> (surum, zaman, {stok_id: (fiyat, grup_adi)})
+
+
+class EtkinFiyat(NamedTuple):
+    liste_fiyati: Decimal
+    fiyat: Decimal
+    grup: str = None  # özel fiyat bir cari gruptan geliyorsa grubun adı
+
+    @property
+    def indirim_orani(self):
+        if self.grup is None or self.liste_fiyati <= 0:
+            return Decimal('0')
+        return (self.liste_fiyati - self.fiyat) / self.liste_fiyati * 100
+
+
+def _surum():
+    return BelgeSira.objects.filter(seri=SURUM_SERISI, yil=0).values_list('son_numara', flat=True).first() or 0
+
+
+def matrisleri_gecersiz_kil():
+    """Tüm süreçlerdeki grup fiyat matrislerini eskitir (toplu güncellemelerden sonra çağrılmalı)"""
+    BelgeSira.ayir(SURUM_SERISI)
+
+
+def grup_zinciri(cari_grup_id):
+    """Grubun kendisinden köke kadar (id, ad) listesi; silinmiş gruplar atlanır"""
+    yol = CariGrup.objects.filter(pk=cari_grup_id).values_list('yol', flat=True).first()
+    if not yol:
+        return []
+    idler = [int(pk) for pk in yol.strip('/').split('/')]
+    adlar = dict(CariGrup.objects.filter(pk__in=idler, silindi=False).values_list('pk', 'ad'))
+    return [(pk, adlar[pk]) for pk in reversed(idler) if pk in adlar]
+
+
+def _matris_olustur(cari_grup_id):
+    zincir = grup_zinciri(cari_grup_id)
+    adlar = dict(zincir)
+    sira = {pk: i for i, (pk, _) in enumerate(zincir)}
+    fiyatlar = StokGrupFiyat.objects.filter(
+        cari_grup_id__in=adlar, silindi=False
+    ).values_list('stok_id', 'cari_grup_id', 'satis_fiyati')
+
+    # Köke en yakın gruptan başlanır; alt grubun fiyatı üst grubunkini ezer
+    matris = {}
+    for stok_id, grup_id, fiyat in sorted(fiyatlar, key=lambda f: sira[f[1]], reverse=True):
+        matris[stok_id] = (fiyat, adlar[grup_id])
+    return matris
+
+
+def grup_matrisi(cari_grup_id):
+    """Grubun (üst gruplardan devralınanlar dahil) {stok_id: (fiyat, grup_adi)} fiyat matrisi"""
+    surum = _surum()
+    kayit = _matrisler.get(cari_grup_id)
+    if kayit and kayit[0] == surum and time.monotonic() - kayit[1] < MATRIS_SURESI:
+        return kayit[2]
+    matris = _matris_olustur(cari_grup_id)
+    _matrisler[cari_grup_id] = (surum, time.monotonic(), matris)
+    return matris
+
+
+def etkin_fiyatlar(stoklar, cari=None):
+    """Stokların cariye uygulanacak fiyatları: {stok_id: EtkinFiyat}.
+
+    Carinin grubunda ya da üst gruplarından birinde özel fiyat varsa o, yoksa
+    stok kartındaki satış fiyatı kullanılır.
+    """
+    matris = grup_matrisi(cari.grup_id) if cari is not None and cari.grup_id else {}
+    sonuc = {}
+    for stok in stoklar:
+        if stok.id in matris:
+            fiyat, grup = matris[stok.id]
+            sonuc[stok.id] = EtkinFiyat(stok.satis_fiyati, fiyat, grup)
+        else:
+            sonuc[stok.id] = EtkinFiyat(stok.satis_fiyati, stok.satis_fiyati)
+    return sonuc
+
+
+def secenek_fiyat_farki(fiyat, degerler):
+    """Seçilen seçenek değerlerinin fiyata toplam etkisi (kuruşa yuvarlanmış)"""
+    fark = sum((deger.get_fiyat_etkisi(fiyat) for deger in degerler), Decimal('0'))
+    return fark.quantize(Decimal('0.01'))
+
+
+def sepet_fiyatla(kalemler, cari=None, stoklar=None):
+    """Sepetteki kalemleri toplu fiyatlar.
+
+    `kalemler` {'stok_id', 'secenekler': {secenek_id: deger_id}, 'birim_fiyat'}
+    sözlükleridir; birim_fiyat verilmezse liste fiyatı esas alınır, cari grubun
+    özel fiyatı varsa her zaman o uygulanır. Seçenek farkları uygulanan fiyat
+    üzerinden hesaplanır. Kalem sayısından bağımsız olarak stoklar ve seçenek
+    değerleri birer sorguda çekilir, grup fiyatları matristen okunur.
+    Kalemlerle aynı sırada {'stok', 'fiyat', 'grup', 'secenek_fiyat_farki'} listesi döndürür.
+    """
+    stok_idler = {int(kalem['stok_id']) for kalem in kalemler}
+    if stoklar is None:
+        stoklar = StokKart.objects.in_bulk(stok_idler)
+    eksik = stok_idler - stoklar.keys()
+    if eksik:
+        raise StokKart.DoesNotExist(f"Stok bulunamadı: {sorted(eksik)}")
+
+    deger_idler = {
+        int(deger_id)
+        for kalem in kalemler
+        for deger_id in (kalem.get('secenekler') or {}).values() if deger_id
+    }
+    degerler = StokSecenekDeger.objects.select_related('secenek').in_bulk(deger_idler) if deger_idler else {}
+
+    fiyatlar = etkin_fiyatlar(stoklar.values(), cari)
+    sonuclar = []
+    for kalem in kalemler:
+        stok = stoklar[int(kalem['stok_id'])]
+        etkin = fiyatlar[stok.id]
+        fiyat = etkin.fiyat
+        if etkin.grup is None and kalem.get('birim_fiyat') not in (None, ''):
+            fiyat = Decimal(str(kalem['birim_fiyat']))
+
+        # Sadece bu stoğa ve işaretlendiği seçeneğe ait değerler hesaba katılır
+        secilenler = []
+        for secenek_id, deger_id in (kalem.get('secenekler') or {}).items():
+            deger = degerler.get(int(deger_id)) if deger_id else None
+            if deger and deger.secenek.stok_id == stok.id and str(deger.secenek_id) == str(secenek_id):
+                secilenler.append(deger)
+
+        sonuclar.append({
+            'stok': stok,
+            'fiyat': fiyat,
+            'grup': etkin.grup,
+            'secenek_fiyat_farki': secenek_fiyat_farki(fiyat, secilenler),
+        })
+    return sonuclar
+
+
+@receiver(post_save, sender=StokGrupFiyat)
+@receiver(post_delete, sender=StokGrupFiyat)
+@receiver(post_save, sender=CariGrup)
+@receiver(post_delete, sender=CariGrup)
+def _fiyatlar_degisti(sender, **kwargs):
+    # Geri alınan işlemler matrisleri boşuna eskitmesin
+    transaction.on_commit(matrisleri_gecersiz_kil)
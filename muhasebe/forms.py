@@ -3,7 +3,7 @@ from django.utils import timezone
 # forms.py başına eklenecek
 from .models import (
     CariKart, CariGrup, StokGrup, Il, Ilce, StokKart, KasaHareket, Fatura,
-    ParaBirimi, Kasa, Banka, Pos, CariHareket,
+    ParaBirimi, Kasa, Banka, Pos, CariHareket, DonemKapanis, DonemKilitli,
     StokGrupFiyat, StokSecenek, StokSecenekDeger  # Bunları ekleyin
 )
 
@@ -29,7 +29,7 @@ class StokGrupForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Üst grupları alfabetik sırala
-        self.fields['ust_grup'].queryset = StokGrup.objects.filter(silindi=False).order_by('ad')
+        self.fields['ust_grup'].queryset = StokGrup.objects.filter(silindi=False).order_by('yol_adi')
         self.fields['ust_grup'].required = False
 
 class CariForm(forms.ModelForm):
@@ -66,7 +66,7 @@ class CariForm(forms.ModelForm):
         self.fields['ilce'].queryset = Ilce.objects.none()
         
         # Grupları alfabetik sırala
-        self.fields['grup'].queryset = CariGrup.objects.filter(silindi=False).order_by('ad')
+        self.fields['grup'].queryset = CariGrup.objects.filter(silindi=False).order_by('yol_adi')
         
         # İlleri plaka koduna göre sırala
         self.fields['il'].queryset = Il.objects.all().order_by('plaka')
@@ -125,7 +125,7 @@ class StokForm(forms.ModelForm):
         self.fields['para_birimi'].queryset = ParaBirimi.objects.filter(silindi=False, aktif=True)
     
         # Stok gruplarını aktif olanlarla sınırla ve alfabetik sırala
-        self.fields['grup'].queryset = StokGrup.objects.filter(silindi=False, aktif=True).order_by('ad')
+        self.fields['grup'].queryset = StokGrup.objects.filter(silindi=False, aktif=True).order_by('yol_adi')
         self.fields['grup'].required = False
     
         # Miktar alanı yetkisi kontrolü
@@ -183,6 +183,18 @@ class StokForm(forms.ModelForm):
     
         return ad
     
+    def clean_barkod(self):
+        barkod = (self.cleaned_data.get('barkod') or '').strip()
+        
+        # Barkod aktif stoklarda tekildir (veritabanında da kısıtlı)
+        if barkod and StokKart.objects.filter(
+            barkod=barkod,
+            silindi=False
+        ).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError('Bu barkod başka bir stok kartında kullanılıyor.')
+        
+        return barkod
+    
     def clean(self):
         cleaned_data = super().clean()
         alis_fiyati = cleaned_data.get('alis_fiyati', 0) or 0
@@ -204,7 +216,7 @@ class StokGrupFiyatForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['cari_grup'].queryset = CariGrup.objects.filter(silindi=False, aktif=True)
+        self.fields['cari_grup'].queryset = CariGrup.objects.filter(silindi=False, aktif=True).order_by('yol_adi')
 
 class StokSecenekForm(forms.ModelForm):
     class Meta:
@@ -527,6 +539,14 @@ class CariVirmanForm(forms.Form):
         
         return cleaned_data
     
+    def clean_tarih(self):
+        # Virman iki hareket oluşturduğu için kapanmış dönem kontrolü kayıttan önce yapılır
+        tarih = self.cleaned_data['tarih']
+        kilit = DonemKapanis.kilit_tarihi()
+        if kilit and tarih < kilit:
+            raise forms.ValidationError(DonemKilitli.mesaj(kilit))
+        return tarih
+    
 
 # forms.py'ye eklenecek
 
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from muhasebe.analitik import TABLOLAR, aktar, hedef_dizini
+
+
+class Command(BaseCommand):
+    help = (
+        'Cari hareket, fatura ve fatura kalemlerini yıl/ay bölümlü Parquet dosyalarına aktarır '
+        '(varsayılan olarak son aktarımdan bu yana değişenler)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hedef',
+            help='Dosyaların yazılacağı dizin (varsayılan: ANALITIK_DIZINI)'
+        )
+        parser.add_argument(
+            '--tablo',
+            action='append',
+            choices=list(TABLOLAR),
+            help='Sadece bu tabloyu aktar (birden çok kez verilebilir)'
+        )
+        parser.add_argument(
+            '--tam',
+            action='store_true',
+            help='Mevcut dosyaları silip tüm kayıtları baştan aktar'
+        )
+
+    def handle(self, *args, **options):
+        hedef = options['hedef'] or hedef_dizini()
+        try:
+            sonuc = aktar(hedef=hedef, tablolar=options['tablo'], tam=options['tam'])
+        except OSError as e:
+            raise CommandError(f'Aktarım yazılamadı: {str(e)}')
+
+        for tablo, ozet in sonuc.items():
+            self.stdout.write(f"{tablo}: {ozet['satir']} kayıt, {ozet['dosya']} dosya")
+        self.stdout.write(self.style.SUCCESS(f'Analitik aktarım tamamlandı: {hedef}'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from muhasebe.arsiv import arsivle
+
+
+class Command(BaseCommand):
+    help = (
+        'Kapanmış yılların cari hareket ve faturalarını, süresi dolan silinmiş kayıtlarla birlikte '
+        '*_arsiv tablolarına taşır'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--yil',
+            type=int,
+            help='Bu yıl ve öncesini arşivle (yıl sonu kapanmış olmalı)'
+        )
+        parser.add_argument(
+            '--silinen-gun',
+            type=int,
+            help='Bu kadar günden önce silinmiş kayıtları tarihinden bağımsız arşivle'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sonuc = arsivle(yil=options['yil'], silinen_gun=options['silinen_gun'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sonuc['cari_hareketler']} cari hareket, {sonuc['faturalar']} fatura arşivlendi."
+        ))
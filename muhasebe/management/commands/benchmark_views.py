@@ -0,0 +1,193 @@
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from muhasebe.management.commands.generate_fake_data import VARSAYILAN_BITIS
+from muhasebe.models import CariKart, StokKart
+
+# Test veritabanına geçirilen ve raporun ölçeğine yazılan generate_fake_data seçenekleri
+VERI_SECENEKLERI = ('seed', 'cari', 'stok', 'fatura', 'hareket', 'bitis')
+
+
+def uc_noktalar():
+    """Ölçülecek (ad, url) listesi; id isteyen uç noktalar için örnek kayıtlar seçilir"""
+    cari = CariKart.objects.filter(silindi=False).order_by('pk').first()
+    stok = StokKart.objects.filter(silindi=False).order_by('pk').first()
+
+    noktalar = [
+        ('anasayfa', reverse('anasayfa')),
+        ('cari_list', reverse('cari_list')),
+        ('stok_list', reverse('stok_list')),
+        ('fatura_list', reverse('fatura_list')),
+        ('cari_hareket_list', reverse('cari_hareket_list')),
+        ('cari_ara', f"{reverse('cari_ara')}?q={cari.unvan[:3] if cari else 'a'}"),
+        ('stok_ara', f"{reverse('stok_ara')}?q={stok.ad[:3] if stok else 'a'}"),
+    ]
+    if stok:
+        url = reverse('get_stok_detay', args=[stok.pk])
+        noktalar.append(('get_stok_detay', f"{url}?cari_id={cari.pk}" if cari else url))
+    if cari:
+        noktalar.append(('cari_bakiye_detay', f"{reverse('cari_bakiye_detay')}?cari_id={cari.pk}"))
+    return noktalar
+
+
+class Command(BaseCommand):
+    help = 'Liste ve AJAX uç noktalarının süre, sorgu sayısı ve bellek ölçümlerini JSON raporlar, referansla karşılaştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tekrar', type=int, default=5, help='Her uç nokta için istek sayısı')
+        parser.add_argument('--cikti', help='JSON raporun yazılacağı dosya')
+        parser.add_argument('--referans', help='Karşılaştırılacak önceki JSON rapor')
+        parser.add_argument('--tolerans', type=float, default=0.25,
+                            help='Medyan sürede izin verilen oransal artış (0.25 = %%25)')
+        parser.add_argument('--mevcut-veri', action='store_true',
+                            help='Test veritabanı kurmadan mevcut veritabanında ölç (sadece GET istekleri yapılır)')
+        # Test veritabanına yüklenecek veri ölçeği (generate_fake_data seçenekleri)
+        parser.add_argument('--seed', type=int, default=42, help='Test verisi tohumu')
+        parser.add_argument('--cari', type=int, default=1000, help='Test verisi cari sayısı')
+        parser.add_argument('--stok', type=int, default=500, help='Test verisi stok sayısı')
+        parser.add_argument('--fatura', type=int, default=2000, help='Test verisi fatura sayısı')
+        parser.add_argument('--hareket', type=int, default=100000, help='Test verisi cari hareket sayısı')
+        parser.add_argument('--bitis', default=VARSAYILAN_BITIS, help='Test verisinin son kayıt tarihi (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        olcek = {'mevcut_veri': options['mevcut_veri']}
+        if not options['mevcut_veri']:
+            olcek.update({alan: options[alan] for alan in VERI_SECENEKLERI})
+
+        # DEBUG açıkken sorgu günlüğü dolup sorgu sayımlarını bozar, ölçüm DEBUG kapalı yapılır.
+        # Arka plan thread'leri (TCMB kur yenileme, öneri indeksi ön yükleme) ölçüm sırasında çalışmasın
+        setup_test_environment(debug=False)
+        arka_plan_kapali = override_settings(DOVIZ_KURU_OTOMATIK_YENILE=False, ONERI_INDEKSI_ON_YUKLE=False)
+        arka_plan_kapali.enable()
+        eski_ad = None
+        try:
+            if not options['mevcut_veri']:
+                # Ölçüm ayrı bir test veritabanında, üretilen veriyle yapılır
+                eski_ad = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                User.objects.create_superuser('benchmark', password='benchmark')
+                self.stdout.write('Test verisi oluşturuluyor...')
+                call_command(
+                    'generate_fake_data', stdout=io.StringIO(),
+                    **{alan: options[alan] for alan in VERI_SECENEKLERI}
+                )
+
+            sonuclar = self.olc(max(options['tekrar'], 1))
+        finally:
+            if eski_ad is not None:
+                connection.creation.destroy_test_db(eski_ad, verbosity=0)
+            arka_plan_kapali.disable()
+            teardown_test_environment()
+
+        rapor = {
+            'tarih': datetime.now().isoformat(timespec='seconds'),
+            'veritabani': connection.vendor,
+            'olcek': olcek,
+            'uc_noktalar': sonuclar,
+        }
+
+        if options['cikti']:
+            Path(options['cikti']).write_text(json.dumps(rapor, ensure_ascii=False, indent=2), encoding='utf-8')
+            self.stdout.write(f"Rapor yazıldı: {options['cikti']}")
+
+        if options['referans']:
+            self.karsilastir(rapor, options['referans'], options['tolerans'])
+
+    def olc(self, tekrar):
+        """Her uç noktayı giriş yapmış kullanıcıyla çağırıp ölçümleri döndürür"""
+        kullanici = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if kullanici is None:
+            raise CommandError('Ölçüm için bir süper kullanıcı gerekli')
+
+        client = Client()
+        client.force_login(kullanici)
+
+        sonuclar = {}
+        for ad, url in uc_noktalar():
+            # İlk istek ısınma içindir (şablon derleme, bağlantı açma)
+            self.istek(client, ad, url)
+
+            sureler, sorgu_sayilari, sql_sureleri = [], [], []
+            for _ in range(tekrar):
+                with CaptureQueriesContext(connection) as sorgular:
+                    baslangic = time.perf_counter()
+                    self.istek(client, ad, url)
+                    sureler.append((time.perf_counter() - baslangic) * 1000)
+                sorgu_sayilari.append(len(sorgular))
+                sql_sureleri.append(sum(float(s['time']) for s in sorgular.captured_queries) * 1000)
+
+            if min(sorgu_sayilari) != max(sorgu_sayilari):
+                self.stdout.write(self.style.WARNING(
+                    f"{ad}: sorgu sayısı istekler arasında değişiyor {sorgu_sayilari}, medyan raporlanır"
+                ))
+
+            # tracemalloc istekleri yavaşlattığı için bellek ayrı bir istekte ölçülür
+            tracemalloc.start()
+            self.istek(client, ad, url)
+            bellek = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            sureler.sort()
+            sonuclar[ad] = {
+                'url': url,
+                'medyan_ms': round(statistics.median(sureler), 2),
+                'p95_ms': round(sureler[min(len(sureler) - 1, int(len(sureler) * 0.95))], 2),
+                'sorgu_sayisi': statistics.median_high(sorgu_sayilari),
+                'sql_ms': round(statistics.median(sql_sureleri), 2),
+                'tepe_bellek_kb': round(bellek / 1024, 1),
+            }
+            self.stdout.write(
+                f"{ad:<20} medyan {sonuclar[ad]['medyan_ms']:>9.2f} ms  "
+                f"sorgu {sonuclar[ad]['sorgu_sayisi']:>4}  bellek {sonuclar[ad]['tepe_bellek_kb']:>9.1f} KB"
+            )
+
+        return sonuclar
+
+    def istek(self, client, ad, url):
+        """GET isteği yapar; 200 dışındaki her yanıtta ölçüm durdurulur"""
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{ad} ({url}) {response.status_code} döndürdü')
+        return response
+
+    def karsilastir(self, rapor, referans_yolu, tolerans):
+        """Referansa göre sorgu sayısı artan ya da süresi toleransı aşan uç noktalarda hata verir"""
+        try:
+            referans = json.loads(Path(referans_yolu).read_text(encoding='utf-8'))
+            referans_sonuclar = referans['uc_noktalar']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Referans rapor okunamadı: {e}')
+
+        if referans.get('olcek') != rapor['olcek']:
+            self.stdout.write(self.style.WARNING(
+                f"Referans farklı veri ölçeğinde alınmış: {referans.get('olcek')}"
+            ))
+
+        gerilemeler = []
+        for ad, sonuc in rapor['uc_noktalar'].items():
+            onceki = referans_sonuclar.get(ad)
+            if not onceki:
+                continue
+            if sonuc['sorgu_sayisi'] > onceki['sorgu_sayisi']:
+                gerilemeler.append(f"{ad}: sorgu sayısı {onceki['sorgu_sayisi']} -> {sonuc['sorgu_sayisi']}")
+            if sonuc['medyan_ms'] > onceki['medyan_ms'] * (1 + tolerans):
+                gerilemeler.append(f"{ad}: medyan süre {onceki['medyan_ms']} ms -> {sonuc['medyan_ms']} ms")
+
+        if gerilemeler:
+            for satir in gerilemeler:
+                self.stderr.write(self.style.ERROR(satir))
+            raise CommandError(f'{len(gerilemeler)} performans gerilemesi bulundu')
+
+        self.stdout.write(self.style.SUCCESS('Referansa göre gerileme yok.'))
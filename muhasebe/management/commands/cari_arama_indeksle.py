@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from muhasebe.arama import arama_motoru
+from muhasebe.models import CariKart
+
+
+class Command(BaseCommand):
+    help = 'Cari arama indeksini baştan kurar (toplu aktarımlardan sonra ya da indeks bozulduğunda)'
+
+    def handle(self, *args, **options):
+        motor = arama_motoru()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                motor.olustur(cursor)
+            cariler = CariKart.objects.filter(silindi=False).only(
+                'id', 'kod', 'unvan', 'yetkili_adi', 'vergi_no', 'tc_kimlik', 'telefon', 'email', 'adres'
+            ).iterator(chunk_size=2000)
+            motor.yeniden_olustur(cariler)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{type(motor).__name__}: {CariKart.objects.filter(silindi=False).count()} cari indekslendi."
+        ))
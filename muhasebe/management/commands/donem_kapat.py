@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from muhasebe.donem import donemi_kapat, kapanisi_geri_al
+
+
+class Command(BaseCommand):
+    help = (
+        'Ayı ya da yılı kapatır: dönem sonu cari, kasa, banka bakiyelerini ve stok miktarlarını saklar, '
+        'dönemdeki hareket ve faturaları kilitler'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--yil', type=int, help='Kapatılacak yıl')
+        parser.add_argument('--ay', type=int, help='Kapatılacak ay (verilmezse yıl sonu kapanışı)')
+        parser.add_argument(
+            '--geri-al',
+            action='store_true',
+            help='En son kapanışı geri al (dönemi yeniden aç)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['geri_al']:
+                kapanis = kapanisi_geri_al()
+                self.stdout.write(self.style.SUCCESS(f'{kapanis} kapanışı geri alındı.'))
+                return
+            if options['yil'] is None:
+                raise CommandError('--yil ya da --geri-al verilmelidir.')
+            kapanis = donemi_kapat(options['yil'], options['ay'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'{kapanis} kapanışı yapıldı.'))
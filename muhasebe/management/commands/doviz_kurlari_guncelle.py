@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from muhasebe.doviz import eksik_tl_karsiliklarini_doldur, kurlari_guncelle
+
+
+class Command(BaseCommand):
+    help = "TCMB döviz kurlarını çeker ve DovizKuru tablosuna kaydeder (cron ile çalıştırılabilir)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kaynak',
+            help='TCMB URL\'si yerine kullanılacak URL ya da yerel XML dosyası'
+        )
+        parser.add_argument(
+            '--tl-karsiliklari', action='store_true',
+            help='TL karşılığı boş kalmış dövizli hareketleri TCMB arşiv kuruyla doldurur'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tarih, kurlar = kurlari_guncelle(options.get('kaynak'))
+        except Exception as e:
+            raise CommandError(f"TCMB döviz kuru çekme hatası: {str(e)}")
+
+        for kod in ('USD', 'EUR'):
+            if kod in kurlar:
+                self.stdout.write(f"{kod}: {kurlar[kod]['satis']}")
+
+        self.stdout.write(self.style.SUCCESS(f'{tarih} tarihli {len(kurlar)} adet kur kaydedildi.'))
+
+        if options['tl_karsiliklari']:
+            adet = eksik_tl_karsiliklarini_doldur()
+            self.stdout.write(self.style.SUCCESS(f'{adet} adet hareketin TL karşılığı dolduruldu.'))
@@ -0,0 +1,401 @@
+import io
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from muhasebe.fiyat import matrisleri_gecersiz_kil
+from muhasebe.oneri import indeksleri_yenile
+from muhasebe.models import (
+    CariGrup, CariKart, StokGrup, StokKart, StokSecenek, StokSecenekDeger, StokGrupFiyat,
+    Fatura, FaturaKalem, StokHareket, CariHareket, ParaBirimi, Kasa, Banka, Ilce
+)
+
+
+ADLAR = ['Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Mustafa', 'Zeynep', 'Ali', 'Emine', 'Hüseyin', 'Elif',
+         'Hasan', 'Hatice', 'İbrahim', 'Merve', 'Osman', 'Şule', 'Murat', 'Özge', 'Yusuf', 'Gül']
+SOYADLAR = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın',
+            'Özdemir', 'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek']
+SEKTORLER = ['Gıda', 'Tekstil', 'İnşaat', 'Otomotiv', 'Mobilya', 'Elektrik', 'Kırtasiye', 'Temizlik',
+             'Ambalaj', 'Lojistik', 'Medikal', 'Tarım']
+SIRKET_EKLERI = ['Ltd. Şti.', 'A.Ş.', 'San. ve Tic. Ltd. Şti.', 'Tic. A.Ş.']
+URUNLER = ['Vida', 'Somun', 'Kablo', 'Boya', 'Koli', 'Bant', 'Eldiven', 'Kalem', 'Defter', 'Lamba',
+           'Priz', 'Musluk', 'Conta', 'Rulman', 'Zincir', 'Halat', 'Fırça', 'Silikon', 'Yapıştırıcı', 'Matkap Ucu']
+OZELLIKLER = ['Çelik', 'Plastik', 'Galvaniz', 'Paslanmaz', 'Ekonomik', 'Profesyonel', 'Büyük', 'Küçük',
+              'Orta', 'Beyaz', 'Siyah', 'Kırmızı']
+SECENEKLER = {
+    'Renk': ['Beyaz', 'Siyah', 'Kırmızı', 'Mavi'],
+    'Boyut': ['S', 'M', 'L', 'XL'],
+    'Ambalaj': ['Tekli', 'Paket', 'Koli'],
+}
+
+# Dövizli hareketlerde TL karşılığı için yaklaşık kur (gün başına küçük artışla)
+TAHMINI_KURLAR = {'USD': Decimal('32.50'), 'EUR': Decimal('35.20')}
+
+# Hareket para birimi ağırlıkları
+PARA_BIRIMI_AGIRLIKLARI = {'TL': 70, 'USD': 20, 'EUR': 10}
+
+# Aynı tohum her gün aynı veriyi üretsin diye son kayıt tarihi sabittir
+VARSAYILAN_BITIS = '2025-12-31'
+
+
+def parcalar(liste, boyut):
+    for i in range(0, len(liste), boyut):
+        yield liste[i:i + boyut]
+
+
+def toplu_ekle(model, alanlar, satirlar):
+    """Model nesnesi kurmadan executemany ile toplu INSERT yapar (milyonluk tablolar için)"""
+    # bulk_create SQLite'ta parametre sınırı yüzünden ~50 satırlık INSERT'lere bölünür
+    # ve her değeri alan alan hazırlar; hazır tuple'lar burada doğrudan gönderilir
+    qn = connection.ops.quote_name
+    kolonlar = ', '.join(qn(model._meta.get_field(alan).column) for alan in alanlar)
+    yer_tutucular = ', '.join(['%s'] * len(alanlar))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {qn(model._meta.db_table)} ({kolonlar}) VALUES ({yer_tutucular})',
+            satirlar
+        )
+
+
+class Command(BaseCommand):
+    help = 'Ölçek testleri için seed ile tekrarlanabilir sahte cari, stok, fatura ve cari hareket verisi üretir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Rastgele üretecin tohumu')
+        parser.add_argument('--cari', type=int, default=1000, help='Oluşturulacak cari sayısı')
+        parser.add_argument('--stok', type=int, default=500, help='Oluşturulacak stok sayısı')
+        parser.add_argument('--fatura', type=int, default=2000, help='Oluşturulacak fatura sayısı')
+        parser.add_argument('--kalem', type=int, default=5, help='Fatura başına en fazla kalem sayısı')
+        parser.add_argument('--hareket', type=int, default=100000, help='Oluşturulacak cari hareket sayısı')
+        parser.add_argument('--gun', type=int, default=730, help='Kayıt tarihlerinin yayılacağı gün sayısı')
+        parser.add_argument('--bitis', default=VARSAYILAN_BITIS,
+                            help=f'En son kayıt tarihi (YYYY-MM-DD, varsayılan {VARSAYILAN_BITIS})')
+        parser.add_argument('--parti', type=int, default=5000, help='bulk_create parti büyüklüğü')
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.parti = options['parti']
+        self.gun = max(options['gun'], 1)
+
+        try:
+            bitis = datetime.strptime(options['bitis'], '%Y-%m-%d')
+        except ValueError:
+            raise CommandError('--bitis YYYY-MM-DD formatında olmalı')
+        self.bitis = timezone.make_aware(bitis.replace(hour=23, minute=59, second=0, microsecond=0))
+
+        self.hazirlik()
+
+        cari_gruplari = self.grup_agaci(CariGrup, 'Cari', kok=4, alt=3, alt_alt=2)
+        stok_gruplari = self.grup_agaci(StokGrup, 'Stok', kok=3, alt=3, alt_alt=0)
+
+        cari_idler = self.carileri_olustur(options['cari'], cari_gruplari)
+        stoklar = self.stoklari_olustur(options['stok'], stok_gruplari)
+        self.secenekleri_olustur(stoklar)
+        self.grup_fiyatlarini_olustur(stoklar, cari_gruplari)
+        self.faturalari_olustur(options['fatura'], options['kalem'], cari_idler, stoklar)
+        self.hareketleri_olustur(options['hareket'], cari_idler)
+
+        # Toplu eklemede save() çalışmadığı için özet tablolar, stok miktarları ve arama indeksi toplu onarılır
+        self.stdout.write('Özet bakiyeler, stok miktarları ve arama indeksi hesaplanıyor...')
+        call_command('rebuild_balances', stdout=io.StringIO())
+        call_command('reconcile_stock', stdout=io.StringIO())
+        call_command('cari_arama_indeksle', stdout=io.StringIO())
+        # Çalışan sunuculardaki cari/stok öneri indeksleri de baştan kurulsun
+        indeksleri_yenile()
+
+        self.stdout.write(self.style.SUCCESS('Sahte veri oluşturuldu.'))
+
+    def rastgele_tarih(self):
+        return self.bitis - timedelta(minutes=self.rnd.randrange(self.gun * 24 * 60))
+
+    def hazirlik(self):
+        """Kullanıcı, para birimleri, il/ilçe, kasa ve banka gibi ön koşulları hazırlar"""
+        self.kullanici = User.objects.filter(is_superuser=True).order_by('pk').first() or User.objects.order_by('pk').first()
+        if self.kullanici is None:
+            raise CommandError('Önce en az bir kullanıcı oluşturun (createsuperuser)')
+
+        for kod, ad, sembol in [('TL', 'Türk Lirası', '₺'), ('USD', 'Amerikan Doları', '$'), ('EUR', 'Euro', '€')]:
+            ParaBirimi.objects.get_or_create(kod=kod, defaults={'ad': ad, 'sembol': sembol})
+        self.para_birimleri = {pb.kod: pb for pb in ParaBirimi.objects.filter(kod__in=PARA_BIRIMI_AGIRLIKLARI)}
+
+        if not Ilce.objects.exists():
+            call_command('yukle_il_ilce', stdout=io.StringIO())
+        self.ilceler = list(Ilce.objects.order_by('pk').values_list('il_id', 'id'))
+
+        self.kasalar = {}
+        self.bankalar = {}
+        for i, (kod, pb) in enumerate(sorted(self.para_birimleri.items())):
+            self.kasalar[kod] = Kasa.objects.get_or_create(
+                kod=f'FK-{kod}', defaults={'ad': f'Test Kasa {kod}', 'para_birimi': pb}
+            )[0].pk
+            self.bankalar[kod] = Banka.objects.get_or_create(
+                kod=f'FB-{kod}',
+                defaults={
+                    'ad': f'Test Banka {kod}', 'hesap_no': f'9000{i}',
+                    'iban': f'TR{990000000000000000000000 + i:024d}', 'para_birimi': pb
+                }
+            )[0].pk
+
+    def grup_agaci(self, model, etiket, kok, alt, alt_alt):
+        """Üç seviyeye kadar iç içe grup ağacı kurar, kayıt atanabilecek yaprak grupları döndürür"""
+        yapraklar = []
+        for i in range(1, kok + 1):
+            ust = model.objects.create(ad=f'{etiket} Grup {i}')
+            if not alt:
+                yapraklar.append(ust)
+            for j in range(1, alt + 1):
+                orta = model.objects.create(ad=f'{etiket} Grup {i}.{j}', ust_grup=ust)
+                if not alt_alt:
+                    yapraklar.append(orta)
+                for k in range(1, alt_alt + 1):
+                    yapraklar.append(model.objects.create(ad=f'{etiket} Grup {i}.{j}.{k}', ust_grup=orta))
+        return yapraklar
+
+    def carileri_olustur(self, adet, gruplar):
+        if not adet:
+            return list(CariKart.objects.filter(silindi=False).values_list('pk', flat=True))
+
+        rnd = self.rnd
+        kodlar = CariKart.kod_ayir(adet)
+        cariler = []
+        for kod in kodlar:
+            ad, soyad = rnd.choice(ADLAR), rnd.choice(SOYADLAR)
+            sirket = rnd.random() < 0.6
+            il_id, ilce_id = rnd.choice(self.ilceler)
+            unvan = f'{soyad} {rnd.choice(SEKTORLER)} {rnd.choice(SIRKET_EKLERI)}' if sirket else f'{ad} {soyad}'
+            cariler.append(CariKart(
+                kod=kod,
+                unvan=unvan,
+                grup=rnd.choice(gruplar),
+                yetkili_adi=f'{ad} {soyad}',
+                telefon=f'05{rnd.randrange(10**8, 10**9)}',
+                email=f'{kod.lower()}@ornek.com',
+                adres=f'{rnd.randint(1, 200)}. Sokak No:{rnd.randint(1, 99)}',
+                il_id=il_id,
+                ilce_id=ilce_id,
+                firma_tipi='sirket' if sirket else 'sahis',
+                tc_kimlik='' if sirket else str(rnd.randrange(10**10, 10**11)),
+                sirket_unvani=unvan if sirket else '',
+                vergi_no=str(rnd.randrange(10**9, 10**10)) if sirket else '',
+                vergi_dairesi=f'{rnd.choice(SOYADLAR)} V.D.' if sirket else '',
+                risk_limiti=Decimal(rnd.choice([0, 10000, 50000, 100000])),
+            ))
+
+        for parti in parcalar(cariler, self.parti):
+            CariKart.objects.bulk_create(parti)
+        self.stdout.write(f'{adet} cari oluşturuldu.')
+
+        return list(CariKart.objects.filter(kod__in=kodlar).values_list('pk', flat=True))
+
+    def stoklari_olustur(self, adet, gruplar):
+        if not adet:
+            return list(StokKart.objects.filter(silindi=False))
+
+        rnd = self.rnd
+        kodlar = StokKart.kod_ayir(adet)
+        tl = self.para_birimleri['TL']
+        stoklar = []
+        acilislar = []
+        # Barkodlar aktif stoklarda tekil olmalı
+        barkodlar = set(StokKart.objects.exclude(barkod='').values_list('barkod', flat=True))
+        for kod in kodlar:
+            alis = Decimal(rnd.randint(100, 500000)) / 100
+            barkod = f'869{rnd.randrange(10**9, 10**10)}'
+            while barkod in barkodlar:
+                barkod = f'869{rnd.randrange(10**9, 10**10)}'
+            barkodlar.add(barkod)
+            stok = StokKart(
+                kod=kod,
+                ad=f'{rnd.choice(OZELLIKLER)} {rnd.choice(URUNLER)} {rnd.randint(1, 999)}',
+                barkod=barkod,
+                birim=rnd.choice(StokKart.BIRIMLER)[0],
+                kritik_stok=Decimal(rnd.choice([0, 5, 10, 50])),
+                para_birimi=tl,
+                grup=rnd.choice(gruplar),
+                alis_fiyati=alis,
+                satis_fiyati=(alis * Decimal(rnd.choice(['1.2', '1.35', '1.5']))).quantize(Decimal('0.01')),
+                kdv_orani=rnd.choice([1, 10, 20]),
+            )
+            stoklar.append(stok)
+            acilislar.append((stok, Decimal(rnd.randint(0, 1000))))
+
+        for parti in parcalar(stoklar, self.parti):
+            StokKart.objects.bulk_create(parti)
+
+        # Açılış miktarları stok defterine (tüm faturalardan önceki tarihle) yazılır, kart miktarı sonda defterden hesaplanır
+        acilis_tarihi = self.bitis - timedelta(days=self.gun)
+        StokHareket.objects.bulk_create(
+            [StokHareket(stok=stok, tip='acilis', miktar=miktar, tarih=acilis_tarihi)
+             for stok, miktar in acilislar if miktar],
+            batch_size=self.parti
+        )
+        self.stdout.write(f'{adet} stok oluşturuldu.')
+
+        return stoklar
+
+    def secenekleri_olustur(self, stoklar):
+        rnd = self.rnd
+        secenekler = []
+        for stok in stoklar:
+            if rnd.random() < 0.3:
+                for sira, baslik in enumerate(rnd.sample(sorted(SECENEKLER), rnd.randint(1, 2))):
+                    secenekler.append(StokSecenek(stok=stok, baslik=baslik, sira=sira))
+        StokSecenek.objects.bulk_create(secenekler, batch_size=self.parti)
+
+        degerler = []
+        for secenek in secenekler:
+            for sira, deger in enumerate(SECENEKLER[secenek.baslik]):
+                degerler.append(StokSecenekDeger(
+                    secenek=secenek,
+                    deger=deger,
+                    fiyat_tipi=rnd.choice(['sabit', 'yuzde']),
+                    fiyat_degeri=Decimal(rnd.randint(0, 20)),
+                    sira=sira,
+                    varsayilan=sira == 0,
+                ))
+        StokSecenekDeger.objects.bulk_create(degerler, batch_size=self.parti)
+        self.stdout.write(f'{len(secenekler)} stok seçeneği, {len(degerler)} seçenek değeri oluşturuldu.')
+
+    def grup_fiyatlarini_olustur(self, stoklar, cari_gruplari):
+        rnd = self.rnd
+        fiyatlar = []
+        for stok in stoklar:
+            if rnd.random() < 0.2:
+                for grup in rnd.sample(cari_gruplari, min(len(cari_gruplari), rnd.randint(1, 3))):
+                    oran = Decimal(rnd.randint(80, 98)) / 100
+                    fiyatlar.append(StokGrupFiyat(
+                        stok=stok, cari_grup=grup,
+                        satis_fiyati=(stok.satis_fiyati * oran).quantize(Decimal('0.01'))
+                    ))
+        StokGrupFiyat.objects.bulk_create(fiyatlar, batch_size=self.parti, ignore_conflicts=True)
+        # bulk_create sinyal göndermez
+        transaction.on_commit(matrisleri_gecersiz_kil)
+        self.stdout.write(f'{len(fiyatlar)} grup fiyatı oluşturuldu.')
+
+    def faturalari_olustur(self, adet, en_fazla_kalem, cari_idler, stoklar):
+        if not adet or not cari_idler or not stoklar:
+            return
+
+        rnd = self.rnd
+        taslaklar = sorted(
+            ((self.rastgele_tarih(), 'satis' if rnd.random() < 0.7 else 'alis') for _ in range(adet)),
+            key=lambda t: t[0]
+        )
+
+        # Fatura numaraları tip + yıl serisinden blok halinde ayrılır
+        numaralar = {}
+        for tarih, tip in taslaklar:
+            numaralar.setdefault((tip, tarih.year), []).append(None)
+        for (tip, yil), liste in numaralar.items():
+            numaralar[(tip, yil)] = iter(Fatura.fatura_no_ayir(tip, adet=len(liste), yil=yil))
+
+        kalem_sayisi = 0
+        for parti in parcalar(taslaklar, max(self.parti // max(en_fazla_kalem, 1), 1)):
+            with transaction.atomic():
+                faturalar = []
+                fatura_kalemleri = []
+                for tarih, tip in parti:
+                    fatura = Fatura(
+                        fatura_no=next(numaralar[(tip, tarih.year)]),
+                        tarih=tarih,
+                        tip=tip,
+                        cari_id=rnd.choice(cari_idler),
+                        iskonto_tipi='yuzde' if rnd.random() < 0.1 else None,
+                        iskonto_degeri=Decimal(rnd.choice([5, 10])),
+                        odendi=rnd.random() < 0.5,
+                        olusturan=self.kullanici,
+                    )
+                    kalemler = []
+                    for stok in rnd.sample(stoklar, min(len(stoklar), rnd.randint(1, max(en_fazla_kalem, 1)))):
+                        kalem = FaturaKalem(
+                            fatura=fatura,
+                            stok=stok,
+                            miktar=Decimal(rnd.randint(1, 20)),
+                            birim_fiyat=stok.satis_fiyati if tip == 'satis' else stok.alis_fiyati,
+                            kdv_orani=stok.kdv_orani,
+                            kdv_durumu=rnd.choice(['dahil', 'haric']),
+                        )
+                        kalem.hesapla()
+                        kalemler.append(kalem)
+                    if fatura.iskonto_tipi is None:
+                        fatura.iskonto_degeri = Decimal('0')
+                    fatura.toplamlari_hesapla(kalemler)
+                    faturalar.append(fatura)
+                    fatura_kalemleri.append(kalemler)
+
+                Fatura.objects.bulk_create(faturalar)
+
+                kalemler = []
+                stok_hareketleri = []
+                for fatura, liste in zip(faturalar, fatura_kalemleri):
+                    for kalem in liste:
+                        kalem.fatura = fatura
+                    kalemler.extend(liste)
+                    for hareket in fatura._stok_hareketleri([(k.stok_id, k.miktar) for k in liste], fatura.tip):
+                        hareket.tarih = fatura.tarih
+                        stok_hareketleri.append(hareket)
+
+                FaturaKalem.objects.bulk_create(kalemler)
+                StokHareket.objects.bulk_create(stok_hareketleri)
+                kalem_sayisi += len(kalemler)
+
+        self.stdout.write(f'{adet} fatura, {kalem_sayisi} fatura kalemi oluşturuldu.')
+
+    def hareketleri_olustur(self, adet, cari_idler):
+        if not adet or not cari_idler:
+            return
+
+        rnd = self.rnd
+        kodlar = list(PARA_BIRIMI_AGIRLIKLARI)
+        agirliklar = list(PARA_BIRIMI_AGIRLIKLARI.values())
+        baslangic = self.bitis - timedelta(days=self.gun)
+
+        alanlar = [
+            'tarih', 'cari', 'para_birimi', 'tutar', 'hareket_yonu', 'doviz_kuru', 'tl_karsiligi',
+            'islem_tipi', 'kasa', 'banka', 'pos', 'aciklama', 'olusturan',
+            'olusturma_tarihi', 'guncelleme_tarihi', 'silindi', 'silinme_tarihi', 'silen_kullanici',
+        ]
+        para_birimi_idleri = {kod: pb.pk for kod, pb in self.para_birimleri.items()}
+        ops = connection.ops
+        simdi = ops.adapt_datetimefield_value(timezone.now())
+
+        olusan = 0
+        while olusan < adet:
+            parti = []
+            for _ in range(min(self.parti, adet - olusan)):
+                kod = rnd.choices(kodlar, agirliklar)[0]
+                tarih = self.rastgele_tarih()
+                tutar = Decimal(rnd.randint(100, 5000000)) / 100
+                islem_tipi = rnd.choices(['nakit', 'banka', 'diger'], [45, 45, 10])[0]
+
+                tl_karsiligi = None
+                if kod in TAHMINI_KURLAR:
+                    kur = TAHMINI_KURLAR[kod] * (1 + Decimal((tarih - baslangic).days) / 2000)
+                    tl_karsiligi = (tutar * kur).quantize(Decimal('0.01'))
+
+                parti.append((
+                    ops.adapt_datetimefield_value(tarih),
+                    rnd.choice(cari_idler),
+                    para_birimi_idleri[kod],
+                    ops.adapt_decimalfield_value(tutar),
+                    rnd.choice(['giris', 'cikis']),
+                    None,
+                    ops.adapt_decimalfield_value(tl_karsiligi),
+                    islem_tipi,
+                    self.kasalar[kod] if islem_tipi == 'nakit' else None,
+                    self.bankalar[kod] if islem_tipi == 'banka' else None,
+                    None,
+                    f'Test hareketi {olusan + len(parti) + 1}',
+                    self.kullanici.pk,
+                    simdi, simdi, False, None, None,
+                ))
+
+            with transaction.atomic():
+                toplu_ekle(CariHareket, alanlar, parti)
+            olusan += len(parti)
+            self.stdout.write(f'{olusan}/{adet} cari hareket oluşturuldu.')
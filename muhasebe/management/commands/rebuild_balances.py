@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from muhasebe.donem import BAKIYE_TABLOLARI, bakiye_toplamlari, son_kapanis
+
+
+class Command(BaseCommand):
+    help = 'Cari, kasa ve banka özet bakiyelerini hareketlerden yeniden hesaplar, farkları raporlar ve onarır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kontrol',
+            action='store_true',
+            help='Sadece farkları raporla, özet tabloları değiştirme'
+        )
+        parser.add_argument(
+            '--bastan',
+            action='store_true',
+            help='Dönem kapanışını kullanmadan tüm hareketleri baştan topla'
+        )
+
+    def handle(self, *args, **options):
+        kontrol = options['kontrol']
+        hatali = 0
+
+        with transaction.atomic():
+            # Son kapanıştaki bakiyelerden başlanır, sadece sonraki hareketler toplanır
+            kapanis = None if options['bastan'] else son_kapanis()
+            for etiket, model, donem_model, alanlar, ifade in BAKIYE_TABLOLARI:
+                gercek = bakiye_toplamlari(donem_model, alanlar, ifade, kapanis)
+                hatali += self.karsilastir(etiket, model, alanlar, gercek, kontrol)
+
+        if not hatali:
+            self.stdout.write(self.style.SUCCESS('Tüm özet bakiyeler tutarlı.'))
+        elif kontrol:
+            self.stdout.write(self.style.WARNING(f'{hatali} adet tutarsız bakiye bulundu.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{hatali} adet bakiye onarıldı.'))
+
+    def karsilastir(self, etiket, model, alanlar, gercek, kontrol):
+        """Özet tabloyu gerçek {anahtar: (giris, cikis)} toplamlarıyla karşılaştırır, hatalı satır sayısını döndürür"""
+        # Mevcut özet satırları
+        mevcut = {
+            tuple(getattr(o, alan) for alan in alanlar): o
+            for o in model.objects.select_for_update()
+        }
+
+        # Hareketi kalmamış özet satırları sıfır olmalı
+        for anahtar in mevcut:
+            gercek.setdefault(anahtar, (Decimal('0'), Decimal('0')))
+
+        hatali = 0
+        for anahtar, (giris, cikis) in gercek.items():
+            ozet = mevcut.get(anahtar)
+            if ozet and ozet.toplam_giris == giris and ozet.toplam_cikis == cikis:
+                continue
+
+            hatali += 1
+            self.stdout.write(
+                f"{etiket} {anahtar}: özet={ozet.bakiye if ozet else 'yok'} gerçek={giris - cikis}"
+            )
+            if not kontrol:
+                model.objects.update_or_create(
+                    **dict(zip(alanlar, anahtar)),
+                    defaults={'toplam_giris': giris, 'toplam_cikis': cikis}
+                )
+
+        return hatali
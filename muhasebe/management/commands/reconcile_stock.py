@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from muhasebe.donem import son_kapanis, stok_miktarlari
+from muhasebe.models import StokKart
+
+
+class Command(BaseCommand):
+    help = 'Stok miktarlarını stok defterinden yeniden hesaplar, farkları raporlar ve onarır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kontrol',
+            action='store_true',
+            help='Sadece farkları raporla, stok miktarlarını değiştirme'
+        )
+        parser.add_argument(
+            '--bastan',
+            action='store_true',
+            help='Dönem kapanışını kullanmadan stok defterini baştan topla'
+        )
+
+    def handle(self, *args, **options):
+        kontrol = options['kontrol']
+
+        with transaction.atomic():
+            # Son kapanıştaki miktarlar + sonraki defter (tek gruplu sorgu), kuruşa yuvarlanmış
+            defter = stok_miktarlari(None if options['bastan'] else son_kapanis())
+
+            hatali = []
+            for stok in StokKart.objects.select_for_update().order_by('pk').only('id', 'kod', 'miktar'):
+                gercek = defter.get(stok.id, Decimal('0'))
+                if stok.miktar == gercek:
+                    continue
+
+                self.stdout.write(f"{stok.kod}: kart={stok.miktar} defter={gercek}")
+                stok.miktar = gercek
+                hatali.append(stok)
+
+            if hatali and not kontrol:
+                StokKart.objects.bulk_update(hatali, ['miktar'], batch_size=500)
+
+        if not hatali:
+            self.stdout.write(self.style.SUCCESS('Tüm stok miktarları defterle tutarlı.'))
+        elif kontrol:
+            self.stdout.write(self.style.WARNING(f'{len(hatali)} adet tutarsız stok bulundu.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(hatali)} adet stok miktarı onarıldı.'))
@@ -0,0 +1,68 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from muhasebe.models import CariKart, CariHareket, Fatura
+
+
+def liste_sorgulari():
+    """Liste ekranlarının ilk sayfa sorguları (etiket, queryset)"""
+    hareketler = CariHareket.objects.filter(silindi=False).select_related(
+        'cari', 'para_birimi', 'kasa', 'banka', 'pos', 'olusturan'
+    ).order_by('-tarih', '-id')
+    faturalar = Fatura.objects.filter(silindi=False).select_related('cari', 'olusturan').order_by('-tarih', '-id')
+    son_ay = timezone.now() - timedelta(days=30)
+
+    sorgular = [
+        ('cari_list', CariKart.objects.filter(silindi=False).select_related('grup', 'il', 'ilce').order_by('kod')[:50]),
+        ('cari_hareket_list', hareketler[:50]),
+        ('cari_hareket_list (son 30 gün)', hareketler.filter(tarih__gte=son_ay)[:50]),
+        ('fatura_list', faturalar[:50]),
+        ('fatura_list (son 30 gün)', faturalar.filter(tarih__gte=son_ay)[:50]),
+        ('fatura (varsayılan sıralama)', Fatura.objects.filter(silindi=False)[:50]),
+    ]
+
+    cari = CariKart.objects.filter(silindi=False).order_by('?').first()
+    if cari:
+        sorgular += [
+            ('cari_hareketler (tek cari)', hareketler.filter(cari=cari)[:50]),
+            ('fatura_list (tek cari)', faturalar.filter(cari=cari)[:50]),
+        ]
+
+    return sorgular
+
+
+class Command(BaseCommand):
+    help = 'Liste ekranı sorgularının planlarını ve sürelerini raporlar (indeks öncesi/sonrası karşılaştırma için)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tekrar',
+            type=int,
+            default=5,
+            help='Süre ölçümü için her sorgunun kaç kez çalıştırılacağı'
+        )
+
+    def handle(self, *args, **options):
+        tekrar = max(options['tekrar'], 1)
+
+        self.stdout.write(
+            f"Veritabanı: {connection.vendor} | "
+            f"Cari hareket: {CariHareket.objects.count()} | Fatura: {Fatura.objects.count()}"
+        )
+
+        for etiket, queryset in liste_sorgulari():
+            sureler = []
+            for _ in range(tekrar):
+                baslangic = time.perf_counter()
+                list(queryset.all())
+                sureler.append((time.perf_counter() - baslangic) * 1000)
+
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{etiket}: medyan {statistics.median(sureler):.2f} ms, en kötü {max(sureler):.2f} ms"
+            ))
+            self.stdout.write(queryset.explain())
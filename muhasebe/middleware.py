@@ -0,0 +1,110 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, DatabaseError
+
+logger = logging.getLogger('muhasebe.performans')
+
+# Raporlanacak en yavaş / en çok tekrar eden sorgu sayısı
+RAPOR_SORGU_SAYISI = 5
+
+# IN (%s, %s, ...) listeleri aynı parmak izine düşsün
+_PARAMETRE_LISTESI = re.compile(r'%s(\s*,\s*%s)+')
+
+
+class SorguKaydedici:
+    """connection.execute_wrapper ile her sorgunun SQL'ini ve süresini toplar"""
+
+    def __init__(self):
+        self.sorgular = []
+
+    def __call__(self, execute, sql, params, many, context):
+        baslangic = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sorgular.append((sql, (time.perf_counter() - baslangic) * 1000))
+
+    def ozet(self):
+        toplam_ms = sum(sure for _, sure in self.sorgular)
+        parmak_izleri = Counter(_PARAMETRE_LISTESI.sub('%s', sql) for sql, _ in self.sorgular)
+        tekrar_edenler = [(sayi, sql) for sql, sayi in parmak_izleri.most_common(RAPOR_SORGU_SAYISI) if sayi > 1]
+        en_yavaslar = sorted(self.sorgular, key=lambda s: s[1], reverse=True)[:RAPOR_SORGU_SAYISI]
+        return {
+            'sorgu_sayisi': len(self.sorgular),
+            'sql_ms': round(toplam_ms, 2),
+            'tekrar_eden_sorgu': sum(sayi - 1 for sayi in parmak_izleri.values() if sayi > 1),
+            'en_yavas_sorgular': [{'ms': round(sure, 2), 'sql': sql[:500]} for sql, sure in en_yavaslar],
+            'tekrar_eden_sorgular': [{'adet': sayi, 'sql': sql[:500]} for sayi, sql in tekrar_edenler],
+        }
+
+
+class SorguOlcumMiddleware:
+    """İstek başına sorgu sayısı, SQL süresi ve tekrar eden sorguları ölçer.
+    
+    settings.SORGU_OLCUMU açık değilse devreye girmez. Sonuçlar Server-Timing
+    başlığına, 'muhasebe.performans' log'una (JSON) ve IstekOlcumu tablosuna
+    yazılır; admin'deki İstek Ölçümleri sayfası URL adı bazında p50/p95 verir.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SORGU_OLCUMU', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        kaydedici = SorguKaydedici()
+        baslangic = time.perf_counter()
+        with connection.execute_wrapper(kaydedici):
+            response = self.get_response(request)
+        sure_ms = (time.perf_counter() - baslangic) * 1000
+
+        ozet = kaydedici.ozet()
+        eslesme = getattr(request, 'resolver_match', None)
+        url_adi = (eslesme.view_name if eslesme else None) or '-'
+
+        response['Server-Timing'] = (
+            f'db;dur={ozet["sql_ms"]:.2f};desc="{ozet["sorgu_sayisi"]} sorgu", '
+            f'app;dur={max(sure_ms - ozet["sql_ms"], 0):.2f}'
+        )
+
+        kayit = {
+            'url_adi': url_adi,
+            'yol': request.path,
+            'metot': request.method,
+            'durum_kodu': response.status_code,
+            'sure_ms': round(sure_ms, 2),
+            **ozet,
+        }
+        logger.info(json.dumps(kayit, ensure_ascii=False))
+
+        if getattr(settings, 'SORGU_OLCUMU_KAYDET', True) and not request.path.startswith('/admin/'):
+            self.kaydet(kayit)
+
+        return response
+
+    def kaydet(self, kayit):
+        from .models import IstekOlcumu
+
+        try:
+            IstekOlcumu.objects.create(
+                url_adi=kayit['url_adi'][:100],
+                yol=kayit['yol'][:500],
+                metot=kayit['metot'],
+                durum_kodu=kayit['durum_kodu'],
+                sure_ms=kayit['sure_ms'],
+                sql_ms=kayit['sql_ms'],
+                sorgu_sayisi=kayit['sorgu_sayisi'],
+                tekrar_eden_sorgu=kayit['tekrar_eden_sorgu'],
+                detay={
+                    'en_yavas_sorgular': kayit['en_yavas_sorgular'],
+                    'tekrar_eden_sorgular': kayit['tekrar_eden_sorgular'],
+                },
+            )
+        except DatabaseError as e:
+            logger.error(f"İstek ölçümü kaydedilemedi: {str(e)}")
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def bakiyeleri_doldur(apps, schema_editor):
+    CariHareket = apps.get_model('muhasebe', 'CariHareket')
+    CariBakiye = apps.get_model('muhasebe', 'CariBakiye')
+
+    toplamlar = CariHareket.objects.filter(silindi=False).values(
+        'cari_id', 'para_birimi_id'
+    ).annotate(
+        giris=Sum('tutar', filter=Q(hareket_yonu='giris')),
+        cikis=Sum('tutar', filter=Q(hareket_yonu='cikis')),
+    ).order_by()
+
+    CariBakiye.objects.bulk_create([
+        CariBakiye(
+            cari_id=t['cari_id'],
+            para_birimi_id=t['para_birimi_id'],
+            toplam_giris=t['giris'] or 0,
+            toplam_cikis=t['cikis'] or 0,
+        )
+        for t in toplamlar
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0016_faturakalem_kdv_durumu'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CariBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('guncelleme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('cari', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bakiyeler', to='muhasebe.carikart', verbose_name='Cari')),
+                ('para_birimi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cari_bakiyeleri', to='muhasebe.parabirimi', verbose_name='Para Birimi')),
+            ],
+            options={
+                'verbose_name': 'Cari Bakiye',
+                'verbose_name_plural': 'Cari Bakiyeler',
+                'db_table': 'cari_bakiyeler',
+                'unique_together': {('cari', 'para_birimi')},
+            },
+        ),
+        migrations.RunPython(bakiyeleri_doldur, migrations.RunPython.noop),
+    ]
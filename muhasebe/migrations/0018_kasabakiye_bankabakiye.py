@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+
+
+def bakiyeleri_doldur(apps, schema_editor):
+    CariHareket = apps.get_model('muhasebe', 'CariHareket')
+
+    gercek_tutar = Case(
+        When(
+            Q(doviz_kuru__isnull=False) &
+            Q(tl_karsiligi__isnull=False) &
+            ~Q(para_birimi__kod='TL'),
+            then=F('tl_karsiligi')
+        ),
+        default=F('tutar'),
+        output_field=DecimalField()
+    )
+
+    for model_adi, alan in (('KasaBakiye', 'kasa_id'), ('BankaBakiye', 'banka_id')):
+        Model = apps.get_model('muhasebe', model_adi)
+        toplamlar = CariHareket.objects.filter(
+            silindi=False, **{f'{alan}__isnull': False}
+        ).values(alan).annotate(
+            giris=Sum(gercek_tutar, filter=Q(hareket_yonu='giris')),
+            cikis=Sum(gercek_tutar, filter=Q(hareket_yonu='cikis')),
+        ).order_by()
+
+        Model.objects.bulk_create([
+            Model(**{
+                alan: t[alan],
+                'toplam_giris': t['giris'] or 0,
+                'toplam_cikis': t['cikis'] or 0,
+            })
+            for t in toplamlar
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0017_caribakiye'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankaBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('guncelleme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('banka', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bakiye_ozet', to='muhasebe.banka', verbose_name='Banka')),
+            ],
+            options={
+                'verbose_name': 'Banka Bakiye',
+                'verbose_name_plural': 'Banka Bakiyeler',
+                'db_table': 'banka_bakiyeler',
+            },
+        ),
+        migrations.CreateModel(
+            name='KasaBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('guncelleme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('kasa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bakiye_ozet', to='muhasebe.kasa', verbose_name='Kasa')),
+            ],
+            options={
+                'verbose_name': 'Kasa Bakiye',
+                'verbose_name_plural': 'Kasa Bakiyeler',
+                'db_table': 'kasa_bakiyeler',
+            },
+        ),
+        migrations.RunPython(bakiyeleri_doldur, migrations.RunPython.noop),
+    ]
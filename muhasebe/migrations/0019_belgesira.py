@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0018_kasabakiye_bankabakiye'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BelgeSira',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seri', models.CharField(max_length=20, verbose_name='Seri')),
+                ('yil', models.IntegerField(default=0, verbose_name='Yıl')),
+                ('son_numara', models.PositiveIntegerField(default=0, verbose_name='Son Numara')),
+            ],
+            options={
+                'verbose_name': 'Belge Sırası',
+                'verbose_name_plural': 'Belge Sıraları',
+                'db_table': 'belge_siralari',
+                'unique_together': {('seri', 'yil')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def acilis_hareketleri(apps, schema_editor):
+    # Mevcut stok miktarları defterin açılış satırları olur
+    StokKart = apps.get_model('muhasebe', 'StokKart')
+    StokHareket = apps.get_model('muhasebe', 'StokHareket')
+
+    StokHareket.objects.bulk_create([
+        StokHareket(stok_id=stok_id, tip='acilis', miktar=miktar)
+        for stok_id, miktar in StokKart.objects.exclude(miktar=0).values_list('id', 'miktar')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0019_belgesira'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StokHareket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tip', models.CharField(choices=[('acilis', 'Açılış'), ('duzeltme', 'Düzeltme'), ('satis', 'Satış'), ('alis', 'Alış'), ('iptal', 'İptal')], max_length=10, verbose_name='Hareket Tipi')),
+                ('miktar', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Miktar')),
+                ('tarih', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Tarih')),
+                ('aciklama', models.CharField(blank=True, max_length=200, verbose_name='Açıklama')),
+                ('fatura', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stok_hareketleri', to='muhasebe.fatura', verbose_name='Fatura')),
+                ('stok', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hareketler', to='muhasebe.stokkart', verbose_name='Stok')),
+            ],
+            options={
+                'verbose_name': 'Stok Hareketi',
+                'verbose_name_plural': 'Stok Hareketleri',
+                'db_table': 'stok_hareketleri',
+                'ordering': ['-tarih', '-id'],
+            },
+        ),
+        migrations.RunPython(acilis_hareketleri, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0020_stokhareket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DovizKuru',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kod', models.CharField(max_length=3, verbose_name='Döviz Kodu')),
+                ('tarih', models.DateField(verbose_name='Kur Tarihi')),
+                ('birim', models.IntegerField(default=1, verbose_name='Birim')),
+                ('alis', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True, verbose_name='Döviz Alış')),
+                ('satis', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True, verbose_name='Döviz Satış')),
+                ('guncelleme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Döviz Kuru',
+                'verbose_name_plural': 'Döviz Kurları',
+                'db_table': 'doviz_kurlari',
+                'ordering': ['-tarih', 'kod'],
+                'unique_together': {('kod', 'tarih')},
+            },
+        ),
+    ]
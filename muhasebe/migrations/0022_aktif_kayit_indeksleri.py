@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0021_dovizkuru'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['-tarih', '-id'], name='ch_aktif_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['cari', '-tarih', '-id'], name='ch_aktif_cari_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['cari', 'para_birimi', 'hareket_yonu'], name='ch_aktif_cari_pb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['kasa', '-tarih'], name='ch_aktif_kasa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['banka', '-tarih'], name='ch_aktif_banka_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fatura',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['-tarih', '-id'], name='fatura_aktif_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fatura',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['cari', '-tarih'], name='fatura_aktif_cari_idx'),
+        ),
+    ]
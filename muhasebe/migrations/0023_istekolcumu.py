@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0022_aktif_kayit_indeksleri'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IstekOlcumu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_adi', models.CharField(db_index=True, max_length=100, verbose_name='URL Adı')),
+                ('yol', models.CharField(max_length=500, verbose_name='Yol')),
+                ('metot', models.CharField(max_length=10, verbose_name='Metot')),
+                ('durum_kodu', models.PositiveSmallIntegerField(verbose_name='Durum Kodu')),
+                ('sure_ms', models.FloatField(verbose_name='Toplam Süre (ms)')),
+                ('sql_ms', models.FloatField(verbose_name='SQL Süresi (ms)')),
+                ('sorgu_sayisi', models.PositiveIntegerField(verbose_name='Sorgu Sayısı')),
+                ('tekrar_eden_sorgu', models.PositiveIntegerField(default=0, verbose_name='Tekrar Eden Sorgu')),
+                ('detay', models.JSONField(blank=True, default=dict, verbose_name='Detay')),
+                ('tarih', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Tarih')),
+            ],
+            options={
+                'verbose_name': 'İstek Ölçümü',
+                'verbose_name_plural': 'İstek Ölçümleri',
+                'db_table': 'istek_olcumleri',
+                'ordering': ['-tarih'],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+import re
+
+from django.db import migrations
+
+# Bu göçün çalıştığı andaki arama tablosu ve metin biçimi; muhasebe.arama sonradan değişse de
+# göç aynı şemayı kurar
+TABLO = 'cari_arama'
+
+_TURKCE_KUCUK = str.maketrans({'I': 'ı', 'İ': 'i'})
+_SADELESTIR = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+OLUSTUR = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLO} USING fts5("
+        "unvan, kod, yetkili, kimlik, iletisim, adres, "
+        "tokenize='unicode61', prefix='2 3')",
+    ],
+    'postgresql': [
+        f"CREATE TABLE IF NOT EXISTS {TABLO} ("
+        "cari_id bigint PRIMARY KEY REFERENCES cari_kartlar (id) ON DELETE CASCADE, "
+        "vektor tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {TABLO}_vektor_idx ON {TABLO} USING GIN (vektor)",
+    ],
+}
+
+DOLDUR = {
+    'sqlite': (
+        f"INSERT INTO {TABLO} (rowid, unvan, kod, yetkili, kimlik, iletisim, adres) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+    ),
+    'postgresql': (
+        f"INSERT INTO {TABLO} (cari_id, vektor) VALUES (%s, "
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'C') || setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C') || setweight(to_tsvector('simple', %s), 'D'))"
+    ),
+}
+
+
+def arama_metni(metin):
+    return (metin or '').translate(_TURKCE_KUCUK).lower().translate(_SADELESTIR)
+
+
+def telefon_metni(telefon):
+    rakamlar = re.sub(r'\D', '', telefon or '')
+    varyantlar = {telefon or '', rakamlar, rakamlar.lstrip('0')}
+    if rakamlar.startswith('90'):
+        varyantlar.add(rakamlar[2:])
+    return ' '.join(v for v in varyantlar if v)
+
+
+def cari_satiri(cari):
+    return [
+        cari.pk,
+        arama_metni(cari.unvan),
+        arama_metni(cari.kod),
+        arama_metni(cari.yetkili_adi),
+        arama_metni(f"{cari.vergi_no or ''} {cari.tc_kimlik or ''}"),
+        arama_metni(f"{telefon_metni(cari.telefon)} {cari.email or ''}"),
+        arama_metni(cari.adres),
+    ]
+
+
+def indeks_olustur(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in OLUSTUR:
+        # Tam metin indeksi olmayan veritabanlarında arama icontains ile yapılır
+        return
+
+    CariKart = apps.get_model('muhasebe', 'CariKart')
+    with schema_editor.connection.cursor() as cursor:
+        for sql in OLUSTUR[vendor]:
+            cursor.execute(sql)
+        cursor.executemany(
+            DOLDUR[vendor],
+            (cari_satiri(cari) for cari in CariKart.objects.filter(silindi=False).iterator(chunk_size=2000))
+        )
+
+
+def indeks_kaldir(apps, schema_editor):
+    if schema_editor.connection.vendor not in OLUSTUR:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLO}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0023_istekolcumu'),
+    ]
+
+    operations = [
+        migrations.RunPython(indeks_olustur, indeks_kaldir),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def tekrarlanan_barkodlari_kontrol_et(apps, schema_editor):
+    # Aktif kartlarda aynı barkod varsa kısıt eklenemez; hangi barkodun tutulacağına kullanıcı karar vermeli
+    StokKart = apps.get_model('muhasebe', 'StokKart')
+    aktif = StokKart.objects.filter(silindi=False).exclude(barkod='')
+    tekrarlar = aktif.values('barkod').annotate(adet=Count('id')).filter(adet__gt=1).order_by('barkod')
+
+    satirlar = [
+        f"  {barkod}: {', '.join(aktif.filter(barkod=barkod).order_by('kod').values_list('kod', flat=True))}"
+        for barkod in tekrarlar.values_list('barkod', flat=True)
+    ]
+    if satirlar:
+        raise RuntimeError(
+            'Aynı barkodu kullanan aktif stok kartları var; barkodlar düzeltilmeden '
+            'stok_barkod_tekil kısıtı eklenemez:\n' + '\n'.join(satirlar)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0024_cari_arama'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(tekrarlanan_barkodlari_kontrol_et, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stokkart',
+            constraint=models.UniqueConstraint(condition=models.Q(('silindi', False), models.Q(('barkod', ''), _negated=True)), fields=('barkod',), name='stok_barkod_tekil', violation_error_message='Bu barkod başka bir stok kartında kullanılıyor.'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+def yollari_olustur(apps, schema_editor):
+    """Her grubun yol, tam ad ve seviyesini ust_grup zincirinden hesaplar"""
+    for model_adi in ('CariGrup', 'StokGrup'):
+        model = apps.get_model('muhasebe', model_adi)
+        gruplar = {pk: (ust_grup_id, ad) for pk, ust_grup_id, ad in model.objects.values_list('pk', 'ust_grup_id', 'ad')}
+        yollar = {}
+
+        def hesapla(pk):
+            if pk not in yollar:
+                ust_grup_id, ad = gruplar[pk]
+                if ust_grup_id is None:
+                    yollar[pk] = (f'/{pk}/', ad)
+                else:
+                    ust_yol, ust_adi = hesapla(ust_grup_id)
+                    yollar[pk] = (f'{ust_yol}{pk}/', f'{ust_adi} > {ad}')
+            return yollar[pk]
+
+        model.objects.bulk_update(
+            [model(pk=pk, yol=yol, yol_adi=yol_adi, seviye=yol.count('/') - 1)
+             for pk, (yol, yol_adi) in ((pk, hesapla(pk)) for pk in gruplar)],
+            ['yol', 'yol_adi', 'seviye'], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0025_stok_barkod_tekil'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carigrup',
+            name='yol',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Ağaç Yolu'),
+        ),
+        migrations.AddField(
+            model_name='carigrup',
+            name='yol_adi',
+            field=models.TextField(default='', editable=False, verbose_name='Tam Adı'),
+        ),
+        migrations.AddField(
+            model_name='stokgrup',
+            name='yol',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Ağaç Yolu'),
+        ),
+        migrations.AddField(
+            model_name='stokgrup',
+            name='yol_adi',
+            field=models.TextField(default='', editable=False, verbose_name='Tam Adı'),
+        ),
+        migrations.RunPython(yollari_olustur, migrations.RunPython.noop),
+    ]
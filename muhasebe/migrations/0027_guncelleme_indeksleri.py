@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0026_grup_yollari'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carihareket',
+            index=models.Index(fields=['guncelleme_tarihi'], name='ch_guncelleme_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fatura',
+            index=models.Index(fields=['guncelleme_tarihi'], name='fatura_guncelleme_idx'),
+        ),
+    ]
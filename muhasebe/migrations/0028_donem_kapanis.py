@@ -0,0 +1,96 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0027_guncelleme_indeksleri'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonemKapanis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateTimeField(unique=True, verbose_name='Kapanış Sınırı')),
+                ('tip', models.CharField(choices=[('ay', 'Ay Sonu'), ('yil', 'Yıl Sonu')], max_length=3, verbose_name='Kapanış Tipi')),
+                ('olusturma_tarihi', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Tarihi')),
+                ('kapatan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Kapatan')),
+            ],
+            options={
+                'verbose_name': 'Dönem Kapanışı',
+                'verbose_name_plural': 'Dönem Kapanışları',
+                'db_table': 'donem_kapanislari',
+                'ordering': ['-tarih'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CariDonemBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('cari', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.carikart', verbose_name='Cari')),
+                ('para_birimi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='muhasebe.parabirimi', verbose_name='Para Birimi')),
+                ('kapanis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.donemkapanis', verbose_name='Kapanış')),
+            ],
+            options={
+                'verbose_name': 'Cari Dönem Bakiyesi',
+                'verbose_name_plural': 'Cari Dönem Bakiyeleri',
+                'db_table': 'cari_donem_bakiyeleri',
+                'unique_together': {('kapanis', 'cari', 'para_birimi')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BankaDonemBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('banka', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.banka', verbose_name='Banka')),
+                ('kapanis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.donemkapanis', verbose_name='Kapanış')),
+            ],
+            options={
+                'verbose_name': 'Banka Dönem Bakiyesi',
+                'verbose_name_plural': 'Banka Dönem Bakiyeleri',
+                'db_table': 'banka_donem_bakiyeleri',
+                'unique_together': {('kapanis', 'banka')},
+            },
+        ),
+        migrations.CreateModel(
+            name='KasaDonemBakiye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('toplam_giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Giriş')),
+                ('toplam_cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Çıkış')),
+                ('kapanis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.donemkapanis', verbose_name='Kapanış')),
+                ('kasa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.kasa', verbose_name='Kasa')),
+            ],
+            options={
+                'verbose_name': 'Kasa Dönem Bakiyesi',
+                'verbose_name_plural': 'Kasa Dönem Bakiyeleri',
+                'db_table': 'kasa_donem_bakiyeleri',
+                'unique_together': {('kapanis', 'kasa')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StokDonemMiktar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('miktar', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Miktar')),
+                ('kapanis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.donemkapanis', verbose_name='Kapanış')),
+                ('stok', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='muhasebe.stokkart', verbose_name='Stok')),
+            ],
+            options={
+                'verbose_name': 'Stok Dönem Miktarı',
+                'verbose_name_plural': 'Stok Dönem Miktarları',
+                'db_table': 'stok_donem_miktarlari',
+                'unique_together': {('kapanis', 'stok')},
+            },
+        ),
+    ]
@@ -0,0 +1,211 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Birleşik görünümlerde iki tablonun sütunları aynı sırayla seçilir (UNION ALL sıraya göre eşler)
+CARI_HAREKET_SUTUNLARI = """
+    id, tarih, cari_id, para_birimi_id, tutar, hareket_yonu, doviz_kuru, tl_karsiligi,
+    islem_tipi, kasa_id, banka_id, pos_id, aciklama, olusturan_id, olusturma_tarihi,
+    guncelleme_tarihi, silindi, silinme_tarihi, silen_kullanici_id
+"""
+
+FATURA_SUTUNLARI = """
+    id, fatura_no, tarih, tip, cari_id, iskonto_tipi, iskonto_degeri, iskonto_tutari,
+    ara_toplam, kdv_tutari, genel_toplam, aciklama, vade_tarihi, odendi, iptal, olusturan_id,
+    olusturma_tarihi, guncelleme_tarihi, silindi, silinme_tarihi, silen_kullanici_id
+"""
+
+
+def birlesik_gorunum(ad, tablo, sutunlar):
+    return (
+        f"CREATE VIEW {ad} AS "
+        f"SELECT {sutunlar}, FALSE AS arsivde FROM {tablo} "
+        f"UNION ALL SELECT {sutunlar}, TRUE AS arsivde FROM {tablo}_arsiv"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0028_donem_kapanis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CariHareketTumu',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tarih', models.DateTimeField(verbose_name='İşlem Tarihi')),
+                ('tutar', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Tutar')),
+                ('hareket_yonu', models.CharField(choices=[('giris', 'Giriş'), ('cikis', 'Çıkış')], max_length=10, verbose_name='Hareket Yönü')),
+                ('doviz_kuru', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True, verbose_name='Döviz Kuru')),
+                ('tl_karsiligi', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='TL Karşılığı')),
+                ('islem_tipi', models.CharField(choices=[('nakit', 'Nakit'), ('banka', 'Banka'), ('pos', 'POS'), ('virman', 'Virman'), ('diger', 'Diğer')], max_length=10, verbose_name='İşlem Tipi')),
+                ('aciklama', models.TextField(blank=True, verbose_name='Açıklama')),
+                ('olusturma_tarihi', models.DateTimeField(verbose_name='Oluşturma Tarihi')),
+                ('guncelleme_tarihi', models.DateTimeField(verbose_name='Güncelleme Tarihi')),
+                ('silindi', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('silinme_tarihi', models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')),
+                ('arsivde', models.BooleanField(verbose_name='Arşivde')),
+            ],
+            options={
+                'verbose_name': 'Cari Hareket (Arşiv Dahil)',
+                'verbose_name_plural': 'Cari Hareketler (Arşiv Dahil)',
+                'db_table': 'cari_hareketler_tumu',
+                'ordering': ['-tarih', '-id'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FaturaTumu',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fatura_no', models.CharField(max_length=20, verbose_name='Fatura No')),
+                ('tarih', models.DateTimeField(verbose_name='Fatura Tarihi')),
+                ('tip', models.CharField(choices=[('satis', 'Satış Faturası'), ('alis', 'Alış Faturası')], max_length=20, verbose_name='Fatura Tipi')),
+                ('iskonto_tipi', models.CharField(blank=True, choices=[('yuzde', 'Yüzde'), ('tutar', 'Sabit Tutar')], max_length=10, null=True, verbose_name='İskonto Tipi')),
+                ('iskonto_degeri', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='İskonto Değeri')),
+                ('iskonto_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='İskonto Tutarı')),
+                ('ara_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Ara Toplam')),
+                ('kdv_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='KDV Tutarı')),
+                ('genel_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Genel Toplam')),
+                ('aciklama', models.TextField(blank=True, verbose_name='Açıklama')),
+                ('vade_tarihi', models.DateField(blank=True, null=True, verbose_name='Vade Tarihi')),
+                ('odendi', models.BooleanField(default=False, verbose_name='Ödendi')),
+                ('iptal', models.BooleanField(default=False, verbose_name='İptal')),
+                ('olusturma_tarihi', models.DateTimeField(verbose_name='Oluşturma Tarihi')),
+                ('guncelleme_tarihi', models.DateTimeField(verbose_name='Güncelleme Tarihi')),
+                ('silindi', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('silinme_tarihi', models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')),
+                ('arsivde', models.BooleanField(verbose_name='Arşivde')),
+            ],
+            options={
+                'verbose_name': 'Fatura (Arşiv Dahil)',
+                'verbose_name_plural': 'Faturalar (Arşiv Dahil)',
+                'db_table': 'faturalar_tumu',
+                'ordering': ['-tarih', '-fatura_no'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FaturaArsiv',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fatura_no', models.CharField(max_length=20, verbose_name='Fatura No')),
+                ('tarih', models.DateTimeField(verbose_name='Fatura Tarihi')),
+                ('tip', models.CharField(choices=[('satis', 'Satış Faturası'), ('alis', 'Alış Faturası')], max_length=20, verbose_name='Fatura Tipi')),
+                ('iskonto_tipi', models.CharField(blank=True, choices=[('yuzde', 'Yüzde'), ('tutar', 'Sabit Tutar')], max_length=10, null=True, verbose_name='İskonto Tipi')),
+                ('iskonto_degeri', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='İskonto Değeri')),
+                ('iskonto_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='İskonto Tutarı')),
+                ('ara_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Ara Toplam')),
+                ('kdv_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='KDV Tutarı')),
+                ('genel_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Genel Toplam')),
+                ('aciklama', models.TextField(blank=True, verbose_name='Açıklama')),
+                ('vade_tarihi', models.DateField(blank=True, null=True, verbose_name='Vade Tarihi')),
+                ('odendi', models.BooleanField(default=False, verbose_name='Ödendi')),
+                ('iptal', models.BooleanField(default=False, verbose_name='İptal')),
+                ('olusturma_tarihi', models.DateTimeField(verbose_name='Oluşturma Tarihi')),
+                ('guncelleme_tarihi', models.DateTimeField(verbose_name='Güncelleme Tarihi')),
+                ('silindi', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('silinme_tarihi', models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')),
+                ('cari', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.carikart', verbose_name='Cari')),
+                ('olusturan', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Oluşturan')),
+                ('silen_kullanici', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Silen Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Arşiv Fatura',
+                'verbose_name_plural': 'Arşiv Faturalar',
+                'db_table': 'faturalar_arsiv',
+                'ordering': ['-tarih', '-fatura_no'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FaturaKalemArsiv',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('miktar', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Miktar')),
+                ('birim_fiyat', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Birim Fiyat')),
+                ('kdv_orani', models.IntegerField(default=20, verbose_name='KDV %')),
+                ('indirim_orani', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='İndirim %')),
+                ('indirim_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='İndirim Tutarı')),
+                ('indirim_aciklama', models.CharField(blank=True, max_length=200, verbose_name='İndirim Açıklama')),
+                ('tutar', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Tutar')),
+                ('kdv_tutari', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='KDV Tutarı')),
+                ('toplam_tutar', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Toplam Tutar')),
+                ('kdv_durumu', models.CharField(choices=[('dahil', 'KDV Dahil'), ('haric', 'KDV Hariç')], default='dahil', max_length=10, verbose_name='KDV Durumu')),
+                ('secenekler', models.JSONField(blank=True, default=dict, verbose_name='Seçenekler')),
+                ('secenek_fiyat_farki', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Seçenek Fiyat Farkı')),
+                ('olusturma_tarihi', models.DateTimeField(verbose_name='Oluşturma Tarihi')),
+                ('guncelleme_tarihi', models.DateTimeField(verbose_name='Güncelleme Tarihi')),
+                ('silindi', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('silinme_tarihi', models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')),
+                ('fatura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kalemler', to='muhasebe.faturaarsiv', verbose_name='Fatura')),
+                ('silen_kullanici', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Silen Kullanıcı')),
+                ('stok', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.stokkart', verbose_name='Stok')),
+            ],
+            options={
+                'verbose_name': 'Arşiv Fatura Kalemi',
+                'verbose_name_plural': 'Arşiv Fatura Kalemleri',
+                'db_table': 'fatura_kalemleri_arsiv',
+            },
+        ),
+        migrations.CreateModel(
+            name='CariHareketArsiv',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tarih', models.DateTimeField(verbose_name='İşlem Tarihi')),
+                ('tutar', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Tutar')),
+                ('hareket_yonu', models.CharField(choices=[('giris', 'Giriş'), ('cikis', 'Çıkış')], max_length=10, verbose_name='Hareket Yönü')),
+                ('doviz_kuru', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True, verbose_name='Döviz Kuru')),
+                ('tl_karsiligi', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='TL Karşılığı')),
+                ('islem_tipi', models.CharField(choices=[('nakit', 'Nakit'), ('banka', 'Banka'), ('pos', 'POS'), ('virman', 'Virman'), ('diger', 'Diğer')], max_length=10, verbose_name='İşlem Tipi')),
+                ('aciklama', models.TextField(blank=True, verbose_name='Açıklama')),
+                ('olusturma_tarihi', models.DateTimeField(verbose_name='Oluşturma Tarihi')),
+                ('guncelleme_tarihi', models.DateTimeField(verbose_name='Güncelleme Tarihi')),
+                ('silindi', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('silinme_tarihi', models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')),
+                ('banka', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.banka', verbose_name='Banka')),
+                ('cari', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.carikart', verbose_name='Cari')),
+                ('kasa', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.kasa', verbose_name='Kasa')),
+                ('olusturan', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Oluşturan')),
+                ('para_birimi', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.parabirimi', verbose_name='Para Birimi')),
+                ('pos', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='muhasebe.pos', verbose_name='POS')),
+                ('silen_kullanici', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Silen Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Arşiv Cari Hareket',
+                'verbose_name_plural': 'Arşiv Cari Hareketler',
+                'db_table': 'cari_hareketler_arsiv',
+                'ordering': ['-tarih', '-id'],
+                'abstract': False,
+                'indexes': [models.Index(condition=models.Q(('silindi', False)), fields=['-tarih', '-id'], name='cha_aktif_tarih_idx'), models.Index(condition=models.Q(('silindi', False)), fields=['cari', '-tarih', '-id'], name='cha_aktif_cari_tarih_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='faturaarsiv',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['-tarih', '-id'], name='fatura_arsiv_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faturaarsiv',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['cari', '-tarih'], name='fatura_arsiv_cari_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='faturaarsiv',
+            constraint=models.UniqueConstraint(fields=('fatura_no',), name='fatura_arsiv_no_uniq'),
+        ),
+        migrations.RunSQL(
+            birlesik_gorunum('cari_hareketler_tumu', 'cari_hareketler', CARI_HAREKET_SUTUNLARI),
+            'DROP VIEW cari_hareketler_tumu',
+        ),
+        migrations.RunSQL(
+            birlesik_gorunum('faturalar_tumu', 'faturalar', FATURA_SUTUNLARI),
+            'DROP VIEW faturalar_tumu',
+        ),
+    ]
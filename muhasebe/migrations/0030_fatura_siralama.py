@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0029_arsiv'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='fatura',
+            options={'ordering': ['-tarih', '-id'], 'verbose_name': 'Fatura', 'verbose_name_plural': 'Faturalar'},
+        ),
+        migrations.RemoveIndex(
+            model_name='fatura',
+            name='fatura_aktif_cari_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fatura',
+            index=models.Index(condition=models.Q(('silindi', False)), fields=['cari', '-tarih', '-id'], name='fatura_aktif_cari_idx'),
+        ),
+    ]
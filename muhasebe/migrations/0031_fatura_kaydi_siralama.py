@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muhasebe', '0030_fatura_siralama'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='faturaarsiv',
+            options={'ordering': ['-tarih', '-id'], 'verbose_name': 'Arşiv Fatura', 'verbose_name_plural': 'Arşiv Faturalar'},
+        ),
+        migrations.AlterModelOptions(
+            name='faturatumu',
+            options={'managed': False, 'ordering': ['-tarih', '-id'], 'verbose_name': 'Fatura (Arşiv Dahil)', 'verbose_name_plural': 'Faturalar (Arşiv Dahil)'},
+        ),
+    ]
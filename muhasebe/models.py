@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from decimal import Decimal
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from django.utils import timezone
-from django.db.models import Sum, Q, F
+from django.db.models import Sum, Q, F, Case, When, Value
+from collections import defaultdict
 import random
 import string
 
@@ -35,9 +37,140 @@ class BaseModel(models.Model):
         self.save()
 
 
+# ===================== NUMARALANDIRMA =====================
+
+class BelgeSira(models.Model):
+    """Kod ve belge numaraları için seri + yıl bazında sayaç"""
+    seri = models.CharField(max_length=20, verbose_name='Seri')
+    yil = models.IntegerField(default=0, verbose_name='Yıl')  # 0: yıldan bağımsız seri
+    son_numara = models.PositiveIntegerField(default=0, verbose_name='Son Numara')
+    
+    class Meta:
+        db_table = 'belge_siralari'
+        verbose_name = 'Belge Sırası'
+        verbose_name_plural = 'Belge Sıraları'
+        unique_together = [['seri', 'yil']]
+    
+    def __str__(self):
+        return f"{self.seri} {self.yil or ''} : {self.son_numara}"
+    
+    @classmethod
+    def ayir(cls, seri, yil=0, adet=1, mevcut_son=None):
+        """Seriden ardışık `adet` numara ayırır ve range olarak döndürür.
+        
+        Sayaç önce UPDATE ile artırılıp sonra okunur; UPDATE satırı (SQLite'ta
+        veritabanını) ilk adımda yazma kilidiyle aldığı için eşzamanlı
+        çağrılar aynı numarayı alamaz. Çağıran transaction geri alınırsa
+        ayrılan numaralar da geri alınır, böylece numaralarda boşluk oluşmaz.
+        `mevcut_son` sayaç satırı ilk kez oluşturulurken mevcut kayıtlardaki
+        son numarayı veren fonksiyondur.
+        """
+        siralar = cls.objects.filter(seri=seri, yil=yil)
+        with transaction.atomic():
+            if not siralar.update(son_numara=F('son_numara') + adet):
+                cls.objects.get_or_create(
+                    seri=seri, yil=yil,
+                    defaults={'son_numara': mevcut_son() if mevcut_son else 0}
+                )
+                siralar.update(son_numara=F('son_numara') + adet)
+            son_numara = siralar.values_list('son_numara', flat=True).get()
+        
+        return range(son_numara - adet + 1, son_numara + 1)
+
+
+def son_kod_numarasi(queryset, alan, prefix):
+    """Sayaç öncesi oluşturulmuş kayıtlardaki en büyük numarayı bulur"""
+    son = queryset.filter(**{f'{alan}__startswith': prefix}).order_by(f'-{alan}').values_list(alan, flat=True).first()
+    if not son:
+        return 0
+    try:
+        return int(son[len(prefix):])
+    except ValueError:
+        return 0
+
+
 # ===================== TEMEL MODELLER =====================
 
-class CariGrup(BaseModel):
+class GrupAgaci:
+    """CariGrup ve StokGrup için kayıtlı yol (materialized path) işlemleri.
+    
+    `yol` kökten gruba kadar id'lerin '/1/5/12/' biçimidir, `yol_adi` aynı
+    zincirin 'Kök > Alt > Grup' adıdır. İkisi de kayıtta güncellenir; grup
+    taşınır ya da adı değişirse alt grupların yolları da toplu güncellenir.
+    Böylece alt ağaç tek bir indeksli aralık sorgusu, üst gruplar ise yoldan
+    okunan id'lerdir.
+    """
+    
+    def __str__(self):
+        return self.yol_adi or self.ad
+    
+    @staticmethod
+    def yol_araligi(yol):
+        """`yol` ile başlayan yolların [alt, üst) aralığı ('/' den sonraki karakter '0' dır)"""
+        return yol, yol[:-1] + '0'
+    
+    def alt_agac_kosulu(self, alan=''):
+        """Grup ve alt gruplarına ait kayıtlar için koşul; `alan` ör. 'grup__'"""
+        alt, ust = self.yol_araligi(self.yol)
+        return Q(**{f'{alan}yol__gte': alt, f'{alan}yol__lt': ust})
+    
+    def alt_agac(self):
+        """Grup ve tüm alt grupları"""
+        return type(self).objects.filter(self.alt_agac_kosulu())
+    
+    def ust_grup_idleri(self):
+        """Kökten başlayarak üst grupların id'leri (sorgu çalıştırmaz)"""
+        return [int(pk) for pk in self.yol.strip('/').split('/')[:-1]]
+    
+    def clean(self):
+        super().clean()
+        if self.pk and self.yol and self.ust_grup_id and self.ust_grup.yol.startswith(self.yol):
+            raise ValidationError({'ust_grup': 'Grup kendisinin ya da alt grubunun altına taşınamaz.'})
+    
+    def yolu_guncelle(self):
+        """Kaydedilen grubun yolunu, değiştiyse alt gruplarınkini de günceller"""
+        eski_yol, eski_adi = self.yol, self.yol_adi
+        ust = self.ust_grup
+        self.yol = f"{ust.yol if ust else '/'}{self.pk}/"
+        self.yol_adi = f"{ust.yol_adi} > {self.ad}" if ust else self.ad
+        if (self.yol, self.yol_adi) == (eski_yol, eski_adi):
+            return
+        
+        model = type(self)
+        model.objects.filter(pk=self.pk).update(yol=self.yol, yol_adi=self.yol_adi)
+        if eski_yol:
+            alt, ust_sinir = self.yol_araligi(eski_yol)
+            alt_gruplar = list(model.objects.filter(yol__gt=alt, yol__lt=ust_sinir))
+            for grup in alt_gruplar:
+                grup.yol = self.yol + grup.yol[len(eski_yol):]
+                grup.yol_adi = self.yol_adi + grup.yol_adi[len(eski_adi):]
+                grup.seviye = grup.yol.count('/') - 1
+            model.objects.bulk_update(alt_gruplar, ['yol', 'yol_adi', 'seviye'])
+
+
+def grup_yollarini_olustur(model):
+    """Tüm grupların yol, tam ad ve seviyesini ust_grup zincirinden baştan hesaplar"""
+    gruplar = {pk: (ust_grup_id, ad) for pk, ust_grup_id, ad in model.objects.values_list('pk', 'ust_grup_id', 'ad')}
+    yollar = {}
+    
+    def hesapla(pk):
+        if pk not in yollar:
+            ust_grup_id, ad = gruplar[pk]
+            if ust_grup_id is None:
+                yollar[pk] = (f'/{pk}/', ad)
+            else:
+                ust_yol, ust_adi = hesapla(ust_grup_id)
+                yollar[pk] = (f'{ust_yol}{pk}/', f'{ust_adi} > {ad}')
+        return yollar[pk]
+    
+    model.objects.bulk_update(
+        [model(pk=pk, yol=yol, yol_adi=yol_adi, seviye=yol.count('/') - 1)
+         for pk, (yol, yol_adi) in ((pk, hesapla(pk)) for pk in gruplar)],
+        ['yol', 'yol_adi', 'seviye'], batch_size=500
+    )
+
+
+class CariGrup(GrupAgaci, BaseModel):
     kod = models.CharField(max_length=20, unique=True, verbose_name='Grup Kodu', editable=False)
     ad = models.CharField(max_length=100, verbose_name='Grup Adı')
     ust_grup = models.ForeignKey('self', on_delete=models.CASCADE, 
@@ -46,6 +179,8 @@ class CariGrup(BaseModel):
                                  verbose_name='Üst Grup')
     seviye = models.IntegerField(default=1, verbose_name='Seviye')
     aktif = models.BooleanField(default=True, verbose_name='Aktif')
+    yol = models.CharField(max_length=255, default='', db_index=True, editable=False, verbose_name='Ağaç Yolu')
+    yol_adi = models.TextField(default='', editable=False, verbose_name='Tam Adı')
     
     class Meta:
         db_table = 'cari_gruplar'
@@ -53,41 +188,35 @@ class CariGrup(BaseModel):
         verbose_name_plural = 'Cari Gruplar'
         ordering = ['kod']
     
-    def __str__(self):
-        if self.ust_grup:
-            return f"{self.ust_grup} > {self.ad}"
-        return self.ad
-    
     def save(self, *args, **kwargs):
-        if not self.kod:
-            if self.ust_grup:
-                if self.ust_grup.ust_grup:
-                    prefix = 'AG'
+        with transaction.atomic():
+            if not self.kod:
+                if self.ust_grup:
+                    if self.ust_grup.seviye > 1:
+                        prefix = 'AG'
+                    else:
+                        prefix = 'AR'
                 else:
-                    prefix = 'AR'
-            else:
-                prefix = 'GR'
+                    prefix = 'GR'
             
-            last_grup = CariGrup.objects.filter(kod__startswith=prefix).order_by('-kod').first()
-            if last_grup:
-                last_number = int(last_grup.kod.replace(prefix, ''))
-                new_number = last_number + 1
-            else:
-                new_number = 1
+                new_number = BelgeSira.ayir(
+                    prefix, mevcut_son=lambda: son_kod_numarasi(CariGrup.objects, 'kod', prefix)
+                )[0]
             
-            self.kod = f"{prefix}{new_number:03d}"
+                self.kod = f"{prefix}{new_number:03d}"
         
-        if self.ust_grup:
-            self.seviye = self.ust_grup.seviye + 1
-        else:
-            self.seviye = 1
+            if self.ust_grup:
+                self.seviye = self.ust_grup.seviye + 1
+            else:
+                self.seviye = 1
         
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            self.yolu_guncelle()
 
 
 
 
-class StokGrup(BaseModel):
+class StokGrup(GrupAgaci, BaseModel):
     kod = models.CharField(max_length=20, unique=True, verbose_name='Grup Kodu', editable=False)
     ad = models.CharField(max_length=100, verbose_name='Grup Adı')
     ust_grup = models.ForeignKey('self', on_delete=models.CASCADE, 
@@ -96,6 +225,8 @@ class StokGrup(BaseModel):
                                  verbose_name='Üst Grup')
     seviye = models.IntegerField(default=1, verbose_name='Seviye')
     aktif = models.BooleanField(default=True, verbose_name='Aktif')
+    yol = models.CharField(max_length=255, default='', db_index=True, editable=False, verbose_name='Ağaç Yolu')
+    yol_adi = models.TextField(default='', editable=False, verbose_name='Tam Adı')
     
     class Meta:
         db_table = 'stok_gruplar'
@@ -103,36 +234,30 @@ class StokGrup(BaseModel):
         verbose_name_plural = 'Stok Gruplar'
         ordering = ['kod']
     
-    def __str__(self):
-        if self.ust_grup:
-            return f"{self.ust_grup} > {self.ad}"
-        return self.ad
-    
     def save(self, *args, **kwargs):
-        if not self.kod:
-            if self.ust_grup:
-                if self.ust_grup.ust_grup:
-                    prefix = 'SAG'
+        with transaction.atomic():
+            if not self.kod:
+                if self.ust_grup:
+                    if self.ust_grup.seviye > 1:
+                        prefix = 'SAG'
+                    else:
+                        prefix = 'SAR'
                 else:
-                    prefix = 'SAR'
-            else:
-                prefix = 'SGR'
+                    prefix = 'SGR'
             
-            last_grup = StokGrup.objects.filter(kod__startswith=prefix).order_by('-kod').first()
-            if last_grup:
-                last_number = int(last_grup.kod.replace(prefix, ''))
-                new_number = last_number + 1
-            else:
-                new_number = 1
+                new_number = BelgeSira.ayir(
+                    prefix, mevcut_son=lambda: son_kod_numarasi(StokGrup.objects, 'kod', prefix)
+                )[0]
             
-            self.kod = f"{prefix}{new_number:03d}"
+                self.kod = f"{prefix}{new_number:03d}"
         
-        if self.ust_grup:
-            self.seviye = self.ust_grup.seviye + 1
-        else:
-            self.seviye = 1
+            if self.ust_grup:
+                self.seviye = self.ust_grup.seviye + 1
+            else:
+                self.seviye = 1
         
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            self.yolu_guncelle()
 
 
 class Il(models.Model):
@@ -180,6 +305,26 @@ class ParaBirimi(BaseModel):
         return f"{self.kod} - {self.ad}"
 
 
+class DovizKuru(models.Model):
+    """TCMB günlük döviz kurları (para birimi + tarih bazında)"""
+    kod = models.CharField(max_length=3, verbose_name='Döviz Kodu')
+    tarih = models.DateField(verbose_name='Kur Tarihi')
+    birim = models.IntegerField(default=1, verbose_name='Birim')
+    alis = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True, verbose_name='Döviz Alış')
+    satis = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True, verbose_name='Döviz Satış')
+    guncelleme_tarihi = models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')
+    
+    class Meta:
+        db_table = 'doviz_kurlari'
+        verbose_name = 'Döviz Kuru'
+        verbose_name_plural = 'Döviz Kurları'
+        ordering = ['-tarih', 'kod']
+        unique_together = [['kod', 'tarih']]
+    
+    def __str__(self):
+        return f"{self.kod} {self.tarih} : {self.satis}"
+
+
 # ===================== KASA/BANKA MODELLER =====================
 
 class Kasa(BaseModel):
@@ -201,49 +346,11 @@ class Kasa(BaseModel):
     
     @property
     def bakiye(self):
-        """Kasa bakiyesi hareketlerden hesaplanır"""
-        from django.db.models import Sum, Q, Case, When, F, DecimalField
-        
-        result = CariHareket.objects.filter(
-            kasa=self,
-            silindi=False
-        ).aggregate(
-            giris=Sum(
-                Case(
-                    # Döviz işlemi varsa TL karşılığını al
-                    When(
-                        Q(doviz_kuru__isnull=False) & 
-                        Q(tl_karsiligi__isnull=False) & 
-                        ~Q(para_birimi__kod='TL'),
-                        then=F('tl_karsiligi')
-                    ),
-                    # Değilse normal tutarı al
-                    default=F('tutar'),
-                    output_field=DecimalField()
-                ),
-                filter=Q(hareket_yonu='giris')
-            ),
-            cikis=Sum(
-                Case(
-                    # Döviz işlemi varsa TL karşılığını al
-                    When(
-                        Q(doviz_kuru__isnull=False) & 
-                        Q(tl_karsiligi__isnull=False) & 
-                        ~Q(para_birimi__kod='TL'),
-                        then=F('tl_karsiligi')
-                    ),
-                    # Değilse normal tutarı al
-                    default=F('tutar'),
-                    output_field=DecimalField()
-                ),
-                filter=Q(hareket_yonu='cikis')
-            )
-        )
-        
-        giris_toplam = result['giris'] or Decimal('0')
-        cikis_toplam = result['cikis'] or Decimal('0')
-        
-        return giris_toplam - cikis_toplam
+        """Kasa bakiyesi (TL karşılıklı) özet tablodan okunur"""
+        try:
+            return self.bakiye_ozet.bakiye
+        except KasaBakiye.DoesNotExist:
+            return Decimal('0')
 
 
 class Banka(BaseModel):
@@ -270,49 +377,11 @@ class Banka(BaseModel):
     
     @property
     def bakiye(self):
-        """Banka bakiyesi hareketlerden hesaplanır"""
-        from django.db.models import Sum, Q, Case, When, F, DecimalField
-        
-        result = CariHareket.objects.filter(
-            banka=self,
-            silindi=False
-        ).aggregate(
-            giris=Sum(
-                Case(
-                    # Döviz işlemi varsa TL karşılığını al
-                    When(
-                        Q(doviz_kuru__isnull=False) & 
-                        Q(tl_karsiligi__isnull=False) & 
-                        ~Q(para_birimi__kod='TL'),
-                        then=F('tl_karsiligi')
-                    ),
-                    # Değilse normal tutarı al
-                    default=F('tutar'),
-                    output_field=DecimalField()
-                ),
-                filter=Q(hareket_yonu='giris')
-            ),
-            cikis=Sum(
-                Case(
-                    # Döviz işlemi varsa TL karşılığını al
-                    When(
-                        Q(doviz_kuru__isnull=False) & 
-                        Q(tl_karsiligi__isnull=False) & 
-                        ~Q(para_birimi__kod='TL'),
-                        then=F('tl_karsiligi')
-                    ),
-                    # Değilse normal tutarı al
-                    default=F('tutar'),
-                    output_field=DecimalField()
-                ),
-                filter=Q(hareket_yonu='cikis')
-            )
-        )
-        
-        giris_toplam = result['giris'] or Decimal('0')
-        cikis_toplam = result['cikis'] or Decimal('0')
-        
-        return giris_toplam - cikis_toplam
+        """Banka bakiyesi (TL karşılıklı) özet tablodan okunur"""
+        try:
+            return self.bakiye_ozet.bakiye
+        except BankaBakiye.DoesNotExist:
+            return Decimal('0')
 
 
 class Pos(BaseModel):
@@ -394,62 +463,47 @@ class CariKart(BaseModel):
     def __str__(self):
         return f"{self.kod} - {self.unvan}"
     
+    @classmethod
+    def kod_ayir(cls, adet=1):
+        """Ardışık cari kodları ayırır (toplu aktarımlarda blok halinde)"""
+        prefix = 'CK'
+        numaralar = BelgeSira.ayir(
+            prefix, adet=adet, mevcut_son=lambda: son_kod_numarasi(cls.objects, 'kod', prefix)
+        )
+        return [f"{prefix}{n:06d}" for n in numaralar]
+    
     def save(self, *args, **kwargs):
-        if not self.kod:
-            prefix = 'CK'
-            last_cari = CariKart.objects.filter(kod__startswith=prefix).order_by('-kod').first()
-            if last_cari:
-                last_number = int(last_cari.kod.replace(prefix, ''))
-                new_number = last_number + 1
-            else:
-                new_number = 1
+        with transaction.atomic():
+            if not self.kod:
+                self.kod = self.kod_ayir()[0]
             
-            self.kod = f"{prefix}{new_number:06d}"
-        
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            
+            # Arama indeksi kayıtla aynı işlemde güncellenir (soft_delete de buradan geçer)
+            from .arama import arama_motoru
+            arama_motoru().guncelle(self)
     
     @property
     def bakiye(self):
         """TL cinsinden bakiye (geriye uyumluluk için)"""
-        from django.db.models import Sum, Q
-        
-        try:
-            tl = ParaBirimi.objects.get(kod='TL')
-            result = CariHareket.objects.filter(
-                cari=self,
-                silindi=False,
-                para_birimi=tl
-            ).aggregate(
-                giris=Sum('tutar', filter=Q(hareket_yonu='giris')),
-                cikis=Sum('tutar', filter=Q(hareket_yonu='cikis'))
-            )
-            
-            giris_toplam = result['giris'] or Decimal('0')
-            cikis_toplam = result['cikis'] or Decimal('0')
-            
-            return giris_toplam - cikis_toplam
-        except ParaBirimi.DoesNotExist:
-            return Decimal('0')
+        ozet = CariBakiye.objects.filter(cari=self, para_birimi__kod='TL').first()
+        return ozet.bakiye if ozet else Decimal('0')
     
     def get_bakiye_detay(self):
         """Tüm para birimleri için bakiye detayı"""
-        from django.db.models import Sum, Q, F
-        
-        return CariHareket.objects.filter(
-            cari=self,
-            silindi=False
+        return CariBakiye.objects.filter(
+            cari=self
+        ).filter(
+            Q(toplam_giris__gt=0) | Q(toplam_cikis__gt=0)
         ).values(
             'para_birimi__id',
             'para_birimi__kod',
-            'para_birimi__ad'
-        ).annotate(
-            toplam_giris=Sum('tutar', filter=Q(hareket_yonu='giris')),
-            toplam_cikis=Sum('tutar', filter=Q(hareket_yonu='cikis'))
+            'para_birimi__ad',
+            'toplam_giris',
+            'toplam_cikis'
         ).annotate(
             bakiye=F('toplam_giris') - F('toplam_cikis')
-        ).filter(
-            Q(toplam_giris__gt=0) | Q(toplam_cikis__gt=0)
-        )
+        ).order_by('para_birimi__kod')
 
 
 # ===================== STOK MODELLER =====================
@@ -500,35 +554,100 @@ class StokKart(BaseModel):
         verbose_name = 'Stok Kart'
         verbose_name_plural = 'Stok Kartlar'
         ordering = ['kod']
+        constraints = [
+            # Barkod okutmada birebir arama bu indeksten yapılır; boş barkod serbest
+            models.UniqueConstraint(
+                fields=['barkod'],
+                condition=Q(silindi=False) & ~Q(barkod=''),
+                name='stok_barkod_tekil',
+                violation_error_message='Bu barkod başka bir stok kartında kullanılıyor.'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.kod} - {self.ad}"
     
+    @classmethod
+    def kod_ayir(cls, adet=1):
+        """Ardışık stok kodları ayırır (toplu aktarımlarda blok halinde)"""
+        prefix = 'STK'
+        numaralar = BelgeSira.ayir(
+            prefix, adet=adet, mevcut_son=lambda: son_kod_numarasi(cls.objects, 'kod', prefix)
+        )
+        return [f"{prefix}{n:06d}" for n in numaralar]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Miktarın elle değiştirilip değiştirilmediğini save'de anlamak için
+        if 'miktar' in field_names:
+            instance._yuklenen_miktar = instance.miktar
+        return instance
+    
     def save(self, *args, **kwargs):
-        if not self.kod:
-            # Otomatik kod oluştur
-            prefix = 'STK'
-            last_stok = StokKart.objects.filter(kod__startswith=prefix).order_by('-kod').first()
-            if last_stok:
+        with transaction.atomic():
+            if not self.kod:
+                # Otomatik kod oluştur
+                self.kod = self.kod_ayir()[0]
+            
+            # Para birimi yoksa varsayılan TL yap
+            if not self.para_birimi_id:
                 try:
-                    last_number = int(last_stok.kod.replace(prefix, ''))
-                    new_number = last_number + 1
+                    tl = ParaBirimi.objects.get(kod='TL')
+                    self.para_birimi = tl
                 except:
-                    new_number = 1
-            else:
-                new_number = 1
+                    pass
             
-            self.kod = f"{prefix}{new_number:06d}"
-        
-        # Para birimi yoksa varsayılan TL yap
-        if not self.para_birimi_id:
-            try:
-                tl = ParaBirimi.objects.get(kod='TL')
-                self.para_birimi = tl
-            except:
-                pass
-        
-        super().save(*args, **kwargs)
+            # Miktar değişmediyse satır yazılırken miktar kolonuna dokunulmaz;
+            # böylece eski bir nesnenin kaydı eşzamanlı stok hareketlerini ezmez
+            yeni = self._state.adding
+            if not yeni and 'update_fields' not in kwargs and \
+                    getattr(self, '_yuklenen_miktar', None) == self.miktar:
+                kwargs['update_fields'] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name != 'miktar'
+                ]
+                super().save(*args, **kwargs)
+                return
+            
+            eski_miktar = Decimal('0')
+            if not yeni:
+                eski_miktar = StokKart.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('miktar', flat=True).first() or Decimal('0')
+            
+            super().save(*args, **kwargs)
+            
+            # Elle girilen miktar farkı stok defterine açılış/düzeltme olarak yazılır
+            fark = Decimal(str(self.miktar)) - eski_miktar
+            if fark:
+                StokHareket.objects.create(
+                    stok=self,
+                    tip='acilis' if yeni else 'duzeltme',
+                    miktar=fark
+                )
+            self._yuklenen_miktar = self.miktar
+    
+    @classmethod
+    def miktar_guncelle(cls, degisimler):
+        """{stok_id: miktar farkı} sözlüğündeki değişimleri tek UPDATE ile uygular"""
+        degisimler = {stok_id: fark for stok_id, fark in degisimler.items() if fark}
+        if not degisimler:
+            return
+        with transaction.atomic():
+            # Satırlar her zaman id sırasıyla kilitlenir (eşzamanlı faturalarda deadlock olmaz)
+            list(cls.objects.select_for_update().filter(
+                pk__in=degisimler.keys()
+            ).order_by('pk').values_list('pk', flat=True))
+            
+            cls.objects.filter(pk__in=degisimler.keys()).update(
+                miktar=Case(
+                    *[When(pk=stok_id, then=F('miktar') + Value(fark))
+                      for stok_id, fark in degisimler.items()],
+                    default=F('miktar'),
+                    output_field=models.DecimalField()
+                )
+            )
 
 
 class StokGrupFiyat(BaseModel):
@@ -652,9 +771,55 @@ class StokSecenekDeger(BaseModel):
             return base_fiyat * self.fiyat_degeri / Decimal('100')
 
 
+# ===================== DÖNEM KİLİDİ =====================
+
+class DonemKilitli(ValidationError):
+    """Kapanmış döneme ait bir kayıt eklenmek, değiştirilmek ya da silinmek istendi"""
+    
+    def __init__(self, kilit):
+        self.kilit = kilit
+        super().__init__({'tarih': self.mesaj(kilit)})
+    
+    @staticmethod
+    def mesaj(kilit):
+        return f"{timezone.localtime(kilit):%d.%m.%Y} öncesi kapanmış dönemdir, bu döneme ait kayıtlar değiştirilemez."
+
+
+class DonemKilidi:
+    """Kapanmış dönemlerdeki kayıtların değiştirilmesini engeller (`tarih` alanına göre).
+
+    Dönem kapanışındaki bakiye görüntüleri (DonemKapanis) ancak kapanış
+    öncesindeki hareketler değişmezse geçerli kalır. Kontrol hem kaydın yeni
+    hem de veritabanındaki eski tarihi için yapılır; formlarda tarih alanı
+    hatası olarak görünür.
+    """
+    
+    def donem_kilidini_kontrol(self):
+        kilit = DonemKapanis.kilit_tarihi()
+        if kilit is None:
+            return
+        tarihler = [self.tarih]
+        if self.pk:
+            tarihler.append(type(self).objects.filter(pk=self.pk).values_list('tarih', flat=True).first())
+        if any(tarih is not None and tarih < kilit for tarih in tarihler):
+            raise DonemKilitli(kilit)
+    
+    def clean(self):
+        super().clean()
+        self.donem_kilidini_kontrol()
+    
+    def save(self, *args, **kwargs):
+        self.donem_kilidini_kontrol()
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        self.donem_kilidini_kontrol()
+        return super().delete(*args, **kwargs)
+
+
 # ===================== FATURA MODELLER =====================
 
-class Fatura(BaseModel):
+class Fatura(DonemKilidi, BaseModel):
     FATURA_TIPLERI = [
         ('satis', 'Satış Faturası'),
         ('alis', 'Alış Faturası'),
@@ -695,31 +860,161 @@ class Fatura(BaseModel):
         db_table = 'faturalar'
         verbose_name = 'Fatura'
         verbose_name_plural = 'Faturalar'
-        ordering = ['-tarih', '-fatura_no']
+        # fatura_aktif_tarih_idx ile aynı sıra; farklı olursa varsayılan sıralı sorgular ayrıca sıralanır
+        ordering = ['-tarih', '-id']
+        # Silinmemiş kayıtlar için kısmi indeksler (listeler hep silindi=False ile filtreler)
+        indexes = [
+            models.Index(fields=['-tarih', '-id'], condition=Q(silindi=False), name='fatura_aktif_tarih_idx'),
+            models.Index(fields=['cari', '-tarih', '-id'], condition=Q(silindi=False), name='fatura_aktif_cari_idx'),
+            # Analitik artımlı aktarım (muhasebe/analitik.py); silinenler de aktarıldığı için koşulsuz
+            models.Index(fields=['guncelleme_tarihi'], name='fatura_guncelleme_idx'),
+        ]
     
     def __str__(self):
         return f"{self.fatura_no} - {self.cari.unvan}"
     
+    @classmethod
+    def fatura_no_ayir(cls, tip, adet=1, yil=None):
+        """Fatura tipi ve yıl serisinden ardışık fatura numaraları ayırır"""
+        prefix = 'SF' if tip == 'satis' else 'AF'
+        yil = yil or timezone.now().year
+        numaralar = BelgeSira.ayir(
+            prefix, yil=yil, adet=adet,
+            mevcut_son=lambda: son_kod_numarasi(cls.objects, 'fatura_no', f"{prefix}{yil}")
+        )
+        return [f"{prefix}{yil}{n:06d}" for n in numaralar]
+    
     def save(self, *args, **kwargs):
-        if not self.fatura_no:
-            # Otomatik fatura no oluştur
-            prefix = 'SF' if self.tip == 'satis' else 'AF'
-            yil = timezone.now().year
+        with transaction.atomic():
+            if not self.fatura_no:
+                # Otomatik fatura no oluştur
+                self.fatura_no = self.fatura_no_ayir(self.tip)[0]
+            
+            super().save(*args, **kwargs)
+    
+    def kalemleri_kaydet(self, kalemler_data, eski_tip=None, eski_tarih=None):
+        """Fatura kalemlerini toplu olarak yazar, toplamları ve stok miktarlarını günceller.
+        
+        Mevcut kalemler varsa stok etkileri geri alınıp silinir (`eski_tip` ve
+        `eski_tarih` faturanın düzenleme öncesi tipi ve tarihidir). Grup fiyatları ve seçenek farkları
+        `fiyat.sepet_fiyatla` ile toplu hesaplanır, kalemler bulk_create ile
+        yazılır; stok etkileri stok defterine işlenir ve miktarlar tek UPDATE
+        ile güncellenir.
+        """
+        from .fiyat import sepet_fiyatla
+        
+        with transaction.atomic():
+            # Önce eski stok durumlarını geri al
+            eski_kalemler = list(self.kalemler.values_list('stok_id', 'miktar'))
+            stok_hareketleri = self._stok_hareketleri(
+                eski_kalemler, eski_tip or self.tip, geri_al=True, tarih=eski_tarih
+            )
+            if eski_kalemler:
+                self.kalemler.all().delete()
             
-            # Bu yılın son fatura numarasını bul
-            last_fatura = Fatura.objects.filter(
-                fatura_no__startswith=f"{prefix}{yil}"
-            ).order_by('-fatura_no').first()
+            # Stoklar ve seçenek değerleri birer sorguda, cari grup (ve üst grup) fiyatları matristen
+            fiyatlar = sepet_fiyatla(kalemler_data, self.cari)
             
-            if last_fatura:
-                last_number = int(last_fatura.fatura_no[-6:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
+            kalemler = []
+            for kalem_data, fiyat in zip(kalemler_data, fiyatlar):
+                stok = fiyat['stok']
+                
+                # Fiyat hesaplama
+                birim_fiyat = Decimal(str(kalem_data['birim_fiyat']))
+                indirim_orani = Decimal('0')
+                indirim_aciklama = ''
+                
+                # Cari grup özel fiyatı
+                if fiyat['grup']:
+                    eski_fiyat = birim_fiyat
+                    birim_fiyat = fiyat['fiyat']
+                    if eski_fiyat > 0:
+                        indirim_orani = ((eski_fiyat - birim_fiyat) / eski_fiyat) * 100
+                        indirim_aciklama = f"{fiyat['grup']} grubuna özel fiyat"
+                
+                kalem = FaturaKalem(
+                    fatura=self,
+                    stok=stok,
+                    miktar=Decimal(str(kalem_data['miktar'])),
+                    birim_fiyat=birim_fiyat,
+                    kdv_orani=kalem_data.get('kdv_orani', stok.kdv_orani),
+                    kdv_durumu=kalem_data.get('kdv_durumu', 'dahil'),
+                    indirim_orani=indirim_orani,
+                    indirim_aciklama=indirim_aciklama,
+                    secenekler=kalem_data.get('secenekler', {}),
+                    secenek_fiyat_farki=fiyat['secenek_fiyat_farki']
+                )
+                kalem.hesapla()
+                kalemler.append(kalem)
+            
+            FaturaKalem.objects.bulk_create(kalemler)
+            stok_hareketleri += self._stok_hareketleri(
+                [(kalem.stok_id, kalem.miktar) for kalem in kalemler], self.tip
+            )
+            StokHareket.uygula(stok_hareketleri)
             
-            self.fatura_no = f"{prefix}{yil}{new_number:06d}"
+            self.toplamlari_hesapla(kalemler)
+            self.save(update_fields=['ara_toplam', 'iskonto_tutari', 'kdv_tutari', 'genel_toplam', 'guncelleme_tarihi'])
         
-        super().save(*args, **kwargs)
+        return kalemler
+    
+    def _stok_hareketleri(self, kalemler, tip, geri_al=False, tarih=None):
+        """(stok_id, miktar) listesinden stok defteri satırları oluşturur.
+        
+        Satırlar (verilmezse) fatura tarihini alır; dönem kilidi ve dönem sonu
+        stok miktarları da belge tarihine göre çalışır.
+        """
+        # Satış stoktan düşer, alış ekler; geri almada işaret ters çevrilir
+        isaret = -1 if tip == 'satis' else 1
+        if geri_al:
+            isaret = -isaret
+        return [
+            StokHareket(
+                stok_id=stok_id,
+                fatura=self,
+                tip='iptal' if geri_al else tip,
+                miktar=miktar * isaret,
+                tarih=tarih or self.tarih,
+                aciklama=self.fatura_no
+            )
+            for stok_id, miktar in kalemler
+        ]
+    
+    def soft_delete(self, user):
+        """Fatura silinince kalemlerin stok etkisi geri alınır"""
+        with transaction.atomic():
+            if not self.silindi:
+                kalemler = self.kalemler.values_list('stok_id', 'miktar')
+                StokHareket.uygula(self._stok_hareketleri(kalemler, self.tip, geri_al=True))
+            super().soft_delete(user)
+    
+    def restore(self):
+        """Geri yüklenen faturanın stok etkisi yeniden uygulanır"""
+        with transaction.atomic():
+            if self.silindi:
+                kalemler = self.kalemler.values_list('stok_id', 'miktar')
+                StokHareket.uygula(self._stok_hareketleri(kalemler, self.tip))
+            super().restore()
+    
+    def toplamlari_hesapla(self, kalemler):
+        """Kalemlerden ara toplam, iskonto, KDV ve genel toplamı hesapla"""
+        # tutar alanı zaten net tutar (KDV hariç)
+        ara_toplam = sum((kalem.tutar for kalem in kalemler), Decimal('0'))
+        toplam_kdv = sum((kalem.kdv_tutari for kalem in kalemler), Decimal('0'))
+        
+        self.ara_toplam = ara_toplam
+        
+        # Fatura iskontosu
+        if self.iskonto_tipi == 'yuzde' and self.iskonto_degeri > 0:
+            self.iskonto_tutari = (ara_toplam * self.iskonto_degeri / Decimal('100')).quantize(Decimal('0.01'))
+        elif self.iskonto_tipi == 'tutar':
+            self.iskonto_tutari = self.iskonto_degeri
+        else:
+            self.iskonto_tutari = Decimal('0')
+        
+        # İskontolu ara toplam + KDV
+        self.kdv_tutari = toplam_kdv
+        self.genel_toplam = ara_toplam - self.iskonto_tutari + toplam_kdv
 
 
 class FaturaKalem(BaseModel):
@@ -760,18 +1055,19 @@ class FaturaKalem(BaseModel):
         verbose_name_plural = 'Fatura Kalemleri'
     
     def hesapla(self):
-        """Satır tutarlarını hesapla"""
+        """Satır tutarlarını hesapla (kuruşa yuvarlanır; fatura toplamları kayıtlı satırlarla aynı olsun diye)"""
+        kurus = Decimal('0.01')
         # Temel tutar (miktar * birim fiyat + seçenek farkı)
         base_tutar = self.miktar * (self.birim_fiyat + self.secenek_fiyat_farki)
         
         # İndirim hesapla
         if self.indirim_orani > 0:
-            self.indirim_tutari = base_tutar * Decimal(self.indirim_orani) / Decimal(100)
+            self.indirim_tutari = (base_tutar * Decimal(self.indirim_orani) / Decimal(100)).quantize(kurus)
         else:
             self.indirim_tutari = Decimal('0')
         
         # İndirimli tutar
-        indirimli_tutar = base_tutar - self.indirim_tutari
+        indirimli_tutar = (base_tutar - self.indirim_tutari).quantize(kurus)
         
         if self.kdv_durumu == 'dahil':
             # KDV dahilse - Toplam tutar sabit, KDV'yi içeriden hesapla
@@ -779,14 +1075,14 @@ class FaturaKalem(BaseModel):
             
             # KDV'yi içeriden hesapla
             kdv_orani_katsayi = Decimal(100) + Decimal(self.kdv_orani)
-            self.kdv_tutari = (indirimli_tutar * Decimal(self.kdv_orani)) / kdv_orani_katsayi
+            self.kdv_tutari = ((indirimli_tutar * Decimal(self.kdv_orani)) / kdv_orani_katsayi).quantize(kurus)
             
             # Net tutar (KDV hariç)
             self.tutar = indirimli_tutar - self.kdv_tutari
         else:
             # KDV hariçse - Net tutar sabit, KDV'yi üzerine ekle
             self.tutar = indirimli_tutar  # Net tutar (KDV hariç)
-            self.kdv_tutari = indirimli_tutar * Decimal(self.kdv_orani) / Decimal(100)
+            self.kdv_tutari = (indirimli_tutar * Decimal(self.kdv_orani) / Decimal(100)).quantize(kurus)
             self.toplam_tutar = indirimli_tutar + self.kdv_tutari  # Toplam (KDV dahil)
     
     def save(self, *args, **kwargs):
@@ -799,6 +1095,49 @@ class FaturaKalem(BaseModel):
 
 # ===================== HAREKET MODELLER =====================
 
+class StokHareket(models.Model):
+    """Stok defteri: stok miktarını değiştiren her etki için bir satır"""
+    TIPLER = [
+        ('acilis', 'Açılış'),
+        ('duzeltme', 'Düzeltme'),
+        ('satis', 'Satış'),
+        ('alis', 'Alış'),
+        ('iptal', 'İptal'),
+    ]
+    
+    stok = models.ForeignKey(StokKart, on_delete=models.CASCADE, related_name='hareketler', verbose_name='Stok')
+    fatura = models.ForeignKey(Fatura, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='stok_hareketleri', verbose_name='Fatura')
+    tip = models.CharField(max_length=10, choices=TIPLER, verbose_name='Hareket Tipi')
+    miktar = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Miktar')  # Giriş +, çıkış -
+    tarih = models.DateTimeField(default=timezone.now, verbose_name='Tarih')
+    aciklama = models.CharField(max_length=200, blank=True, verbose_name='Açıklama')
+    
+    class Meta:
+        db_table = 'stok_hareketleri'
+        verbose_name = 'Stok Hareketi'
+        verbose_name_plural = 'Stok Hareketleri'
+        ordering = ['-tarih', '-id']
+    
+    def __str__(self):
+        return f"{self.stok_id} - {self.get_tip_display()} - {self.miktar}"
+    
+    @classmethod
+    def uygula(cls, hareketler):
+        """Hareketleri deftere yazar ve stok miktarlarını atomik olarak günceller"""
+        hareketler = [h for h in hareketler if h.miktar]
+        if not hareketler:
+            return
+        
+        stok_degisimleri = defaultdict(Decimal)
+        for hareket in hareketler:
+            stok_degisimleri[hareket.stok_id] += hareket.miktar
+        
+        with transaction.atomic():
+            cls.objects.bulk_create(hareketler)
+            StokKart.miktar_guncelle(stok_degisimleri)
+
+
 class KasaHareket(BaseModel):
     HAREKET_TIPLERI = [
         ('giris', 'Giriş'),
@@ -832,7 +1171,7 @@ class KasaHareket(BaseModel):
         return f"{self.kasa.ad} - {self.get_tip_display()} - {self.tutar}"
 
 
-class CariHareket(BaseModel):
+class CariHareket(DonemKilidi, BaseModel):
     ISLEM_TIPLERI = [
         ('nakit', 'Nakit'),
         ('banka', 'Banka'),
@@ -889,6 +1228,16 @@ class CariHareket(BaseModel):
         verbose_name = 'Cari Hareket'
         verbose_name_plural = 'Cari Hareketler'
         ordering = ['-tarih', '-id']
+        # Silinmemiş kayıtlar için kısmi indeksler (listeler hep silindi=False ile filtreler)
+        indexes = [
+            models.Index(fields=['-tarih', '-id'], condition=Q(silindi=False), name='ch_aktif_tarih_idx'),
+            models.Index(fields=['cari', '-tarih', '-id'], condition=Q(silindi=False), name='ch_aktif_cari_tarih_idx'),
+            models.Index(fields=['cari', 'para_birimi', 'hareket_yonu'], condition=Q(silindi=False), name='ch_aktif_cari_pb_idx'),
+            models.Index(fields=['kasa', '-tarih'], condition=Q(silindi=False), name='ch_aktif_kasa_idx'),
+            models.Index(fields=['banka', '-tarih'], condition=Q(silindi=False), name='ch_aktif_banka_idx'),
+            # Analitik artımlı aktarım (muhasebe/analitik.py); silinenler de aktarıldığı için koşulsuz
+            models.Index(fields=['guncelleme_tarihi'], name='ch_guncelleme_idx'),
+        ]
     
     def __str__(self):
         return f"{self.cari.unvan} - {self.get_hareket_yonu_display()} - {self.tutar} {self.para_birimi.kod}"
@@ -901,10 +1250,409 @@ class CariHareket(BaseModel):
             return self.tl_karsiligi  # TL tutarını döndür
         return self.tutar  # Normal tutarı döndür
     
+    def _bakiye_etkileri(self):
+        """Hareketin özet bakiye tablolarına etkisi: (model, anahtar, yön, tutar)"""
+        if self.silindi:
+            return []
+        etkiler = [
+            (CariBakiye, {'cari_id': self.cari_id, 'para_birimi_id': self.para_birimi_id},
+             self.hareket_yonu, Decimal(str(self.tutar))),
+        ]
+        # Kasa/banka bakiyeleri döviz işlemlerinde TL karşılığı ile tutulur
+        if self.kasa_id or self.banka_id:
+            gercek_tutar = Decimal(str(self.gercek_tutar))
+            if self.kasa_id:
+                etkiler.append((KasaBakiye, {'kasa_id': self.kasa_id}, self.hareket_yonu, gercek_tutar))
+            if self.banka_id:
+                etkiler.append((BankaBakiye, {'banka_id': self.banka_id}, self.hareket_yonu, gercek_tutar))
+        return etkiler
+    
+    def tl_karsiligi_hesapla(self, eski=None):
+        """Dövizli harekette TL karşılığı girilmemişse işlem tarihindeki kayıtlı TCMB kuru ile doldurur.
+        
+        Kur sadece DovizKuru tablosundan okunur; bulunamazsa boş kalır ve
+        `doviz_kurlari_guncelle --tl-karsiliklari` ile arşivden doldurulur.
+        `eski` (veritabanındaki hali) verilirse sadece tutar, tarih ya da para
+        birimi değiştiğinde hesaplanır; kendiliğinden doldurulmuş değer yenilenir.
+        """
+        if eski is not None:
+            if (self.tutar, self.tarih, self.para_birimi_id) == (eski.tutar, eski.tarih, eski.para_birimi_id):
+                return
+            if self.doviz_kuru is None and self.tl_karsiligi == eski.tl_karsiligi:
+                self.tl_karsiligi = None
+        if self.tl_karsiligi is not None or not self.para_birimi_id or self.para_birimi.kod == 'TL':
+            return
+        
+        from .doviz import kur_getir
+        
+        tarih = timezone.localtime(self.tarih).date() if timezone.is_aware(self.tarih) else self.tarih.date()
+        _, kur = kur_getir(self.para_birimi.kod, tarih)
+        if kur:
+            # doviz_kuru boş bırakılır; kasa/banka bakiyesi yine döviz tutarı ile tutulur
+            self.tl_karsiligi = (Decimal(str(self.tutar)) * kur).quantize(Decimal('0.01'))
+    
     def save(self, *args, **kwargs):
-        # Basit save - bakiye hesaplaması otomatik property'den gelecek
-        super().save(*args, **kwargs)
+        # Özet bakiyeler hareketle aynı transaction içinde güncellenir
+        with transaction.atomic():
+            eski = None
+            eski_etkiler = []
+            if self.pk:
+                eski = CariHareket.objects.select_for_update().filter(pk=self.pk).first()
+                if eski:
+                    eski_etkiler = eski._bakiye_etkileri()
+            self.tl_karsiligi_hesapla(eski)
+            
+            super().save(*args, **kwargs)
+            
+            for model, anahtar, yon, tutar in eski_etkiler:
+                model.hareket_ekle(anahtar, yon, -tutar)
+            for model, anahtar, yon, tutar in self._bakiye_etkileri():
+                model.hareket_ekle(anahtar, yon, tutar)
     
     def delete(self, *args, **kwargs):
-        # Basit delete - bakiye hesaplaması otomatik property'den gelecek
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            eski = CariHareket.objects.select_for_update().filter(pk=self.pk).first()
+            eski_etkiler = eski._bakiye_etkileri() if eski else []
+            
+            result = super().delete(*args, **kwargs)
+            
+            for model, anahtar, yon, tutar in eski_etkiler:
+                model.hareket_ekle(anahtar, yon, -tutar)
+            return result
+
+
+# ===================== ÖZET BAKİYE MODELLER =====================
+
+class BakiyeOzet(models.Model):
+    """Hareketlerden artımlı olarak tutulan giriş/çıkış toplamları"""
+    toplam_giris = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name='Toplam Giriş')
+    toplam_cikis = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name='Toplam Çıkış')
+    guncelleme_tarihi = models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def bakiye(self):
+        return self.toplam_giris - self.toplam_cikis
+    
+    @classmethod
+    def hareket_ekle(cls, anahtar, hareket_yonu, tutar):
+        """Özet satırına tutarı atomik olarak ekler (negatif tutar geri alır)"""
+        alan = 'toplam_giris' if hareket_yonu == 'giris' else 'toplam_cikis'
+        ozet, _ = cls.objects.get_or_create(**anahtar)
+        cls.objects.filter(pk=ozet.pk).update(
+            **{alan: F(alan) + tutar, 'guncelleme_tarihi': timezone.now()}
+        )
+
+
+class CariBakiye(BakiyeOzet):
+    """Cari + para birimi bazında hareket toplamları (CariHareket ile birlikte güncellenir)"""
+    cari = models.ForeignKey(CariKart, on_delete=models.CASCADE,
+                             related_name='bakiyeler', verbose_name='Cari')
+    para_birimi = models.ForeignKey(ParaBirimi, on_delete=models.PROTECT,
+                                    related_name='cari_bakiyeleri', verbose_name='Para Birimi')
+    
+    class Meta:
+        db_table = 'cari_bakiyeler'
+        verbose_name = 'Cari Bakiye'
+        verbose_name_plural = 'Cari Bakiyeler'
+        unique_together = [['cari', 'para_birimi']]
+    
+    def __str__(self):
+        return f"{self.cari_id} - {self.para_birimi_id} : {self.bakiye}"
+
+
+class KasaBakiye(BakiyeOzet):
+    """Kasa bazında hareket toplamları (döviz işlemleri TL karşılığı ile)"""
+    kasa = models.OneToOneField(Kasa, on_delete=models.CASCADE,
+                                related_name='bakiye_ozet', verbose_name='Kasa')
+    
+    class Meta:
+        db_table = 'kasa_bakiyeler'
+        verbose_name = 'Kasa Bakiye'
+        verbose_name_plural = 'Kasa Bakiyeler'
+    
+    def __str__(self):
+        return f"{self.kasa_id} : {self.bakiye}"
+
+
+class BankaBakiye(BakiyeOzet):
+    """Banka bazında hareket toplamları (döviz işlemleri TL karşılığı ile)"""
+    banka = models.OneToOneField(Banka, on_delete=models.CASCADE,
+                                 related_name='bakiye_ozet', verbose_name='Banka')
+    
+    class Meta:
+        db_table = 'banka_bakiyeler'
+        verbose_name = 'Banka Bakiye'
+        verbose_name_plural = 'Banka Bakiyeler'
+    
+    def __str__(self):
+        return f"{self.banka_id} : {self.bakiye}"
+
+
+# ===================== DÖNEM KAPANIŞ =====================
+
+class DonemKapanis(models.Model):
+    """Ay/yıl kapanışı: `tarih` öncesindeki hareketler kilitlenir ve bakiyeleri saklanır.
+
+    Bakiye hesapları en son kapanışın görüntüsünden başlayıp sadece sonraki
+    hareketleri toplar (bkz. muhasebe/donem.py).
+    """
+    TIPLER = [
+        ('ay', 'Ay Sonu'),
+        ('yil', 'Yıl Sonu'),
+    ]
+    
+    tarih = models.DateTimeField(unique=True, verbose_name='Kapanış Sınırı')  # bu andan önceki hareketler kapanır
+    tip = models.CharField(max_length=3, choices=TIPLER, verbose_name='Kapanış Tipi')
+    kapatan = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Kapatan')
+    olusturma_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Tarihi')
+    
+    class Meta:
+        db_table = 'donem_kapanislari'
+        verbose_name = 'Dönem Kapanışı'
+        verbose_name_plural = 'Dönem Kapanışları'
+        ordering = ['-tarih']
+    
+    def __str__(self):
+        return f"{self.get_tip_display()} - {timezone.localtime(self.tarih):%d.%m.%Y} öncesi"
+    
+    @classmethod
+    def kilit_tarihi(cls):
+        """En son kapanış sınırı; bu andan önceki kayıtlar değiştirilemez (kapanış yoksa None)"""
+        return cls.objects.order_by('-tarih').values_list('tarih', flat=True).first()
+
+
+class DonemBakiye(models.Model):
+    """Kapanış anındaki giriş/çıkış toplamları (başlangıçtan kapanışa kadar)"""
+    kapanis = models.ForeignKey(DonemKapanis, on_delete=models.CASCADE, related_name='+', verbose_name='Kapanış')
+    toplam_giris = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name='Toplam Giriş')
+    toplam_cikis = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name='Toplam Çıkış')
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def bakiye(self):
+        return self.toplam_giris - self.toplam_cikis
+
+
+class CariDonemBakiye(DonemBakiye):
+    cari = models.ForeignKey(CariKart, on_delete=models.CASCADE, related_name='+', verbose_name='Cari')
+    para_birimi = models.ForeignKey(ParaBirimi, on_delete=models.PROTECT, related_name='+', verbose_name='Para Birimi')
+    
+    class Meta:
+        db_table = 'cari_donem_bakiyeleri'
+        verbose_name = 'Cari Dönem Bakiyesi'
+        verbose_name_plural = 'Cari Dönem Bakiyeleri'
+        unique_together = [['kapanis', 'cari', 'para_birimi']]
+
+
+class KasaDonemBakiye(DonemBakiye):
+    kasa = models.ForeignKey(Kasa, on_delete=models.CASCADE, related_name='+', verbose_name='Kasa')
+    
+    class Meta:
+        db_table = 'kasa_donem_bakiyeleri'
+        verbose_name = 'Kasa Dönem Bakiyesi'
+        verbose_name_plural = 'Kasa Dönem Bakiyeleri'
+        unique_together = [['kapanis', 'kasa']]
+
+
+class BankaDonemBakiye(DonemBakiye):
+    banka = models.ForeignKey(Banka, on_delete=models.CASCADE, related_name='+', verbose_name='Banka')
+    
+    class Meta:
+        db_table = 'banka_donem_bakiyeleri'
+        verbose_name = 'Banka Dönem Bakiyesi'
+        verbose_name_plural = 'Banka Dönem Bakiyeleri'
+        unique_together = [['kapanis', 'banka']]
+
+
+class StokDonemMiktar(models.Model):
+    """Kapanış anındaki stok miktarı (stok defterinin kapanışa kadarki toplamı)"""
+    kapanis = models.ForeignKey(DonemKapanis, on_delete=models.CASCADE, related_name='+', verbose_name='Kapanış')
+    stok = models.ForeignKey(StokKart, on_delete=models.CASCADE, related_name='+', verbose_name='Stok')
+    miktar = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Miktar')
+    
+    class Meta:
+        db_table = 'stok_donem_miktarlari'
+        verbose_name = 'Stok Dönem Miktarı'
+        verbose_name_plural = 'Stok Dönem Miktarları'
+        unique_together = [['kapanis', 'stok']]
+
+
+# ===================== ARŞİV =====================
+# Kapanmış yılların hareket/faturaları ve süresi dolan silinmiş kayıtlar sıcak tablolardan
+# *_arsiv tablolarına taşınır (bkz. muhasebe/arsiv.py). Kayıtlar orijinal id'leriyle taşınır;
+# *_tumu görünümleri (UNION ALL) iki tabloyu salt okunur tek tablo gibi sunar. Sıcak tabloya
+# alan eklenirse arşiv modeline de eklenmeli ve görünüm migration ile yeniden oluşturulmalıdır.
+
+def _arsiv_iliskisi(model, **kwargs):
+    """Arşivdeki ilişki: ters erişim, kısıt ve tekil indeks yok; ilişkili kaydın silinmesini engellemez"""
+    return models.ForeignKey(model, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False,
+                             db_index=False, **kwargs)
+
+
+class CariHareketKaydi(models.Model):
+    """CariHareket alanlarının arşiv ve birleşik görünüm için kopyası"""
+    id = models.BigIntegerField(primary_key=True)
+    tarih = models.DateTimeField(verbose_name='İşlem Tarihi')
+    cari = _arsiv_iliskisi(CariKart, verbose_name='Cari')
+    para_birimi = _arsiv_iliskisi(ParaBirimi, verbose_name='Para Birimi')
+    tutar = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Tutar')
+    hareket_yonu = models.CharField(max_length=10, choices=CariHareket.HAREKET_YONU, verbose_name='Hareket Yönü')
+    doviz_kuru = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True, verbose_name='Döviz Kuru')
+    tl_karsiligi = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True, verbose_name='TL Karşılığı')
+    islem_tipi = models.CharField(max_length=10, choices=CariHareket.ISLEM_TIPLERI, verbose_name='İşlem Tipi')
+    kasa = _arsiv_iliskisi(Kasa, null=True, blank=True, verbose_name='Kasa')
+    banka = _arsiv_iliskisi(Banka, null=True, blank=True, verbose_name='Banka')
+    pos = _arsiv_iliskisi(Pos, null=True, blank=True, verbose_name='POS')
+    aciklama = models.TextField(blank=True, verbose_name='Açıklama')
+    olusturan = _arsiv_iliskisi(User, verbose_name='Oluşturan')
+    olusturma_tarihi = models.DateTimeField(verbose_name='Oluşturma Tarihi')
+    guncelleme_tarihi = models.DateTimeField(verbose_name='Güncelleme Tarihi')
+    silindi = models.BooleanField(default=False, verbose_name='Silindi')
+    silinme_tarihi = models.DateTimeField(null=True, blank=True, verbose_name='Silinme Tarihi')
+    silen_kullanici = _arsiv_iliskisi(User, null=True, blank=True, verbose_name='Silen Kullanıcı')
+    
+    class Meta:
+        abstract = True
+        ordering = ['-tarih', '-id']
+    
+    def __str__(self):
+        return f"{self.cari.unvan} - {self.get_hareket_yonu_display()} - {self.tutar} {self.para_birimi.kod}"
+
+
+class CariHareketArsiv(CariHareketKaydi):
+    class Meta(CariHareketKaydi.Meta):
+        db_table = 'cari_hareketler_arsiv'
+        verbose_name = 'Arşiv Cari Hareket'
+        verbose_name_plural = 'Arşiv Cari Hareketler'
+        indexes = [
+            models.Index(fields=['-tarih', '-id'], condition=Q(silindi=False), name='cha_aktif_tarih_idx'),
+            models.Index(fields=['cari', '-tarih', '-id'], condition=Q(silindi=False), name='cha_aktif_cari_tarih_idx'),
+        ]
+
+
+class CariHareketTumu(CariHareketKaydi):
+    """cari_hareketler + cari_hareketler_arsiv (salt okunur görünüm)"""
+    arsivde = models.BooleanField(verbose_name='Arşivde')
+    
+    class Meta(CariHareketKaydi.Meta):
+        managed = False
+        db_table = 'cari_hareketler_tumu'
+        verbose_name = 'Cari Hareket (Arşiv Dahil)'
+        verbose_name_plural = 'Cari Hareketler (Arşiv Dahil)'
+
+
+class FaturaKaydi(models.Model):
+    """Fatura alanlarının arşiv ve birleşik görünüm için kopyası"""
+    id = models.BigIntegerField(primary_key=True)
+    fatura_no = models.CharField(max_length=20, verbose_name='Fatura No')
+    tarih = models.DateTimeField(verbose_name='Fatura Tarihi')
+    tip = models.CharField(max_length=20, choices=Fatura.FATURA_TIPLERI, verbose_name='Fatura Tipi')
+    cari = _arsiv_iliskisi(CariKart, verbose_name='Cari')
+    iskonto_tipi = models.CharField(max_length=10, choices=Fatura.ISKONTO_TIPLERI, null=True, blank=True, verbose_name='İskonto Tipi')
+    iskonto_degeri = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='İskonto Değeri')
+    iskonto_tutari = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='İskonto Tutarı')
+    ara_toplam = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Ara Toplam')
+    kdv_tutari = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='KDV Tutarı')
+    genel_toplam = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Genel Toplam')
+    aciklama = models.TextField(blank=True, verbose_name='Açıklama')
+    vade_tarihi = models.DateField(blank=True, null=True, verbose_name='Vade Tarihi')
+    odendi = models.BooleanField(default=False, verbose_name='Ödendi')
+    iptal = models.BooleanField(default=False, verbose_name='İptal')
+    olusturan = _arsiv_iliskisi(User, verbose_name='Oluşturan')
+    olusturma_tarihi = models.DateTimeField(verbose_name='Oluşturma Tarihi')
+    guncelleme_tarihi = models.DateTimeField(verbose_name='Güncelleme Tarihi')
+    silindi = models.BooleanField(default=False, verbose_name='Silindi')
+    silinme_tarihi = models.DateTimeField(null=True, blank=True, verbose_name='Silinme Tarihi')
+    silen_kullanici = _arsiv_iliskisi(User, null=True, blank=True, verbose_name='Silen Kullanıcı')
+    
+    class Meta:
+        abstract = True
+        ordering = ['-tarih', '-id']
+    
+    def __str__(self):
+        return f"{self.fatura_no} - {self.cari.unvan}"
+
+
+class FaturaArsiv(FaturaKaydi):
+    class Meta(FaturaKaydi.Meta):
+        db_table = 'faturalar_arsiv'
+        verbose_name = 'Arşiv Fatura'
+        verbose_name_plural = 'Arşiv Faturalar'
+        constraints = [
+            models.UniqueConstraint(fields=['fatura_no'], name='fatura_arsiv_no_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['-tarih', '-id'], condition=Q(silindi=False), name='fatura_arsiv_tarih_idx'),
+            models.Index(fields=['cari', '-tarih'], condition=Q(silindi=False), name='fatura_arsiv_cari_idx'),
+        ]
+
+
+class FaturaTumu(FaturaKaydi):
+    """faturalar + faturalar_arsiv (salt okunur görünüm)"""
+    arsivde = models.BooleanField(verbose_name='Arşivde')
+    
+    class Meta(FaturaKaydi.Meta):
+        managed = False
+        db_table = 'faturalar_tumu'
+        verbose_name = 'Fatura (Arşiv Dahil)'
+        verbose_name_plural = 'Faturalar (Arşiv Dahil)'
+
+
+class FaturaKalemArsiv(models.Model):
+    """Arşivlenen faturanın kalemleri (FaturaKalem alanlarının kopyası)"""
+    id = models.BigIntegerField(primary_key=True)
+    fatura = models.ForeignKey(FaturaArsiv, on_delete=models.CASCADE, related_name='kalemler', verbose_name='Fatura')
+    stok = _arsiv_iliskisi(StokKart, verbose_name='Stok')
+    miktar = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Miktar')
+    birim_fiyat = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Birim Fiyat')
+    kdv_orani = models.IntegerField(default=20, verbose_name='KDV %')
+    indirim_orani = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='İndirim %')
+    indirim_tutari = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='İndirim Tutarı')
+    indirim_aciklama = models.CharField(max_length=200, blank=True, verbose_name='İndirim Açıklama')
+    tutar = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Tutar')
+    kdv_tutari = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='KDV Tutarı')
+    toplam_tutar = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Toplam Tutar')
+    kdv_durumu = models.CharField(max_length=10, choices=[('dahil', 'KDV Dahil'), ('haric', 'KDV Hariç')],
+                                  default='dahil', verbose_name='KDV Durumu')
+    secenekler = models.JSONField(default=dict, blank=True, verbose_name='Seçenekler')
+    secenek_fiyat_farki = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Seçenek Fiyat Farkı')
+    olusturma_tarihi = models.DateTimeField(verbose_name='Oluşturma Tarihi')
+    guncelleme_tarihi = models.DateTimeField(verbose_name='Güncelleme Tarihi')
+    silindi = models.BooleanField(default=False, verbose_name='Silindi')
+    silinme_tarihi = models.DateTimeField(null=True, blank=True, verbose_name='Silinme Tarihi')
+    silen_kullanici = _arsiv_iliskisi(User, null=True, blank=True, verbose_name='Silen Kullanıcı')
+    
+    class Meta:
+        db_table = 'fatura_kalemleri_arsiv'
+        verbose_name = 'Arşiv Fatura Kalemi'
+        verbose_name_plural = 'Arşiv Fatura Kalemleri'
+
+
+# ===================== PERFORMANS =====================
+
+class IstekOlcumu(models.Model):
+    """SORGU_OLCUMU açıkken her istek için sorgu sayısı ve süre ölçümü (bkz. muhasebe/middleware.py)"""
+    url_adi = models.CharField(max_length=100, db_index=True, verbose_name='URL Adı')
+    yol = models.CharField(max_length=500, verbose_name='Yol')
+    metot = models.CharField(max_length=10, verbose_name='Metot')
+    durum_kodu = models.PositiveSmallIntegerField(verbose_name='Durum Kodu')
+    sure_ms = models.FloatField(verbose_name='Toplam Süre (ms)')
+    sql_ms = models.FloatField(verbose_name='SQL Süresi (ms)')
+    sorgu_sayisi = models.PositiveIntegerField(verbose_name='Sorgu Sayısı')
+    tekrar_eden_sorgu = models.PositiveIntegerField(default=0, verbose_name='Tekrar Eden Sorgu')
+    detay = models.JSONField(default=dict, blank=True, verbose_name='Detay')  # en yavaş ve tekrar eden sorgular
+    tarih = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Tarih')
+    
+    class Meta:
+        db_table = 'istek_olcumleri'
+        verbose_name = 'İstek Ölçümü'
+        verbose_name_plural = 'İstek Ölçümleri'
+        ordering = ['-tarih']
+    
+    def __str__(self):
+        return f"{self.url_adi} - {self.sure_ms:.1f} ms / {self.sorgu_sayisi} sorgu"
@@ -0,0 +1,289 @@
+import heapq
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .arama import arama_metni, kelimeler
+from .models import BelgeSira, CariKart, StokKart
+
+logger = logging.getLogger(__name__)
+
+# Kayıt değişince artırılan sürüm sayaçları (BelgeSira serileri, {ad} indeks adıdır). Sayaçlar
+# veritabanında tutulduğu için her aramada okunur; diğer süreçlerin değişiklikleri de hemen görülür
+DEGISIKLIK_SERISI = 'oneri_{ad}'
+SILME_SERISI = 'oneri_{ad}_silme'  # kalıcı silme: değişen kayıtlardan bulunamaz, indeks baştan kurulur
+
+# Değişen kayıtlar son kontrolden bu kadar öncesinden itibaren okunur; geç commit edilen
+# işlemler ve sunucu saatleri arasındaki küçük farklar kaçmasın diye
+YAKALAMA_PAYI = timedelta(minutes=5)
+
+# Derlenmiş metin dışında tutulan değişiklik sayısı bunu aşınca metin yeniden derlenir
+EK_SINIRI = 500
+
+
+class OneriIndeksi:
+    """Select2 aramaları için süreç içi kod/ad/barkod indeksi.
+
+    Kayıtlar kod sırasıyla tek bir metinde birleştirilir; aranan kelime bu metinde
+    str.find ile taranır, bulunan konum bisect ile kayda çevrilir. Kodlar ayrıca
+    sıralı tutulur. Değişiklikler derlenmiş metne dokunmadan küçük bir ek
+    listede tutulur ve aramada birleştirilir; ek liste büyüyünce metin yeniden
+    derlenir. Bu süreçteki değişiklikler sinyallerle hemen, diğer süreçlerinkiler
+    sürüm sayacı değişince guncelleme_tarihi'nden okunarak eklenir.
+    """
+
+    def __init__(self, ad, model, satirlar):
+        self.ad = ad
+        self.model = model
+        self._satirlar = satirlar  # queryset -> (pk, kayit ya da aktif değilse None)
+        self.seriler = (DEGISIKLIK_SERISI.format(ad=ad), SILME_SERISI.format(ad=ad))
+        self._kayitlar = None  # pk -> (sira, kodlar, metin, veri)
+        self._derleme = None
+        self._ek = {}  # derlemeden sonra eklenen/değişen kayıtlar
+        self._cikan = set()  # derlenmiş metinde olup artık geçersiz olan pk'ler
+        self._surum = None  # (değişiklik, silme) sayaçları
+        self._son_kontrol = None
+        self._yukleniyor = False
+        self._kilit = threading.Lock()
+
+    def surum(self):
+        """Veritabanındaki (değişiklik, silme) sayaçları"""
+        sayaclar = dict(BelgeSira.objects.filter(seri__in=self.seriler, yil=0).values_list('seri', 'son_numara'))
+        return tuple(sayaclar.get(seri, 0) for seri in self.seriler)
+
+    def yukle(self):
+        """Aktif kayıtların tamamını veritabanından okuyup indeksi baştan kurar"""
+        # Sürüm okumadan önce alınır; yükleme sırasında gelen değişiklikler sonraki aramada eklenir
+        surum, baslangic = self.surum(), timezone.now()
+        kayitlar = dict(self._satirlar(self.model.objects.filter(silindi=False, aktif=True)))
+        with self._kilit:
+            self._kayitlar = kayitlar
+            self._derleme = None
+            self._surum, self._son_kontrol = surum, baslangic
+
+    def tazele(self):
+        """Sürüm değiştiyse diğer süreçlerde değişen kayıtları indekse ekler (kalıcı silmede baştan kurar)"""
+        surum = self.surum()
+        if surum == self._surum:
+            return
+        if surum[1] != self._surum[1]:
+            self.yukle()
+            return
+
+        baslangic = timezone.now()
+        for pk, kayit in self._satirlar(
+            self.model.objects.filter(guncelleme_tarihi__gte=self._son_kontrol - YAKALAMA_PAYI)
+        ):
+            self.guncelle(pk, kayit)
+        self._surum, self._son_kontrol = surum, baslangic
+
+    def _arka_planda_yukle(self):
+        try:
+            self.yukle()
+        except DatabaseError as e:
+            logger.error(f"{self.ad} öneri indeksi yüklenemedi: {str(e)}")
+        finally:
+            self._yukleniyor = False
+            connection.close()
+
+    def arka_planda_yukle(self):
+        """İndeksi istek akışını bekletmeden ayrı bir thread'de yeniler"""
+        with self._kilit:
+            if self._yukleniyor:
+                return
+            self._yukleniyor = True
+
+        threading.Thread(target=self._arka_planda_yukle, name=f'{self.ad}-oneri-yukle', daemon=True).start()
+
+    def guncelle(self, pk, kayit):
+        """Tek kaydı günceller; kayit None ise indeksten çıkarır"""
+        with self._kilit:
+            if self._kayitlar is None:
+                return
+            if kayit is None:
+                if self._kayitlar.pop(pk, None) is None:
+                    return
+                self._ek.pop(pk, None)
+            else:
+                self._kayitlar[pk] = kayit
+                self._ek[pk] = kayit
+            self._cikan.add(pk)
+            if len(self._cikan) > EK_SINIRI:
+                self._derleme = None
+
+    def degisti(self, pk, kayit, silme=False):
+        """Kaydedilen/silinen kaydı commit'ten sonra bu süreçte uygular ve diğer süreçler için sayacı artırır"""
+        def uygula():
+            self.guncelle(pk, kayit)
+            BelgeSira.ayir(self.seriler[1] if silme else self.seriler[0])
+
+        # Geri alınan işlemler indekse yansımasın; sayaç commit'ten sonra artırıldığı için
+        # diğer süreçler artışı gördüğünde kayıt okunabilir durumdadır
+        transaction.on_commit(uygula)
+
+    def _derle(self):
+        """Derlenmiş metni ve o andaki ek kayıtları birlikte döndürür"""
+        with self._kilit:
+            if self._derleme is None:
+                satirlar = sorted((kayit[0], pk, kayit) for pk, kayit in self._kayitlar.items())
+                # Her satır boşlukla başlar, böylece ' kelime' araması kelime başlarını bulur
+                metinler = [' ' + kayit[2] for _, _, kayit in satirlar]
+                baslangiclar = list(accumulate((len(m) + 1 for m in metinler), initial=0))[:-1]
+                kodlar = sorted(
+                    (kod, i) for i, (_, _, kayit) in enumerate(satirlar) for kod in kayit[1]
+                )
+                self._derleme = (
+                    '\n'.join(metinler), baslangiclar, metinler, kodlar,
+                    [(sira, pk, kayit[3]) for sira, pk, kayit in satirlar],
+                )
+                self._ek, self._cikan = {}, set()
+            return self._derleme, list(self._ek.items()), set(self._cikan)
+
+    def ara(self, sorgu, limit=20):
+        """Aramaya uyan kayıtları (pk, veri) olarak en uygundan başlayarak döndürür.
+
+        Sıra: kod/barkod tam ve ön ek eşleşmeleri, tüm kelimeleri kelime başında
+        geçenler, kelime içinde geçenler; her grup kendi içinde kod sırasıyladır.
+        Her aşama yeterli sonuç bulunca durduğu için genel aramalar da kısa sürer.
+        """
+        if self._kayitlar is None:
+            self.yukle()
+        else:
+            self.tazele()
+
+        (metin, baslangiclar, metinler, kodlar, satirlar), ek, cikan = self._derle()
+        parcalar = sorted(set(kelimeler(sorgu)), key=len, reverse=True)
+        aranan = arama_metni(sorgu).strip()
+
+        def kod_eslesmeleri():
+            j = bisect_left(kodlar, (aranan,))
+            while j < len(kodlar) and kodlar[j][0].startswith(aranan):
+                kod, i = kodlar[j]
+                yield kod, satirlar[i][1], satirlar[i][2]
+                j += 1
+
+        def metin_eslesmeleri(desen, kontrol):
+            konum = metin.find(desen)
+            while konum != -1:
+                i = bisect_right(baslangiclar, konum) - 1
+                if all(p in metinler[i] for p in kontrol):
+                    yield satirlar[i]
+                if i + 1 == len(baslangiclar):
+                    return
+                konum = metin.find(desen, baslangiclar[i + 1])
+
+        if not parcalar:
+            asamalar = [(iter(satirlar), lambda kayit: kayit[0])]
+        else:
+            ana, digerleri = parcalar[0], parcalar[1:]
+            kelime_basi = [' ' + p for p in parcalar]
+            asamalar = [
+                # 1) Kod/barkod: sıralı listede ön ek aralığı (tam eşleşme ilk gelir)
+                (kod_eslesmeleri(),
+                 lambda kayit: min((k for k in kayit[1] if k.startswith(aranan)), default=None)),
+                # 2) Tüm kelimeler kelime başında, 3) kelime içinde geçenler
+                (metin_eslesmeleri(' ' + ana, kelime_basi[1:]),
+                 lambda kayit: kayit[0] if all(p in ' ' + kayit[2] for p in kelime_basi) else None),
+                (metin_eslesmeleri(ana, digerleri),
+                 lambda kayit: kayit[0] if all(p in kayit[2] for p in parcalar) else None),
+            ]
+
+        secilen = {}
+        for derlenmis, ek_anahtari in asamalar:
+            # Derlemeden sonra değişen kayıtlar derlenmiş sonuçlarla sıralı birleştirilir
+            ekler = sorted(
+                (anahtar, pk, kayit[3], True) for pk, kayit in ek
+                if (anahtar := ek_anahtari(kayit)) is not None
+            )
+            derlenmis = ((anahtar, pk, veri, False) for anahtar, pk, veri in derlenmis)
+            for _, pk, veri, ek_mi in heapq.merge(derlenmis, ekler, key=lambda x: (x[0], x[1])):
+                if len(secilen) == limit:
+                    return list(secilen.items())
+                # Değişen kayıtların derlenmiş (eski) hali atlanır
+                if pk in secilen or (not ek_mi and pk in cikan):
+                    continue
+                secilen[pk] = veri
+
+        return list(secilen.items())
+
+
+def indeks_kaydi(sira, kodlar, metin, veri):
+    """(sira, normalize kodlar, kelimeleri tek boşlukla ayrılmış metin, sonuçta dönecek veri)"""
+    return (
+        sira,
+        tuple(arama_metni(kod).strip() for kod in kodlar if kod),
+        ' '.join(kelimeler(metin)),
+        veri,
+    )
+
+
+def _cari_kaydi(kod, unvan):
+    return indeks_kaydi(kod, (kod,), f"{kod} {unvan}", (kod, unvan))
+
+
+def _stok_kaydi(kod, ad, barkod):
+    return indeks_kaydi(kod, (kod, barkod), f"{kod} {ad} {barkod or ''}", (kod, ad))
+
+
+def _cariler(queryset):
+    for pk, kod, unvan, aktif, silindi in queryset.values_list(
+        'pk', 'kod', 'unvan', 'aktif', 'silindi'
+    ).iterator(chunk_size=5000):
+        yield pk, _cari_kaydi(kod, unvan) if aktif and not silindi else None
+
+
+def _stoklar(queryset):
+    for pk, kod, ad, barkod, aktif, silindi in queryset.values_list(
+        'pk', 'kod', 'ad', 'barkod', 'aktif', 'silindi'
+    ).iterator(chunk_size=5000):
+        yield pk, _stok_kaydi(kod, ad, barkod) if aktif and not silindi else None
+
+
+CARI_INDEKSI = OneriIndeksi('cari', CariKart, _cariler)
+STOK_INDEKSI = OneriIndeksi('stok', StokKart, _stoklar)
+
+
+def on_yukle():
+    """Sunucu açılırken indeksleri arka planda yükler (ilk aramalar beklemesin)"""
+    if getattr(settings, 'ONERI_INDEKSI_ON_YUKLE', True):
+        CARI_INDEKSI.arka_planda_yukle()
+        STOK_INDEKSI.arka_planda_yukle()
+
+
+def indeksleri_yenile():
+    """Tüm süreçlerdeki indekslerin baştan kurulmasını sağlar (sinyal göndermeyen toplu işlemlerden sonra)"""
+    for indeks in (CARI_INDEKSI, STOK_INDEKSI):
+        BelgeSira.ayir(indeks.seriler[1])
+
+
+@receiver(post_save, sender=CariKart)
+def _cari_kaydedildi(sender, instance, **kwargs):
+    kayit = _cari_kaydi(instance.kod, instance.unvan) if instance.aktif and not instance.silindi else None
+    CARI_INDEKSI.degisti(instance.pk, kayit)
+
+
+@receiver(post_delete, sender=CariKart)
+def _cari_silindi(sender, instance, **kwargs):
+    CARI_INDEKSI.degisti(instance.pk, None, silme=True)
+
+
+@receiver(post_save, sender=StokKart)
+def _stok_kaydedildi(sender, instance, **kwargs):
+    kayit = (
+        _stok_kaydi(instance.kod, instance.ad, instance.barkod)
+        if instance.aktif and not instance.silindi else None
+    )
+    STOK_INDEKSI.degisti(instance.pk, kayit)
+
+
+@receiver(post_delete, sender=StokKart)
+def _stok_silindi(sender, instance, **kwargs):
+    STOK_INDEKSI.degisti(instance.pk, None, silme=True)
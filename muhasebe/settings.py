@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'muhasebe.middleware.SorguOlcumMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -94,4 +95,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Login ayarları
 LOGIN_URL = '/'
 LOGIN_REDIRECT_URL = '/anasayfa/'
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# Döviz kurları (muhasebe/doviz.py)
+# Kaynak TCMB URL'si ya da testler için yerel bir XML dosyası olabilir
+DOVIZ_KURU_KAYNAK = 'https://www.tcmb.gov.tr/kurlar/today.xml'
+DOVIZ_KURU_OTOMATIK_YENILE = True
+
+# İstek başına sorgu sayısı / SQL süresi ölçümü (Server-Timing başlığı, log ve admin özeti)
+SORGU_OLCUMU = False
+# Ölçümler admin'de p50/p95 özeti için istek_olcumleri tablosuna da yazılsın mı
+SORGU_OLCUMU_KAYDET = True
+
+# Analitik Parquet aktarımının yazılacağı dizin (muhasebe/analitik.py, analitik_aktar komutu)
+ANALITIK_DIZINI = BASE_DIR / 'analitik'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'muhasebe.performans': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,157 @@
+import threading
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from muhasebe import doviz
+from muhasebe.models import DovizKuru
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'tcmb_today.xml'
+
+
+class BellekSifirlaMixin:
+    """Her test modül seviyesindeki kur belleğini temiz durumdan başlatır"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.multiple(
+            doviz, _kurlar={}, _son_guncelleme=None, _son_deneme=None, _yenileniyor=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TcmbXmlCozumleTest(SimpleTestCase):
+    def test_bulten_tarihi_ve_kurlar(self):
+        tarih, kurlar = doviz.tcmb_xml_cozumle(FIXTURE.read_bytes())
+
+        self.assertEqual(tarih, date(2026, 10, 17))
+        self.assertEqual(set(kurlar), {'USD', 'EUR', 'JPY'})
+        self.assertEqual(kurlar['USD'], {'birim': 1, 'alis': Decimal('41.8000'), 'satis': Decimal('41.8753')})
+        self.assertEqual(kurlar['EUR']['satis'], Decimal('48.8829'))
+
+    def test_birim_okunur(self):
+        _, kurlar = doviz.tcmb_xml_cozumle(FIXTURE.read_bytes())
+
+        self.assertEqual(kurlar['JPY']['birim'], 100)
+        self.assertEqual(kurlar['JPY']['satis'], Decimal('27.8531'))
+
+    def test_bos_kur_none_olur(self):
+        icerik = FIXTURE.read_bytes().replace(b'<ForexSelling>41.8753</ForexSelling>', b'<ForexSelling></ForexSelling>')
+        _, kurlar = doviz.tcmb_xml_cozumle(icerik)
+
+        self.assertIsNone(kurlar['USD']['satis'])
+
+
+class KurlariKaydetTest(BellekSifirlaMixin, TestCase):
+    def test_kurlar_kaydedilir(self):
+        doviz.kurlari_kaydet(*doviz.tcmb_xml_cozumle(FIXTURE.read_bytes()))
+
+        self.assertEqual(DovizKuru.objects.count(), 3)
+        usd = DovizKuru.objects.get(kod='USD', tarih=date(2026, 10, 17))
+        self.assertEqual(usd.satis, Decimal('41.8753'))
+
+    def test_ayni_gun_tekrar_gelirse_guncellenir(self):
+        tarih, kurlar = doviz.tcmb_xml_cozumle(FIXTURE.read_bytes())
+        doviz.kurlari_kaydet(tarih, kurlar)
+        kurlar['USD']['satis'] = Decimal('42.0000')
+        doviz.kurlari_kaydet(tarih, kurlar)
+
+        self.assertEqual(DovizKuru.objects.count(), 3)
+        self.assertEqual(DovizKuru.objects.get(kod='USD', tarih=tarih).satis, Decimal('42.0000'))
+
+    def test_yerel_dosyadan_guncelle(self):
+        with override_settings(DOVIZ_KURU_KAYNAK=str(FIXTURE)):
+            tarih, _ = doviz.kurlari_guncelle()
+
+        self.assertEqual(tarih, date(2026, 10, 17))
+        self.assertEqual(DovizKuru.objects.filter(tarih=tarih).count(), 3)
+        self.assertEqual(doviz._kurlar, {'USD': 41.8753, 'EUR': 48.8829})
+
+    def test_urlden_guncelle(self):
+        yanit = mock.Mock(content=FIXTURE.read_bytes())
+        with mock.patch.object(doviz.requests, 'get', return_value=yanit) as get:
+            doviz.kurlari_guncelle('https://example.com/today.xml')
+
+        get.assert_called_once_with('https://example.com/today.xml', timeout=5)
+        self.assertEqual(DovizKuru.objects.count(), 3)
+
+
+@override_settings(DOVIZ_KURU_OTOMATIK_YENILE=True)
+class GuncelKurlarTest(BellekSifirlaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.saat = 10_000.0
+        patcher = mock.patch.object(doviz.time, 'monotonic', side_effect=lambda: self.saat)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(doviz, 'arka_planda_yenile')
+        self.yenile = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bellek_bossa_veritabanindan_okur_ve_yeniler(self):
+        DovizKuru.objects.create(kod='USD', tarih=date(2026, 10, 16), satis=Decimal('41.5'))
+        DovizKuru.objects.create(kod='USD', tarih=date(2026, 10, 17), satis=Decimal('41.8753'))
+
+        self.assertEqual(doviz.guncel_kurlar(), {'USD': 41.8753, 'EUR': None})
+        # Veritabanındaki kur eski olabilir
+        self.yenile.assert_called_once()
+
+    def test_taze_kur_yenilenmez(self):
+        doviz._bellege_al({'USD': Decimal('41.8753'), 'EUR': Decimal('48.8829')})
+        self.saat += doviz.TAZELIK_SURESI - 1
+
+        self.assertEqual(doviz.guncel_kurlar(), {'USD': 41.8753, 'EUR': 48.8829})
+        self.yenile.assert_not_called()
+
+    def test_eski_kur_dondurulur_ve_arka_planda_yenilenir(self):
+        doviz._bellege_al({'USD': Decimal('41.8753'), 'EUR': Decimal('48.8829')})
+        self.saat += doviz.TAZELIK_SURESI + 1
+
+        # Eski değer beklemeden döner
+        self.assertEqual(doviz.guncel_kurlar(), {'USD': 41.8753, 'EUR': 48.8829})
+        self.yenile.assert_called_once()
+
+    def test_basarisiz_denemeden_sonra_beklenir(self):
+        doviz._bellege_al({'USD': Decimal('41.8753'), 'EUR': Decimal('48.8829')})
+        self.saat += doviz.TAZELIK_SURESI + 1
+        doviz._son_deneme = self.saat
+
+        self.saat += doviz.HATA_BEKLEME_SURESI - 1
+        doviz.guncel_kurlar()
+        self.yenile.assert_not_called()
+
+        self.saat += 2
+        doviz.guncel_kurlar()
+        self.yenile.assert_called_once()
+
+    @override_settings(DOVIZ_KURU_OTOMATIK_YENILE=False)
+    def test_otomatik_yenileme_kapatilabilir(self):
+        self.assertEqual(doviz.guncel_kurlar(), {'USD': None, 'EUR': None})
+        self.yenile.assert_not_called()
+
+
+class ArkaPlandaYenileTest(BellekSifirlaMixin, SimpleTestCase):
+    def test_ayni_anda_tek_yenileme_baslar(self):
+        with mock.patch.object(threading, 'Thread') as thread:
+            doviz.arka_planda_yenile()
+            doviz.arka_planda_yenile()
+
+        thread.assert_called_once()
+        self.assertTrue(doviz._yenileniyor)
+        self.assertIsNotNone(doviz._son_deneme)
+
+    def test_hata_loglanir_ve_bellek_korunur(self):
+        doviz._bellege_al({'USD': Decimal('41.8753'), 'EUR': Decimal('48.8829')})
+        doviz._yenileniyor = True
+
+        with mock.patch.object(doviz.requests, 'get', side_effect=doviz.requests.ConnectionError('bağlantı yok')), \
+                mock.patch.object(doviz, 'connection'), \
+                self.assertLogs('muhasebe.doviz', 'ERROR'):
+            doviz._arka_planda_yenile()
+
+        self.assertFalse(doviz._yenileniyor)
+        self.assertEqual(doviz._kurlar, {'USD': 41.8753, 'EUR': 48.8829})
@@ -0,0 +1,79 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from muhasebe.donem import stok_miktarlari
+from muhasebe.models import Fatura
+
+from .veri import ornek_cari, ornek_kullanici, ornek_stok
+
+
+class FaturaToplamlariTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kullanici = ornek_kullanici()
+        cls.cari = ornek_cari()
+        cls.stok = ornek_stok()
+
+    def fatura_kaydet(self, kalemler, **alanlar):
+        fatura = Fatura.objects.create(tip='satis', cari=self.cari, olusturan=self.kullanici, **alanlar)
+        fatura.kalemleri_kaydet([
+            {'stok_id': self.stok.id, 'miktar': '1', 'kdv_orani': 20, 'secenekler': {}, **kalem}
+            for kalem in kalemler
+        ])
+        fatura.refresh_from_db()
+        return fatura
+
+    def assertToplamlarKalemlerleAyni(self, fatura):
+        kalemler = fatura.kalemler.aggregate(tutar=Sum('tutar'), kdv=Sum('kdv_tutari'))
+        self.assertEqual(fatura.ara_toplam, kalemler['tutar'])
+        self.assertEqual(fatura.kdv_tutari, kalemler['kdv'])
+        self.assertEqual(fatura.genel_toplam, fatura.ara_toplam - fatura.iskonto_tutari + fatura.kdv_tutari)
+
+    def test_kdv_dahil_kalemler_kayitli_satirlarla_ayni(self):
+        fatura = self.fatura_kaydet([{'birim_fiyat': '10.00', 'kdv_durumu': 'dahil'}] * 3)
+
+        self.assertToplamlarKalemlerleAyni(fatura)
+        self.assertEqual((fatura.ara_toplam, fatura.kdv_tutari), (Decimal('24.99'), Decimal('5.01')))
+        self.assertEqual(fatura.genel_toplam, Decimal('30.00'))
+
+    def test_kdv_haric_ve_yuzde_iskonto(self):
+        fatura = self.fatura_kaydet(
+            [{'birim_fiyat': '3.33', 'miktar': '3', 'kdv_orani': 18, 'kdv_durumu': 'haric'},
+             {'birim_fiyat': '7.77', 'kdv_orani': 8, 'kdv_durumu': 'haric'}],
+            iskonto_tipi='yuzde', iskonto_degeri=Decimal('7.5'),
+        )
+
+        self.assertToplamlarKalemlerleAyni(fatura)
+        self.assertEqual(fatura.iskonto_tutari, (fatura.ara_toplam * Decimal('0.075')).quantize(Decimal('0.01')))
+
+
+class FaturaStokDefteriTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kullanici = ornek_kullanici()
+        cls.cari = ornek_cari()
+        cls.stok = ornek_stok()
+
+    def test_defter_satirlari_fatura_tarihini_alir(self):
+        ocak = timezone.make_aware(datetime(2026, 1, 30, 10))
+        subat = timezone.make_aware(datetime(2026, 2, 1, 10))
+        kalemler = [{'stok_id': self.stok.id, 'miktar': '2', 'birim_fiyat': '10', 'secenekler': {}}]
+        fatura = Fatura.objects.create(tip='satis', cari=self.cari, olusturan=self.kullanici, tarih=ocak)
+        fatura.kalemleri_kaydet(kalemler)
+
+        self.assertEqual(list(fatura.stok_hareketleri.values_list('tarih', 'miktar')), [(ocak, Decimal('-2'))])
+
+        # Tarih değişince eski etki eski tarihle geri alınır, yenisi yeni tarihle yazılır
+        fatura.tarih = subat
+        fatura.save()
+        fatura.kalemleri_kaydet(kalemler, eski_tip='satis', eski_tarih=ocak)
+
+        self.assertEqual(
+            sorted(fatura.stok_hareketleri.values_list('tarih', 'miktar')),
+            [(ocak, Decimal('-2')), (ocak, Decimal('2')), (subat, Decimal('-2'))],
+        )
+        self.assertEqual(stok_miktarlari(bitis=subat)[self.stok.id], Decimal('0'))
@@ -0,0 +1,38 @@
+from django.contrib.messages import get_messages
+from django.test import TestCase
+from django.urls import reverse
+
+from .veri import ornek_kullanici, ornek_stok
+
+
+class StokGeriYukleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kullanici = ornek_kullanici()
+
+    def setUp(self):
+        self.client.force_login(self.kullanici)
+
+    def test_barkodu_kullanilan_stok_geri_yuklenmez(self):
+        silinen = ornek_stok(barkod='8690000000017')
+        silinen.soft_delete(self.kullanici)
+        ornek_stok(ad='Yeni Stok', barkod='8690000000017')
+
+        response = self.client.post(reverse('kayit_geri_yukle', args=['stok', silinen.pk]))
+
+        self.assertRedirects(response, reverse('silinen_kayitlar'), fetch_redirect_response=False)
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            ['Bu barkod başka bir stok kartında kullanılıyor.']
+        )
+        silinen.refresh_from_db()
+        self.assertTrue(silinen.silindi)
+
+    def test_barkodu_bos_stok_geri_yuklenir(self):
+        silinen = ornek_stok()
+        silinen.soft_delete(self.kullanici)
+
+        self.client.post(reverse('kayit_geri_yukle', args=['stok', silinen.pk]))
+
+        silinen.refresh_from_db()
+        self.assertFalse(silinen.silindi)
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from muhasebe.models import BelgeSira, CariKart
+from muhasebe.oneri import CARI_INDEKSI
+
+from .veri import ornek_cari
+
+
+class OneriIndeksiTest(TestCase):
+    """Diğer süreçlerdeki değişiklikler sinyal göndermeden kayıt + sayaç artışı olarak taklit edilir"""
+
+    def setUp(self):
+        self.cari = ornek_cari(unvan='Deneme Ticaret')
+        CARI_INDEKSI.yukle()
+        self.addCleanup(setattr, CARI_INDEKSI, '_kayitlar', None)
+
+    def bulunanlar(self, sorgu):
+        return [pk for pk, _ in CARI_INDEKSI.ara(sorgu)]
+
+    def test_baska_surecte_eklenen_kayit_bulunur(self):
+        self.assertEqual(self.bulunanlar('deneme'), [self.cari.pk])
+        with self.captureOnCommitCallbacks(execute=False):
+            yeni = ornek_cari(unvan='Deneme Gıda', grup=self.cari.grup)
+        self.assertEqual(self.bulunanlar('deneme'), [self.cari.pk])
+
+        BelgeSira.ayir(CARI_INDEKSI.seriler[0])
+
+        self.assertEqual(self.bulunanlar('deneme'), [self.cari.pk, yeni.pk])
+
+    def test_baska_surecte_silinen_kayit_cikar(self):
+        CariKart.objects.filter(pk=self.cari.pk).update(silindi=True)
+        BelgeSira.ayir(CARI_INDEKSI.seriler[0])
+
+        self.assertEqual(self.bulunanlar('deneme'), [])
+
+    def test_kalici_silmede_indeks_bastan_kurulur(self):
+        CariKart.objects.filter(pk=self.cari.pk).delete()
+        BelgeSira.ayir(CARI_INDEKSI.seriler[1])
+
+        self.assertEqual(self.bulunanlar('deneme'), [])
+
+    def test_sayac_degismezse_veritabani_okunmaz(self):
+        self.bulunanlar('deneme')
+        with self.assertNumQueries(1):
+            self.bulunanlar('deneme')
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+
+from muhasebe.models import CariGrup, CariKart, Il, Ilce, StokKart
+
+
+def ornek_kullanici():
+    return User.objects.create_user('test', password='test', is_superuser=True)
+
+
+def ornek_cari(**alanlar):
+    il, _ = Il.objects.get_or_create(plaka=34, defaults={'ad': 'İstanbul'})
+    ilce, _ = Ilce.objects.get_or_create(il=il, ad='Kadıköy')
+    grup = alanlar.pop('grup', None) or CariGrup.objects.create(ad='Test Grubu')
+    return CariKart.objects.create(**{
+        'unvan': 'Test Cari', 'grup': grup, 'yetkili_adi': 'Ali Veli', 'telefon': '5550000000',
+        'adres': 'Test', 'il': il, 'ilce': ilce, **alanlar,
+    })
+
+
+def ornek_stok(**alanlar):
+    return StokKart.objects.create(**{'ad': 'Test Stok', 'satis_fiyati': 10, **alanlar})
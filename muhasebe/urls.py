@@ -28,6 +28,7 @@ urlpatterns = [
     
     # Stok işlemler
     path('stok/', views.stok_list, name='stok_list'),
+    path('stok/indir/', views.stok_indir, name='stok_indir'),
     path('stok/ekle/', views.stok_ekle, name='stok_ekle'),
     
     # Kasa işlemler
@@ -36,6 +37,7 @@ urlpatterns = [
     
     # Fatura işlemleri
     path('fatura/', views.fatura_list, name='fatura_list'),
+    path('fatura/indir/', views.fatura_indir, name='fatura_indir'),
     path('fatura/ekle/', views.fatura_ekle, name='fatura_ekle'),
     path('fatura/<int:pk>/', views.fatura_detay, name='fatura_detay'),
     path('fatura/<int:pk>/duzenle/', views.fatura_duzenle, name='fatura_duzenle'),
@@ -56,6 +58,8 @@ urlpatterns = [
 
     # Yetkili menüsü (sadece superuser)
     path('yetkili/', views.yetkili_menu, name='yetkili_menu'),
+    path('yetkili/analitik-aktar/', views.analitik_aktar, name='analitik_aktar'),
+    path('yetkili/donem-kapanis/', views.donem_kapanis, name='donem_kapanis'),
     path('yetkili/para-birimi/', views.para_birimi_list, name='para_birimi_list'),
     path('yetkili/para-birimi/ekle/', views.para_birimi_ekle, name='para_birimi_ekle'),
     path('yetkili/para-birimi/<int:pk>/duzenle/', views.para_birimi_duzenle, name='para_birimi_duzenle'),
@@ -77,13 +81,19 @@ urlpatterns = [
     path('cari-hareket/sil/<int:pk>/', views.cari_hareket_sil, name='cari_hareket_sil'),
     path('cari-hareket/duzenle/<int:pk>/', views.cari_hareket_ekle, name='cari_hareket_duzenle'),
     path('cari/<int:cari_id>/hareketler/', views.cari_hareketler, name='cari_hareketler'),
+    path('cari/<int:cari_id>/ekstre/indir/', views.cari_ekstre_indir, name='cari_ekstre_indir'),
     path('cari-hareket/', views.cari_hareket_list, name='cari_hareket_list'),
+    path('cari-hareket/indir/', views.cari_hareket_indir, name='cari_hareket_indir'),
     path('cari-hareket/virman/', views.cari_virman, name='cari_virman'),
     
     # AJAX
     path('ajax/cari-ara/', views.cari_ara, name='cari_ara'),
     path('ajax/kasa-banka-getir/', views.kasa_banka_getir, name='kasa_banka_getir'),
+    path('ajax/doviz-kuru/', views.doviz_kuru_getir, name='doviz_kuru_getir'),
     path('fatura/stok-detay/<int:stok_id>/', views.get_stok_detay, name='get_stok_detay'),
+    path('fatura/stok-detay/toplu/', views.get_stok_detay_toplu, name='get_stok_detay_toplu'),
+    path('stok/barkod/', views.stok_barkod, name='stok_barkod_toplu'),
+    path('stok/barkod/<str:barkod>/', views.stok_barkod, name='stok_barkod'),
 
 
     path('api/cari-bakiye-detay/', views.cari_bakiye_detay, name='cari_bakiye_detay'),
@@ -2,21 +2,29 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db import models
+from django.http import JsonResponse, Http404
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
-from django.db.models import Sum, Q, Count, F, Value
+from django.db.models import Sum, Q, Count, F, Value, OuterRef, Subquery, FilteredRelation, Prefetch
 from django.db.models.functions import Coalesce, Abs
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+import base64
 import json
+from datetime import datetime, timedelta
+from .arama import arama_motoru
+from .arsiv import okuma_modeli
+from .donem import cari_devri
+from .ekstre import ekstre_imleci, ekstre_imleci_coz, ekstre_ozeti, ekstre_sayfasi, ekstre_satirlari
+from .fiyat import etkin_fiyatlar
+from .oneri import CARI_INDEKSI, STOK_INDEKSI
 from .models import Fatura, FaturaKalem  # Fatura modellerini import'a ekle
 from .forms import FaturaForm 
 
 from .models import (
     CariKart, CariGrup, Kasa, Banka, StokKart, Fatura, KasaHareket, 
-    Il, Ilce, ParaBirimi, Pos, CariHareket,
+    Il, Ilce, ParaBirimi, Pos, CariHareket, CariBakiye, DonemKapanis, DonemKilitli,
     StokGrupFiyat, StokSecenek, StokSecenekDeger,
     GenelStokSecenek, GenelStokSecenekDeger, StokGrup
 )
@@ -30,6 +38,79 @@ from .forms import (
 )
 
 
+def tarih_araligi(tarih_bas=None, tarih_son=None):
+    """YYYY-MM-DD gün sınırlarını [bas, son) datetime aralığına çevirir; geçersiz/boş sınır None olur"""
+    bas = son = None
+    if tarih_bas:
+        try:
+            bas = timezone.make_aware(datetime.strptime(tarih_bas, '%Y-%m-%d'))
+        except ValueError:
+            pass
+    if tarih_son:
+        try:
+            son = timezone.make_aware(datetime.strptime(tarih_son, '%Y-%m-%d') + timedelta(days=1))
+        except ValueError:
+            pass
+    return bas, son
+
+
+def tarih_araligi_filtrele(queryset, tarih_bas=None, tarih_son=None, alan='tarih'):
+    """YYYY-MM-DD gün sınırlarını indeks kullanabilen datetime aralığına çevirerek filtreler"""
+    # tarih__date karşılaştırması sütunu fonksiyondan geçirdiği için indeks kullanılamaz
+    bas, son = tarih_araligi(tarih_bas, tarih_son)
+    if bas:
+        queryset = queryset.filter(**{f'{alan}__gte': bas})
+    if son:
+        queryset = queryset.filter(**{f'{alan}__lt': son})
+    return queryset
+
+
+def imlec_olustur(kayit):
+    """Kaydın (tarih, id) sıralama anahtarını URL'de taşınabilir imlece çevirir"""
+    return base64.urlsafe_b64encode(f"{kayit.tarih.isoformat()}|{kayit.pk}".encode()).decode()
+
+
+def imlec_coz(imlec):
+    try:
+        tarih, pk = base64.urlsafe_b64decode(imlec.encode()).decode().split('|')
+        return datetime.fromisoformat(tarih), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def imlecli_sayfala(queryset, sayfa_boyutu, sonra=None, once=None):
+    """('-tarih', '-id') sıralı queryset'i OFFSET/COUNT kullanmadan imleçle sayfalar.
+    
+    `sonra` imleci verilirse o kaydın devamı, `once` verilirse öncesindeki
+    sayfa getirilir; derin sayfalar da indeks üzerinden sabit sürede gelir.
+    """
+    sonra = imlec_coz(sonra) if sonra else None
+    once = imlec_coz(once) if once else None
+    
+    if once:
+        tarih, pk = once
+        kayitlar = list(queryset.filter(
+            Q(tarih__gt=tarih) | Q(tarih=tarih, pk__gt=pk)
+        ).order_by('tarih', 'id')[:sayfa_boyutu + 1])
+        onceki_var = len(kayitlar) > sayfa_boyutu
+        kayitlar = kayitlar[:sayfa_boyutu][::-1]
+        sonraki_var = True
+    else:
+        if sonra:
+            tarih, pk = sonra
+            queryset = queryset.filter(Q(tarih__lt=tarih) | Q(tarih=tarih, pk__lt=pk))
+        kayitlar = list(queryset.order_by('-tarih', '-id')[:sayfa_boyutu + 1])
+        sonraki_var = len(kayitlar) > sayfa_boyutu
+        kayitlar = kayitlar[:sayfa_boyutu]
+        onceki_var = sonra is not None
+    
+    sayfa = {
+        'onceki': imlec_olustur(kayitlar[0]) if onceki_var and kayitlar else None,
+        'sonraki': imlec_olustur(kayitlar[-1]) if sonraki_var and kayitlar else None,
+    }
+    return kayitlar, sayfa
+
+
 # Login view
 def login_view(request):
     if request.user.is_authenticated:
@@ -70,31 +151,25 @@ def anasayfa(request):
     try:
         tl = ParaBirimi.objects.get(kod='TL')
         
-        # Tüm carilerin TL bakiyelerini hesapla
-        cariler_bakiye = CariHareket.objects.filter(
-            silindi=False,
+        # Tüm carilerin TL bakiyeleri (özet tablodan)
+        cariler_bakiye = CariBakiye.objects.filter(
             para_birimi=tl
-        ).values('cari').annotate(
-            toplam_giris=Sum('tutar', filter=Q(hareket_yonu='giris'), default=Decimal('0')),
-            toplam_cikis=Sum('tutar', filter=Q(hareket_yonu='cikis'), default=Decimal('0'))
         ).annotate(
             bakiye=F('toplam_giris') - F('toplam_cikis')
         )
         
-        # Borçlu ve alacaklı cari sayıları ve toplamları
-        toplam_borc = Decimal('0')
-        toplam_alacak = Decimal('0')
-        toplam_borc_sayisi = 0
-        toplam_alacak_sayisi = 0
+        sonuc = cariler_bakiye.aggregate(
+            toplam_borc=Sum('bakiye', filter=Q(bakiye__lt=0), default=Decimal('0')),
+            toplam_alacak=Sum('bakiye', filter=Q(bakiye__gt=0), default=Decimal('0')),
+            toplam_borc_sayisi=Count('id', filter=Q(bakiye__lt=0)),
+            toplam_alacak_sayisi=Count('id', filter=Q(bakiye__gt=0)),
+        )
         
-        for cari in cariler_bakiye:
-            bakiye = cari['bakiye'] or Decimal('0')
-            if bakiye < 0:
-                toplam_borc += abs(bakiye)
-                toplam_borc_sayisi += 1
-            elif bakiye > 0:
-                toplam_alacak += bakiye
-                toplam_alacak_sayisi += 1
+        # Borçlu ve alacaklı cari sayıları ve toplamları
+        toplam_borc = abs(sonuc['toplam_borc'])
+        toplam_alacak = sonuc['toplam_alacak']
+        toplam_borc_sayisi = sonuc['toplam_borc_sayisi']
+        toplam_alacak_sayisi = sonuc['toplam_alacak_sayisi']
         
         context['toplam_borc'] = toplam_borc
         context['toplam_alacak'] = toplam_alacak
@@ -120,7 +195,8 @@ def get_ilceler(request, il_id):
 # Cari Grup işlemleri
 @login_required
 def cari_grup_list(request):
-    gruplar = CariGrup.objects.filter(silindi=False).order_by('kod')
+    # Tam ada göre sıralama ağaç sırasıdır (her grup üst grubunun hemen altında)
+    gruplar = CariGrup.objects.filter(silindi=False).select_related('ust_grup').order_by('yol_adi')
     
     if request.method == 'POST':
         form = CariGrupForm(request.POST)
@@ -161,11 +237,50 @@ def cari_grup_sil(request, pk):
         'title': 'Cari Grup Sil'
     })
 
+def grup_filtresi(queryset, grup_modeli, grup_id, alt_gruplar=True):
+    """Kayıtları seçilen gruba, istenirse alt gruplarıyla birlikte (yol aralığıyla) sınırlar"""
+    if not alt_gruplar:
+        return queryset.filter(grup_id=grup_id)
+    grup = grup_modeli.objects.filter(pk=grup_id).only('yol').first()
+    if grup is None:
+        return queryset.none()
+    return queryset.filter(grup.alt_agac_kosulu('grup__'))
+
+
+def grup_ozeti(grup_modeli, toplamlar, alanlar):
+    """grup_id'ye göre gruplanmış toplamları üst gruplara da ekleyerek ağaç sırasıyla döndürür.
+    
+    Her grubun satırı kendisinin ve tüm alt gruplarının toplamıdır; üst gruplar
+    yoldan bulunduğu için grup sayısı kadar sorgu çalışmaz. Grubu olmayan
+    kayıtlar en sondaki grup=None satırındadır.
+    """
+    gruplar = grup_modeli.objects.in_bulk()
+    ozet = {}
+    for satir in toplamlar:
+        grup = gruplar.get(satir['grup_id'])
+        for pk in ([*grup.ust_grup_idleri(), grup.pk] if grup else [None]):
+            toplam = ozet.setdefault(pk, dict.fromkeys(alanlar, 0))
+            for alan in alanlar:
+                toplam[alan] += satir.get(alan) or 0
+    
+    # Kardeş gruplar ada göre, alt gruplar üst grubun hemen altında sıralanır
+    def agac_sirasi(grup):
+        return [(gruplar[pk].ad, pk) for pk in grup.ust_grup_idleri() if pk in gruplar] + [(grup.ad, grup.pk)]
+    
+    satirlar = [
+        {'grup': grup, **ozet[grup.pk]}
+        for grup in sorted((gruplar[pk] for pk in ozet if pk is not None), key=agac_sirasi)
+    ]
+    if None in ozet:
+        satirlar.append({'grup': None, **ozet[None]})
+    return satirlar
+
+
 # Cari işlemler
 @login_required
 def cari_list(request):
     cariler = CariKart.objects.filter(silindi=False).select_related('grup', 'il', 'ilce')
-    gruplar = CariGrup.objects.filter(silindi=False).order_by('ad')
+    gruplar = CariGrup.objects.filter(silindi=False).select_related('ust_grup').order_by('yol_adi')
     iller = Il.objects.all().order_by('ad')
     
     # Filtreleme parametreleri
@@ -174,22 +289,14 @@ def cari_list(request):
     # Metin arama (ünvan, yetkili adı)
     arama = request.GET.get('cari_ara', '').strip()
     if arama:
-        cariler = cariler.filter(
-            Q(unvan__icontains=arama) |
-            Q(kod__icontains=arama) |
-            Q(yetkili_adi__icontains=arama) |
-            Q(vergi_no__icontains=arama) |
-            Q(tc_kimlik__icontains=arama) |
-            Q(telefon__icontains=arama) |         
-            Q(email__icontains=arama) |            
-            Q(adres__icontains=arama)
-        )
+        cariler = arama_motoru().filtrele(cariler, arama)
         filters['arama'] = arama 
     
-    # Grup filtresi
+    # Grup filtresi (varsayılan olarak alt gruplar dahil)
     grup_id = request.GET.get('grup')
-    if grup_id:
-        cariler = cariler.filter(grup_id=grup_id)
+    filters['alt_gruplar'] = request.GET.get('alt_gruplar', '1') == '1'
+    if grup_id and grup_id.isdigit():
+        cariler = grup_filtresi(cariler, CariGrup, grup_id, filters['alt_gruplar'])
         filters['grup'] = grup_id
     
     # İl filtresi
@@ -233,28 +340,14 @@ def cari_list(request):
     try:
         tl = ParaBirimi.objects.get(kod='TL')
         
-        # Her cari için bakiye hesapla
+        # Her cari için TL bakiyesi özet tablodan tek LEFT JOIN ile okunur
         cariler = cariler.annotate(
-            toplam_giris=Sum(
-                'hareketler__tutar',
-                filter=Q(
-                    hareketler__hareket_yonu='giris',
-                    hareketler__para_birimi=tl,
-                    hareketler__silindi=False
-                ),
-                default=Decimal('0')
-            ),
-            toplam_cikis=Sum(
-                'hareketler__tutar',
-                filter=Q(
-                    hareketler__hareket_yonu='cikis',
-                    hareketler__para_birimi=tl,
-                    hareketler__silindi=False
-                ),
-                default=Decimal('0')
+            tl_bakiye=FilteredRelation('bakiyeler', condition=Q(bakiyeler__para_birimi=tl)),
+            bakiye_hesaplanan=Coalesce(
+                F('tl_bakiye__toplam_giris') - F('tl_bakiye__toplam_cikis'),
+                Value(Decimal('0')),
+                output_field=models.DecimalField()
             )
-        ).annotate(
-            bakiye_hesaplanan=F('toplam_giris') - F('toplam_cikis')
         )
         
         # Bakiye aralığı filtreleri
@@ -284,55 +377,84 @@ def cari_list(request):
             cariler = cariler.filter(bakiye_hesaplanan__gt=0)
             filters['bakiye_durum'] = 'alacakli'
         
-        # Sıralama
-        # Sıralama kısmını değiştirin:
-        # Sıralama
-        siralama = request.GET.get('siralama', 'bakiye_azalan')  # Varsayılan değer değişti
-        if siralama == 'unvan':
+        # Sıralama (sayfalar arası kararlı olması için kod ikincil anahtar)
+        # Varsayılan sıralama arama varsa ilgi skoru, yoksa bakiye (azalan)
+        siralama = request.GET.get('siralama', 'ilgi')
+        if siralama == 'ilgi' and arama:
+            cariler = cariler.order_by('-arama_skoru', 'kod')
+        elif siralama == 'unvan':
             cariler = cariler.order_by('unvan')
         elif siralama == 'bakiye_artan':
             # Mutlak değere göre artan sıralama
             cariler = cariler.annotate(
                 bakiye_mutlak=Abs('bakiye_hesaplanan')
-            ).order_by('bakiye_mutlak')
+            ).order_by('bakiye_mutlak', 'kod')
         elif siralama == 'bakiye_azalan':
             # Mutlak değere göre azalan sıralama
             cariler = cariler.annotate(
                 bakiye_mutlak=Abs('bakiye_hesaplanan')
-            ).order_by('-bakiye_mutlak')
+            ).order_by('-bakiye_mutlak', 'kod')
         else:
             # Varsayılan olarak bakiye azalan
             cariler = cariler.annotate(
                 bakiye_mutlak=Abs('bakiye_hesaplanan')
-            ).order_by('-bakiye_mutlak')
+            ).order_by('-bakiye_mutlak', 'kod')
 
         filters['siralama'] = siralama
         
-        # Toplam bakiye hesaplama
-        toplam_borc = cariler.filter(bakiye_hesaplanan__lt=0).aggregate(
-            toplam=Sum('bakiye_hesaplanan')
-        )['toplam'] or Decimal('0')
-        
-        toplam_alacak = cariler.filter(bakiye_hesaplanan__gt=0).aggregate(
-            toplam=Sum('bakiye_hesaplanan')
-        )['toplam'] or Decimal('0')
+        # Kayıt sayısı, borç/alacak toplamları ve grup özeti gruba göre tek sorguyla
+        grup_toplamlari = list(cariler.order_by().values('grup_id').annotate(
+            cari_sayisi=Count('id'),
+            bakiye=Sum('bakiye_hesaplanan'),
+            toplam_borc=Sum('bakiye_hesaplanan', filter=Q(bakiye_hesaplanan__lt=0)),
+            toplam_alacak=Sum('bakiye_hesaplanan', filter=Q(bakiye_hesaplanan__gt=0)),
+        ))
+        cari_sayisi = sum(t['cari_sayisi'] for t in grup_toplamlari)
+        toplam_borc = Decimal(sum(t['toplam_borc'] or 0 for t in grup_toplamlari)).quantize(Decimal('0.01'))
+        toplam_alacak = Decimal(sum(t['toplam_alacak'] or 0 for t in grup_toplamlari)).quantize(Decimal('0.01'))
         
     except ParaBirimi.DoesNotExist:
         # TL yoksa bakiye hesaplama yapma
+        cariler = cariler.annotate(bakiye_hesaplanan=Value(Decimal('0'), output_field=models.DecimalField()))
+        grup_toplamlari = list(cariler.order_by().values('grup_id').annotate(cari_sayisi=Count('id')))
+        cari_sayisi = sum(t['cari_sayisi'] for t in grup_toplamlari)
         toplam_borc = Decimal('0')
         toplam_alacak = Decimal('0')
         
         # Sıralama
-        siralama = request.GET.get('siralama', 'kod')
-        if siralama == 'unvan':
+        siralama = request.GET.get('siralama', 'ilgi')
+        if siralama == 'ilgi' and arama:
+            cariler = cariler.order_by('-arama_skoru', 'kod')
+        elif siralama == 'unvan':
             cariler = cariler.order_by('unvan')
         else:
             cariler = cariler.order_by('kod')
         filters['siralama'] = siralama
     
+    # Tümü seçeneği sayfada listelenmez, filtrelenmiş cariler CSV olarak indirilir
+    sayfa_boyutu = request.GET.get('sayfa_boyutu', '50')
+    if sayfa_boyutu == 'all':
+        return cari_disa_aktar(cariler)
+    
+    try:
+        sayfa_boyutu = min(max(int(sayfa_boyutu), 1), 500)
+    except ValueError:
+        sayfa_boyutu = 50
+    paginator = Paginator(cariler, sayfa_boyutu)
+    # Kayıt sayısı toplam sorgusundan bilindiği için Paginator ayrıca COUNT çalıştırmaz
+    paginator.count = cari_sayisi
+    sayfa = paginator.get_page(request.GET.get('page'))
+    
+    # Sayfa bağlantıları için sayfa numarası dışındaki filtreler
+    sayfa_sorgusu = request.GET.copy()
+    sayfa_sorgusu.pop('page', None)
+    
     context = {
-        'cariler': cariler,
+        'cariler': sayfa,
+        'cari_sayisi': cari_sayisi,
+        'sayfa_sorgusu': sayfa_sorgusu.urlencode(),
         'gruplar': gruplar,
+        'grup_ozeti': grup_ozeti(CariGrup, grup_toplamlari, ('cari_sayisi', 'bakiye')),
         'iller': iller,
         'filters': filters,
         'toplam_borc': abs(toplam_borc),
@@ -342,6 +464,29 @@ def cari_list(request):
     
     return render(request, 'cari_list.html', context)
 
+
+def cari_disa_aktar(cariler, bicim='csv'):
+    """Filtrelenmiş carileri TL bakiyeleriyle akış halinde CSV/XLSX olarak indirir"""
+    from .disa_aktarim import disa_aktarim_yaniti
+    
+    satirlar = cariler.values_list(
+        'kod', 'unvan', 'grup__ad', 'yetkili_adi', 'telefon', 'il__ad', 'ilce__ad',
+        'bakiye_hesaplanan', 'aktif'
+    ).iterator(chunk_size=2000)
+    
+    def satir_uret():
+        for kod, unvan, grup, yetkili, telefon, il, ilce, bakiye, aktif in satirlar:
+            yield [
+                kod, unvan, grup or '', yetkili, telefon, il or '', ilce or '',
+                bakiye.quantize(Decimal('0.01')), 'Aktif' if aktif else 'Pasif'
+            ]
+    
+    return disa_aktarim_yaniti(
+        bicim, f"cariler_{timezone.localdate():%Y%m%d}",
+        ['Kod', 'Ünvan', 'Grup', 'Yetkili', 'Telefon', 'İl', 'İlçe', 'Bakiye (TL)', 'Durum'],
+        satir_uret()
+    )
+
 @login_required
 def cari_ekle(request):
     if request.method == 'POST':
@@ -368,8 +513,8 @@ def cari_duzenle(request, pk):
     return render(request, 'cari_form.html', {'form': form, 'title': 'Cari Düzenle'})
 
 # Stok işlemler
-@login_required
-def stok_list(request):
+def stok_filtrele(request):
+    """stok_list ve dışa aktarım için GET filtrelerini uygulanmış stoklar ve seçili filtreler"""
     stoklar = StokKart.objects.filter(silindi=False).select_related('para_birimi', 'grup')
     
     # Filtreleme parametreleri
@@ -385,10 +530,11 @@ def stok_list(request):
         )
         filters['arama'] = arama
     
-    # Stok grubu filtresi
+    # Stok grubu filtresi (varsayılan olarak alt gruplar dahil)
     grup_id = request.GET.get('grup')
-    if grup_id:
-        stoklar = stoklar.filter(grup_id=grup_id)
+    filters['alt_gruplar'] = request.GET.get('alt_gruplar', '1') == '1'
+    if grup_id and grup_id.isdigit():
+        stoklar = grup_filtresi(stoklar, StokGrup, grup_id, filters['alt_gruplar'])
         filters['grup'] = grup_id
     
     # YENİ KOD:
@@ -447,26 +593,58 @@ def stok_list(request):
         stoklar = stoklar.order_by('kod')
     filters['siralama'] = siralama
     
-    # Toplam değer hesapla
-    toplam_deger = stoklar.aggregate(
-        toplam=Sum(F('miktar') * F('satis_fiyati'))
-    )['toplam'] or Decimal('0')
+    return stoklar, filters
+
+
+@login_required
+def stok_list(request):
+    stoklar, filters = stok_filtrele(request)
     
-    # Kritik stok sayısı
-    kritik_stok_sayisi = stoklar.filter(miktar__lte=F('kritik_stok')).count()
+    # Stok sayısı, toplam değer, kritik stok sayısı ve grup özeti gruba göre tek sorguyla
+    grup_toplamlari = list(stoklar.order_by().values('grup_id').annotate(
+        stok_sayisi=Count('id'),
+        stok_degeri=Sum(F('miktar') * F('satis_fiyati')),
+        kritik_stok_sayisi=Count('id', filter=Q(miktar__lte=F('kritik_stok'))),
+    ))
     
     context = {
         'stoklar': stoklar,
         'filters': filters,
         'para_birimleri': ParaBirimi.objects.filter(silindi=False, aktif=True),
-        'stok_gruplari': StokGrup.objects.filter(silindi=False, aktif=True).order_by('ad'),
-        'toplam_deger': toplam_deger,
-        'kritik_stok_sayisi': kritik_stok_sayisi,
+        'stok_gruplari': StokGrup.objects.filter(silindi=False, aktif=True).order_by('yol_adi'),
+        'stok_sayisi': sum(t['stok_sayisi'] for t in grup_toplamlari),
+        'toplam_deger': sum(t['stok_degeri'] or 0 for t in grup_toplamlari),
+        'kritik_stok_sayisi': sum(t['kritik_stok_sayisi'] for t in grup_toplamlari),
+        'grup_ozeti': grup_ozeti(StokGrup, grup_toplamlari, ('stok_sayisi', 'stok_degeri')),
     }
     
     return render(request, 'stok/list.html', context)
 
 
+@login_required
+def stok_indir(request):
+    """Listedeki filtrelerle stokları akış halinde CSV/XLSX olarak indirir"""
+    from .disa_aktarim import disa_aktarim_yaniti
+    
+    birimler = dict(StokKart.BIRIMLER)
+    stoklar, _ = stok_filtrele(request)
+    satirlar = stoklar.values_list(
+        'kod', 'ad', 'grup__yol_adi', 'barkod', 'birim', 'miktar', 'kritik_stok',
+        'alis_fiyati', 'satis_fiyati', 'para_birimi__kod', 'kdv_orani', 'aktif'
+    ).iterator(chunk_size=2000)
+    
+    def satir_uret():
+        for kod, ad, grup, barkod, birim, *diger, aktif in satirlar:
+            yield [kod, ad, grup, barkod, birimler.get(birim, birim), *diger, 'Aktif' if aktif else 'Pasif']
+    
+    return disa_aktarim_yaniti(
+        request.GET.get('bicim', 'xlsx'), f"stoklar_{timezone.localdate():%Y%m%d}",
+        ['Kod', 'Stok Adı', 'Grup', 'Barkod', 'Birim', 'Miktar', 'Kritik Stok', 'Alış Fiyatı',
+         'Satış Fiyatı', 'Para Birimi', 'KDV %', 'Durum'],
+        satir_uret()
+    )
+
+
 @login_required
 def stok_ekle(request):
     if request.method == 'POST':
@@ -531,7 +709,7 @@ def stok_sil(request, pk):
 # Stok Grup işlemleri
 @login_required
 def stok_grup_list(request):
-    gruplar = StokGrup.objects.filter(silindi=False).order_by('kod')
+    gruplar = StokGrup.objects.filter(silindi=False).select_related('ust_grup').order_by('yol_adi')
     
     if request.method == 'POST':
         form = StokGrupForm(request.POST)
@@ -734,22 +912,25 @@ def kasa_hareket(request):
     return render(request, 'kasa_hareket_form.html', {'form': form})
 
 # Fatura işlemler
-@login_required
-def fatura_list(request):
-    faturalar = Fatura.objects.filter(silindi=False).select_related('cari', 'olusturan')
+def fatura_filtrele(request):
+    """fatura_list ve dışa aktarım için GET filtrelerini uygulanmış faturalar.
+    
+    Tarih filtresi arşivlenmiş döneme uzanıyorsa arşivle birleşik (salt okunur) görünümden okunur.
+    """
+    tarih_bas = request.GET.get('tarih_bas')
+    tarih_son = request.GET.get('tarih_son')
+    
+    model = Fatura
+    if tarih_bas or tarih_son:
+        model = okuma_modeli(Fatura, *tarih_araligi(tarih_bas, tarih_son))
+    faturalar = model.objects.filter(silindi=False).select_related('cari', 'olusturan')
     
     # Filtreleme
     tip = request.GET.get('tip')
     if tip:
         faturalar = faturalar.filter(tip=tip)
     
-    tarih_bas = request.GET.get('tarih_bas')
-    if tarih_bas:
-        faturalar = faturalar.filter(tarih__date__gte=tarih_bas)
-    
-    tarih_son = request.GET.get('tarih_son')
-    if tarih_son:
-        faturalar = faturalar.filter(tarih__date__lte=tarih_son)
+    faturalar = tarih_araligi_filtrele(faturalar, tarih_bas, tarih_son)
     
     cari_ara = request.GET.get('cari_ara')
     if cari_ara:
@@ -758,6 +939,13 @@ def fatura_list(request):
             Q(cari__kod__icontains=cari_ara)
         )
     
+    return faturalar
+
+
+@login_required
+def fatura_list(request):
+    faturalar = fatura_filtrele(request)
+    
     # Toplam tutarlar
     toplam_satis = faturalar.filter(tip='satis').aggregate(
         toplam=Sum('genel_toplam')
@@ -775,102 +963,44 @@ def fatura_list(request):
     
     return render(request, 'fatura/list.html', context)
 
+
+@login_required
+def fatura_indir(request):
+    """Listedeki filtrelerle faturaları akış halinde CSV/XLSX olarak indirir"""
+    from .disa_aktarim import disa_aktarim_yaniti
+    
+    tipler = dict(Fatura.FATURA_TIPLERI)
+    satirlar = fatura_filtrele(request).order_by('-tarih', '-id').values_list(
+        'fatura_no', 'tarih', 'tip', 'cari__kod', 'cari__unvan', 'ara_toplam', 'iskonto_tutari',
+        'kdv_tutari', 'genel_toplam', 'vade_tarihi', 'odendi', 'iptal', 'aciklama', 'olusturan__username'
+    ).iterator(chunk_size=2000)
+    
+    def satir_uret():
+        for fatura_no, tarih, tip, *diger in satirlar:
+            yield [fatura_no, tarih, tipler.get(tip, tip), *diger]
+    
+    return disa_aktarim_yaniti(
+        request.GET.get('bicim', 'xlsx'), f"faturalar_{timezone.localdate():%Y%m%d}",
+        ['Fatura No', 'Tarih', 'Tip', 'Cari Kod', 'Ünvan', 'Ara Toplam', 'İskonto', 'KDV',
+         'Genel Toplam', 'Vade Tarihi', 'Ödendi', 'İptal', 'Açıklama', 'Oluşturan'],
+        satir_uret()
+    )
+
 @login_required
 def fatura_ekle(request):
     if request.method == 'POST':
         form = FaturaForm(request.POST)
         if form.is_valid():
-            fatura = form.save(commit=False)
-            fatura.olusturan = request.user
-            fatura.save()
-            
             # Kalemler JSON olarak gelecek
-            kalemler_json = request.POST.get('kalemler')
-            if kalemler_json:
-                import json
-                kalemler = json.loads(kalemler_json)
-                
-                ara_toplam = Decimal('0')
-                toplam_kdv = Decimal('0')
-                
-                for kalem_data in kalemler:
-                    stok = StokKart.objects.get(pk=kalem_data['stok_id'])
-                    
-                    # Fiyat hesaplama
-                    birim_fiyat = Decimal(str(kalem_data['birim_fiyat']))
-                    secenek_fiyat_farki = Decimal(str(kalem_data.get('secenek_fiyat_farki', 0)))
-                    
-                    # İndirim hesaplama
-                    indirim_orani = Decimal('0')
-                    indirim_aciklama = ''
-                    
-                    # Cari grup indirimi kontrol et
-                    if fatura.cari.grup:
-                        grup_fiyat = StokGrupFiyat.objects.filter(
-                            stok=stok,
-                            cari_grup=fatura.cari.grup,
-                            silindi=False
-                        ).first()
-                        
-                        if grup_fiyat:
-                            # Grup özel fiyatı var
-                            eski_fiyat = birim_fiyat
-                            birim_fiyat = grup_fiyat.satis_fiyati
-                            if eski_fiyat > 0:
-                                indirim_orani = ((eski_fiyat - birim_fiyat) / eski_fiyat) * 100
-                                indirim_aciklama = f"{fatura.cari.grup.ad} grubuna özel fiyat"
-                    
-                    kalem = FaturaKalem.objects.create(
-                        fatura=fatura,
-                        stok=stok,
-                        miktar=Decimal(str(kalem_data['miktar'])),
-                        birim_fiyat=birim_fiyat,
-                        kdv_orani=kalem_data.get('kdv_orani', stok.kdv_orani),
-                        kdv_durumu=kalem_data.get('kdv_durumu', 'dahil'),
-                        indirim_orani=indirim_orani,
-                        indirim_aciklama=indirim_aciklama,
-                        secenekler=kalem_data.get('secenekler', {}),
-                        secenek_fiyat_farki=secenek_fiyat_farki
-                    )
-                    
-                    
-                
-                # Fatura toplamlarını güncelle
-                # Kalemleri kaydettikten sonra toplamları yeniden hesapla
-                ara_toplam = Decimal('0')
-                toplam_kdv = Decimal('0')
-
-                for kalem in fatura.kalemler.all():
-                        # tutar alanı zaten net tutar (KDV hariç)
-                    ara_toplam += kalem.tutar
-                    toplam_kdv += kalem.kdv_tutari
-
-                # Fatura toplamlarını güncelle
-                fatura.ara_toplam = ara_toplam
-
-                # Fatura iskontosu
-                if fatura.iskonto_tipi == 'yuzde' and fatura.iskonto_degeri > 0:
-                    fatura.iskonto_tutari = ara_toplam * fatura.iskonto_degeri / Decimal('100')
-                elif fatura.iskonto_tipi == 'tutar':
-                    fatura.iskonto_tutari = fatura.iskonto_degeri
-                else:
-                    fatura.iskonto_tutari = Decimal('0')
-
-                # İskontolu ara toplam
-                iskontolu_ara_toplam = ara_toplam - fatura.iskonto_tutari
-
-                # Genel toplam
-                fatura.kdv_tutari = toplam_kdv
-                fatura.genel_toplam = iskontolu_ara_toplam + toplam_kdv
+            kalemler = json.loads(request.POST.get('kalemler') or '[]')
+            
+            with transaction.atomic():
+                fatura = form.save(commit=False)
+                fatura.olusturan = request.user
                 fatura.save()
                 
-                # Stok güncelleme (satış ise düş, alış ise ekle)
-                for kalem in fatura.kalemler.all():
-                    if fatura.tip == 'satis':
-                        kalem.stok.miktar -= kalem.miktar
-                    else:  # alış
-                        kalem.stok.miktar += kalem.miktar
-                    kalem.stok.save()
+                # Kalemler, toplamlar ve stok güncellemesi tek seferde
+                fatura.kalemleri_kaydet(kalemler)
             
             messages.success(request, 'Fatura başarıyla oluşturuldu!')
             return redirect('fatura_duzenle', pk=fatura.pk)
@@ -888,87 +1018,17 @@ def fatura_duzenle(request, pk):
     fatura = get_object_or_404(Fatura, pk=pk, silindi=False)
     
     if request.method == 'POST':
+        # Form doğrulaması instance'ı değiştirdiği için eski tip ve tarih önceden alınır
+        eski_tip, eski_tarih = fatura.tip, fatura.tarih
         form = FaturaForm(request.POST, instance=fatura)
         if form.is_valid():
-            # Önce eski stok durumlarını geri al
-            for kalem in fatura.kalemler.all():
-                if fatura.tip == 'satis':
-                    kalem.stok.miktar += kalem.miktar
-                else:
-                    kalem.stok.miktar -= kalem.miktar
-                kalem.stok.save()
-                kalem.delete()
-            
-            # Yeni kalemleri kaydet
-            fatura = form.save()
+            kalemler = json.loads(request.POST.get('kalemler') or '[]')
             
-            kalemler_json = request.POST.get('kalemler')
-            if kalemler_json:
-                kalemler = json.loads(kalemler_json)
-                
-                ara_toplam = Decimal('0')
-                toplam_kdv = Decimal('0')
-                
-                for kalem_data in kalemler:
-                    stok = StokKart.objects.get(pk=kalem_data['stok_id'])
-                    
-                    # İndirim hesaplama
-                    birim_fiyat = Decimal(str(kalem_data['birim_fiyat']))
-                    indirim_orani = Decimal('0')
-                    indirim_aciklama = ''
-                    
-                    # Cari grup indirimi kontrol et
-                    if fatura.cari.grup:
-                        grup_fiyat = StokGrupFiyat.objects.filter(
-                            stok=stok,
-                            cari_grup=fatura.cari.grup,
-                            silindi=False
-                        ).first()
-                        
-                        if grup_fiyat:
-                            eski_fiyat = birim_fiyat
-                            birim_fiyat = grup_fiyat.satis_fiyati
-                            if eski_fiyat > 0:
-                                indirim_orani = ((eski_fiyat - birim_fiyat) / eski_fiyat) * 100
-                                indirim_aciklama = f"{fatura.cari.grup.ad} grubuna özel fiyat"
-                    
-                    kalem = FaturaKalem.objects.create(
-                        fatura=fatura,
-                        stok=stok,
-                        miktar=Decimal(str(kalem_data['miktar'])),
-                        birim_fiyat=birim_fiyat,
-                        kdv_orani=kalem_data.get('kdv_orani', stok.kdv_orani),
-                        kdv_durumu=kalem_data.get('kdv_durumu', 'dahil'),
-                        indirim_orani=indirim_orani,
-                        indirim_aciklama=indirim_aciklama,
-                        secenekler=kalem_data.get('secenekler', {}),
-                        secenek_fiyat_farki=Decimal(str(kalem_data.get('secenek_fiyat_farki', 0)))
-                    )
-                    
-                    
-                    
-                    # Yeni stok durumunu güncelle
-                    if fatura.tip == 'satis':
-                        kalem.stok.miktar -= kalem.miktar
-                    else:
-                        kalem.stok.miktar += kalem.miktar
-                    kalem.stok.save()
-                
-                # Fatura toplamlarını güncelle
-                fatura.ara_toplam = ara_toplam
-                
-                # Fatura iskontosu
-                if fatura.iskonto_tipi == 'yuzde' and fatura.iskonto_degeri > 0:
-                    fatura.iskonto_tutari = ara_toplam * fatura.iskonto_degeri / Decimal('100')
-                elif fatura.iskonto_tipi == 'tutar':
-                    fatura.iskonto_tutari = fatura.iskonto_degeri
+            with transaction.atomic():
+                fatura = form.save()
                 
-                # İskontolu ara toplam
-                iskontolu_ara_toplam = ara_toplam - fatura.iskonto_tutari
-                
-                fatura.kdv_tutari = toplam_kdv
-                fatura.genel_toplam = iskontolu_ara_toplam + toplam_kdv
-                fatura.save()
+                # Eski kalemlerin stok etkisi geri alınır, yeni kalemler yazılır
+                fatura.kalemleri_kaydet(kalemler, eski_tip=eski_tip, eski_tarih=eski_tarih)
             
             messages.success(request, 'Fatura güncellendi!')
             return redirect('fatura_duzenle', pk=fatura.pk)
@@ -983,7 +1043,7 @@ def fatura_duzenle(request, pk):
             'id', 'stok__id', 'stok__kod', 'stok__ad', 'miktar', 
             'birim_fiyat', 'kdv_orani', 'kdv_durumu', 'secenekler', 
             'secenek_fiyat_farki', 'indirim_orani', 'indirim_aciklama'
-        ))
+        ).order_by('id'))
     })
 
 @login_required
@@ -991,16 +1051,12 @@ def fatura_sil(request, pk):
     fatura = get_object_or_404(Fatura, pk=pk)
     
     if request.method == 'POST' or request.method == 'GET':  # GET'i de kabul et
-        # Stokları geri al
-        for kalem in fatura.kalemler.all():
-            if fatura.tip == 'satis':
-                kalem.stok.miktar += kalem.miktar
-            else:
-                kalem.stok.miktar -= kalem.miktar
-            kalem.stok.save()
-        
-        # Faturayı soft delete yap
-        fatura.soft_delete(request.user)
+        # Faturayı soft delete yap (stok etkisi model tarafında geri alınır)
+        try:
+            fatura.soft_delete(request.user)
+        except DonemKilitli as e:
+            messages.error(request, ' '.join(e.messages))
+            return redirect('fatura_list')
         messages.success(request, 'Fatura silindi!')
         return redirect('fatura_list')
     
@@ -1010,69 +1066,126 @@ def fatura_sil(request, pk):
 @login_required
 def get_stok_detay(request, stok_id):
     """Stok detaylarını ve seçeneklerini döndür"""
-    stok = get_object_or_404(StokKart, pk=stok_id, silindi=False)
-    
-    # Seçenekleri hazırla
-    secenekler = []
-    for secenek in stok.secenekler.filter(silindi=False).order_by('sira'):
-        degerler = []
-        for deger in secenek.degerler.filter(silindi=False).order_by('sira'):
-            degerler.append({
+    detaylar = stok_detaylari(StokKart.objects.filter(pk=stok_id, silindi=False), fiyat_carisi(request))
+    if not detaylar:
+        raise Http404('Stok bulunamadı')
+    return JsonResponse(detaylar[int(stok_id)])
+
+
+@login_required
+def get_stok_detay_toplu(request):
+    """Birden çok stokun detayı tek istekte (fatura düzenlemede mevcut kalemler için).
+    
+    stok_idler=1,2,3&cari_id=5 -> {'stoklar': {id: get_stok_detay verisi}}; sorgu
+    sayısı stok adedinden bağımsızdır.
+    """
+    try:
+        idler = {int(i) for i in request.GET.get('stok_idler', '').split(',') if i.strip()}
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Geçersiz stok listesi'}, status=400)
+    
+    detaylar = stok_detaylari(
+        StokKart.objects.filter(pk__in=idler, silindi=False), fiyat_carisi(request)
+    ) if idler else {}
+    return JsonResponse({'success': True, 'stoklar': detaylar})
+
+
+@login_required
+def stok_barkod(request, barkod=None):
+    """Barkod okutmada stok detayı; birebir eşleşme tekil barkod indeksinden bulunur.
+    
+    Toplu mod: stok/barkod/?barkodlar=869...,869... okuyucunun art arda okuttuğu
+    barkodları tek istekte çözer.
+    """
+    cari = fiyat_carisi(request)
+    stoklar = StokKart.objects.filter(silindi=False).exclude(barkod='')
+    
+    if barkod is not None:
+        detaylar = stok_detaylari(stoklar.filter(barkod=barkod.strip()), cari)
+        if not detaylar:
+            return JsonResponse({'success': False, 'error': 'Barkod bulunamadı'}, status=404)
+        return JsonResponse(next(iter(detaylar.values())))
+    
+    barkodlar = [b.strip() for b in request.GET.get('barkodlar', '').split(',') if b.strip()]
+    if not barkodlar:
+        return JsonResponse({'success': False, 'error': 'Barkod listesi boş'}, status=400)
+    
+    bulunan = {d['barkod']: d for d in stok_detaylari(stoklar.filter(barkod__in=set(barkodlar)), cari).values()}
+    return JsonResponse({
+        'success': True,
+        'stoklar': bulunan,
+        'bulunamayan': [b for b in dict.fromkeys(barkodlar) if b not in bulunan],
+    })
+
+
+def fiyat_carisi(request):
+    """İstekteki cari_id ile grup fiyatı uygulanacak cariyi döndürür"""
+    cari_id = request.GET.get('cari_id')
+    if not cari_id or not cari_id.isdigit():
+        return None
+    return CariKart.objects.filter(pk=cari_id).first()
+
+
+def stok_detaylari(stoklar, cari=None):
+    """Fatura satırı için stok detayları, seçenekleri ve cari grubuna özel fiyatlar.
+    
+    Seçenekler/değerler prefetch ile, grup fiyatları fiyat matrisinden alınır; stok sayısından
+    bağımsız olarak sabit sayıda sorgu çalışır. {stok_id: veri} döndürür.
+    """
+    stoklar = list(stoklar.select_related('para_birimi').prefetch_related(
+        Prefetch('secenekler', queryset=StokSecenek.objects.filter(silindi=False).order_by('sira').prefetch_related(
+            Prefetch('degerler', queryset=StokSecenekDeger.objects.filter(silindi=False).order_by('sira'))
+        ))
+    ))
+    
+    # Cari grup (ve üst grup) fiyatları fiyat matrisinden
+    fiyatlar = etkin_fiyatlar(stoklar, cari)
+    
+    detaylar = {}
+    for stok in stoklar:
+        secenekler = [{
+            'id': secenek.id,
+            'baslik': secenek.baslik,
+            'degerler': [{
                 'id': deger.id,
                 'deger': deger.deger,
                 'fiyat_tipi': deger.fiyat_tipi,
                 'fiyat_degeri': str(deger.fiyat_degeri),
                 'varsayilan': deger.varsayilan
-            })
+            } for deger in secenek.degerler.all()]
+        } for secenek in stok.secenekler.all()]
         
-        secenekler.append({
-            'id': secenek.id,
-            'baslik': secenek.baslik,
-            'degerler': degerler
-        })
-    
-    # Cari grup fiyatı kontrol et
-    cari_id = request.GET.get('cari_id')
-    ozel_fiyat = None
-    indirim_bilgisi = None
-    
-    if cari_id:
-        cari = CariKart.objects.get(pk=cari_id)
-        if cari.grup:
-            grup_fiyat = StokGrupFiyat.objects.filter(
-                stok=stok,
-                cari_grup=cari.grup,
-                silindi=False
-            ).first()
-            
-            if grup_fiyat:
-                ozel_fiyat = str(grup_fiyat.satis_fiyati)
-                if stok.satis_fiyati > 0:
-                    indirim_orani = ((stok.satis_fiyati - grup_fiyat.satis_fiyati) / stok.satis_fiyati) * 100
-                    indirim_bilgisi = {
-                        'eski_fiyat': str(stok.satis_fiyati),
-                        'yeni_fiyat': ozel_fiyat,
-                        'indirim_orani': str(round(indirim_orani, 2)),
-                        'aciklama': f"{cari.grup.ad} grubuna özel fiyat"
-                    }
-    
-    data = {
-        'id': stok.id,
-        'kod': stok.kod,
-        'ad': stok.ad,
-        'birim': stok.get_birim_display(),
-        'miktar': str(stok.miktar),
-        'satis_fiyati': ozel_fiyat or str(stok.satis_fiyati),
-        'kdv_orani': stok.kdv_orani,
-        'para_birimi': {
-            'kod': stok.para_birimi.kod,
-            'sembol': stok.para_birimi.sembol
-        },
-        'secenekler': secenekler,
-        'indirim_bilgisi': indirim_bilgisi
-    }
+        ozel_fiyat = None
+        indirim_bilgisi = None
+        fiyat = fiyatlar[stok.id]
+        if fiyat.grup:
+            ozel_fiyat = str(fiyat.fiyat)
+            if fiyat.liste_fiyati > 0:
+                indirim_bilgisi = {
+                    'eski_fiyat': str(fiyat.liste_fiyati),
+                    'yeni_fiyat': ozel_fiyat,
+                    'indirim_orani': str(round(fiyat.indirim_orani, 2)),
+                    'aciklama': f"{fiyat.grup} grubuna özel fiyat"
+                }
+        
+        detaylar[stok.id] = {
+            'id': stok.id,
+            'kod': stok.kod,
+            'ad': stok.ad,
+            'barkod': stok.barkod,
+            'birim': stok.get_birim_display(),
+            'miktar': str(stok.miktar),
+            'satis_fiyati': ozel_fiyat or str(stok.satis_fiyati),
+            'kdv_orani': stok.kdv_orani,
+            'para_birimi': {
+                'kod': stok.para_birimi.kod,
+                'sembol': stok.para_birimi.sembol
+            },
+            'secenekler': secenekler,
+            'indirim_bilgisi': indirim_bilgisi
+        }
     
-    return JsonResponse(data)
+    return detaylar
 
 
 @login_required
@@ -1155,7 +1268,16 @@ def kayit_geri_yukle(request, model_name, pk):
         return redirect('silinen_kayitlar')
     
     if request.method == 'POST':
-        obj.restore()
+        try:
+            with transaction.atomic():
+                obj.restore()
+        except DonemKilitli as e:
+            messages.error(request, ' '.join(e.messages))
+            return redirect('silinen_kayitlar')
+        except IntegrityError:
+            # Stok kartı silindikten sonra barkodu başka bir karta verilmiş olabilir
+            messages.error(request, 'Bu barkod başka bir stok kartında kullanılıyor.')
+            return redirect('silinen_kayitlar')
         messages.success(request, 'Kayıt geri yüklendi!')
         return redirect('silinen_kayitlar')
     
@@ -1190,7 +1312,11 @@ def kayit_kalici_sil(request, model_name, pk):
         return redirect('silinen_kayitlar')
     
     if request.method == 'POST':
-        obj.delete()  # Kalıcı silme
+        try:
+            obj.delete()  # Kalıcı silme
+        except DonemKilitli as e:
+            messages.error(request, ' '.join(e.messages))
+            return redirect('silinen_kayitlar')
         messages.success(request, 'Kayıt kalıcı olarak silindi!')
         return redirect('silinen_kayitlar')
     
@@ -1264,6 +1390,69 @@ def yetkili_menu(request):
     return render(request, 'yetkili/menu.html', context)
 
 
+@login_required
+def analitik_aktar(request):
+    """Hareket ve faturaları analitik için Parquet'e aktarır (artımlı; tam=1 ile baştan)"""
+    if not request.user.is_superuser:
+        return JsonResponse({'success': False, 'error': 'Bu işlem için yetkiniz yok!'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Geçersiz istek'}, status=405)
+
+    from .analitik import TABLOLAR, AktarimCalisiyor, aktar
+
+    tablolar = request.POST.getlist('tablo') or None
+    if tablolar and not set(tablolar) <= TABLOLAR.keys():
+        return JsonResponse({'success': False, 'error': 'Bilinmeyen tablo'}, status=400)
+
+    try:
+        sonuc = aktar(tablolar=tablolar, tam=request.POST.get('tam') == '1')
+    except AktarimCalisiyor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    except OSError as e:
+        return JsonResponse({'success': False, 'error': f'Aktarım yazılamadı: {str(e)}'}, status=500)
+
+    return JsonResponse({'success': True, 'tablolar': sonuc})
+
+
+@login_required
+def donem_kapanis(request):
+    """Dönem kapanışları: ay/yıl kapatma ve son kapanışı geri alma"""
+    if not request.user.is_superuser:
+        messages.error(request, 'Bu sayfaya erişim yetkiniz yok!')
+        return redirect('anasayfa')
+
+    from .donem import donemi_kapat, kapanisi_geri_al
+
+    if request.method == 'POST':
+        if request.POST.get('islem') == 'geri_al':
+            try:
+                kapanis = kapanisi_geri_al()
+                messages.success(request, f'{kapanis} kapanışı geri alındı, dönem yeniden açıldı.')
+            except ValueError as e:
+                messages.error(request, str(e))
+            return redirect('donem_kapanis')
+
+        try:
+            yil = int(request.POST.get('yil', ''))
+            ay = int(request.POST['ay']) if request.POST.get('ay') else None
+        except ValueError:
+            messages.error(request, 'Geçersiz dönem!')
+            return redirect('donem_kapanis')
+        try:
+            kapanis = donemi_kapat(yil, ay, request.user)
+            messages.success(request, f'{kapanis} kapanışı yapıldı.')
+        except ValueError as e:
+            messages.error(request, str(e))
+        return redirect('donem_kapanis')
+
+    simdi = timezone.localtime()
+    return render(request, 'yetkili/donem_kapanis.html', {
+        'kapanislar': DonemKapanis.objects.select_related('kapatan'),
+        'yillar': range(simdi.year, simdi.year - 10, -1),
+        'aylar': range(1, 13),
+    })
+
+
 
 
 @login_required
@@ -1410,7 +1599,7 @@ def kasa_list(request):
         messages.error(request, 'Bu sayfaya erişim yetkiniz yok!')
         return redirect('anasayfa')
     
-    kasalar = Kasa.objects.filter(silindi=False).select_related('para_birimi')
+    kasalar = Kasa.objects.filter(silindi=False).select_related('para_birimi', 'bakiye_ozet')
     return render(request, 'yetkili/kasa_list.html', {'kasalar': kasalar})
 
 
@@ -1420,7 +1609,7 @@ def banka_list(request):
         messages.error(request, 'Bu sayfaya erişim yetkiniz yok!')
         return redirect('anasayfa')
     
-    bankalar = Banka.objects.filter(silindi=False).select_related('para_birimi')
+    bankalar = Banka.objects.filter(silindi=False).select_related('para_birimi', 'bakiye_ozet')
     return render(request, 'yetkili/banka_list.html', {'bankalar': bankalar})
 
 
@@ -1581,15 +1770,22 @@ def pos_duzenle(request, pk):
     return render(request, 'yetkili/pos_form.html', {'form': form, 'title': 'POS Düzenle'})
 
 # Cari Hareket işlemleri
-@login_required
-def cari_hareket_list(request):
-    hareketler = CariHareket.objects.filter(silindi=False).select_related(
+def cari_hareket_filtrele(request):
+    """cari_hareket_list ve dışa aktarım için GET filtrelerini uygulanmış hareketler.
+    
+    Tarih filtresi arşivlenmiş döneme uzanıyorsa arşivle birleşik (salt okunur) görünümden okunur.
+    """
+    tarih_bas = request.GET.get('tarih_bas')
+    tarih_son = request.GET.get('tarih_son')
+    
+    model = CariHareket
+    if tarih_bas or tarih_son:
+        model = okuma_modeli(CariHareket, *tarih_araligi(tarih_bas, tarih_son))
+    hareketler = model.objects.filter(silindi=False).select_related(
         'cari', 'para_birimi', 'kasa', 'banka', 'pos', 'olusturan'
     ).order_by('-tarih', '-id')
     
     # Filtreler
-    tarih_bas = request.GET.get('tarih_bas')
-    tarih_son = request.GET.get('tarih_son')
     cari_ara = request.GET.get('cari_ara')
     islem_tipi = request.GET.get('islem_tipi')
     hareket_yonu = request.GET.get('hareket_yonu')
@@ -1608,10 +1804,7 @@ def cari_hareket_list(request):
         except:
             pass
     
-    if tarih_bas:
-        hareketler = hareketler.filter(tarih__date__gte=tarih_bas)
-    if tarih_son:
-        hareketler = hareketler.filter(tarih__date__lte=tarih_son)
+    hareketler = tarih_araligi_filtrele(hareketler, tarih_bas, tarih_son)
     
 
     # Para birimi filtresi
@@ -1645,78 +1838,106 @@ def cari_hareket_list(request):
     if hareket_yonu:
         hareketler = hareketler.filter(hareket_yonu=hareket_yonu)
     
+    return hareketler
 
-    
 
-    # Bugünkü istatistikler
-    bugun = timezone.now().date()
-    bugunki_hareketler = CariHareket.objects.filter(
-        silindi=False,
-        tarih__date=bugun
-    )
-    
-    bugunki_islem_sayisi = bugunki_hareketler.count()
+@login_required
+def cari_hareket_list(request):
+    hareketler = cari_hareket_filtrele(request)
     
-    # TL bazında bugünkü tahsilat ve ödeme
-    try:
-        tl = ParaBirimi.objects.get(kod='TL')
-        bugunki_tahsilat = bugunki_hareketler.filter(
-            hareket_yonu='giris',
-            para_birimi=tl
-        ).aggregate(toplam=models.Sum('tutar'))['toplam'] or 0
-        
-        bugunki_odeme = bugunki_hareketler.filter(
-            hareket_yonu='cikis',
-            para_birimi=tl
-        ).aggregate(toplam=models.Sum('tutar'))['toplam'] or 0
-    except ParaBirimi.DoesNotExist:
-        bugunki_tahsilat = 0
-        bugunki_odeme = 0
+    # Tümü seçeneği sayfada listelenmez, filtrelenmiş hareketler CSV olarak indirilir
+    sayfa_boyutu = request.GET.get('sayfa_boyutu', '50')
+    if sayfa_boyutu == 'all':
+        return cari_hareket_disa_aktar(hareketler)
+    
+    # Bugünkü istatistikler tek sorguda
+    bugun = timezone.localdate().isoformat()
+    bugunki = tarih_araligi_filtrele(
+        CariHareket.objects.filter(silindi=False), bugun, bugun
+    ).aggregate(
+        sayi=Count('id'),
+        tahsilat=Sum('tutar', filter=Q(hareket_yonu='giris', para_birimi__kod='TL')),
+        odeme=Sum('tutar', filter=Q(hareket_yonu='cikis', para_birimi__kod='TL')),
+    )
     
     toplam_islem_sayisi = CariHareket.objects.filter(silindi=False).count()
-
-    # Sayfalama için toplam hesapları al (sayfalamadan önce)
     
+    # Filtrelenmiş kayıt sayısı ve giriş/çıkış toplamları tek koşullu aggregate ile
+    toplamlar = hareketler.aggregate(
+        kayit_sayisi=Count('id'),
+        toplam_giris=Sum('tutar', filter=Q(hareket_yonu='giris')),
+        toplam_cikis=Sum('tutar', filter=Q(hareket_yonu='cikis')),
+    )
     
-    toplam_giris = hareketler.filter(hareket_yonu='giris').aggregate(
-        toplam=Sum('tutar')
-    )['toplam'] or Decimal('0')
-    
-    toplam_cikis = hareketler.filter(hareket_yonu='cikis').aggregate(
-        toplam=Sum('tutar')
-    )['toplam'] or Decimal('0')
+    # İmleçli sayfalama (OFFSET yok, derin sayfalar da sabit sürede)
+    try:
+        sayfa_boyutu = min(max(int(sayfa_boyutu), 1), 500)
+    except ValueError:
+        sayfa_boyutu = 50
+    hareketler, sayfa = imlecli_sayfala(
+        hareketler, sayfa_boyutu,
+        sonra=request.GET.get('sonra'), once=request.GET.get('once')
+    )
     
-    # Sayfalama
-    sayfa_boyutu = request.GET.get('sayfa_boyutu', '50')
-    if sayfa_boyutu != 'all':
-        paginator = Paginator(hareketler, int(sayfa_boyutu))
-        page = request.GET.get('page')
-        
-        try:
-            hareketler = paginator.page(page)
-        except PageNotAnInteger:
-            hareketler = paginator.page(1)
-        except EmptyPage:
-            hareketler = paginator.page(paginator.num_pages)
+    # Sayfa bağlantıları için imleç dışındaki filtreler
+    sayfa_sorgusu = request.GET.copy()
+    for anahtar in ('sonra', 'once', 'page'):
+        sayfa_sorgusu.pop(anahtar, None)
     
     context = {
         'hareketler': hareketler,
-        'bugunki_islem_sayisi': bugunki_islem_sayisi,
-        'bugunki_tahsilat': bugunki_tahsilat,
-        'bugunki_odeme': bugunki_odeme,
+        'sayfa': sayfa,
+        'sayfa_sorgusu': sayfa_sorgusu.urlencode(),
+        'bugunki_islem_sayisi': bugunki['sayi'],
+        'bugunki_tahsilat': bugunki['tahsilat'] or 0,
+        'bugunki_odeme': bugunki['odeme'] or 0,
         'toplam_islem_sayisi': toplam_islem_sayisi,
         'para_birimleri': ParaBirimi.objects.filter(silindi=False, aktif=True),
         'kullanicilar': User.objects.all().order_by('username'),
         'kasalar': Kasa.objects.filter(silindi=False, aktif=True),
         'bankalar': Banka.objects.filter(silindi=False, aktif=True),
-        'hareketler': hareketler,
-        'toplam_giris': toplam_giris,
-        'toplam_cikis': toplam_cikis,
-        
+        'kayit_sayisi': toplamlar['kayit_sayisi'],
+        'toplam_giris': toplamlar['toplam_giris'] or Decimal('0'),
+        'toplam_cikis': toplamlar['toplam_cikis'] or Decimal('0'),
     }
     
     return render(request, 'cari_hareket/list.html', context)
 
+
+@login_required
+def cari_hareket_indir(request):
+    """Listedeki filtrelerle cari hareketleri CSV/XLSX olarak indirir"""
+    return cari_hareket_disa_aktar(cari_hareket_filtrele(request), request.GET.get('bicim', 'xlsx'))
+
+
+def cari_hareket_disa_aktar(hareketler, bicim='csv'):
+    """Filtrelenmiş cari hareketleri akış halinde CSV/XLSX olarak indirir"""
+    from .disa_aktarim import disa_aktarim_yaniti
+    
+    islem_tipleri = dict(CariHareket.ISLEM_TIPLERI)
+    hareket_yonleri = dict(CariHareket.HAREKET_YONU)
+    
+    satirlar = hareketler.order_by('-tarih', '-id').values_list(
+        'tarih', 'cari__kod', 'cari__unvan', 'islem_tipi', 'kasa__ad', 'banka__ad',
+        'hareket_yonu', 'tutar', 'para_birimi__kod', 'doviz_kuru', 'tl_karsiligi',
+        'aciklama', 'olusturan__username'
+    ).iterator(chunk_size=2000)
+    
+    def satir_uret():
+        for (tarih, cari_kod, unvan, islem_tipi, kasa, banka, yon, tutar, para_birimi,
+             kur, tl_karsiligi, aciklama, kullanici) in satirlar:
+            yield [
+                tarih, cari_kod, unvan, islem_tipleri.get(islem_tipi, islem_tipi), kasa or banka or '',
+                hareket_yonleri.get(yon, yon), tutar, para_birimi, kur, tl_karsiligi, aciklama, kullanici
+            ]
+    
+    return disa_aktarim_yaniti(
+        bicim, f"cari_hareketler_{timezone.localdate():%Y%m%d}",
+        ['Tarih', 'Cari Kod', 'Ünvan', 'İşlem Tipi', 'Hesap', 'Yön', 'Tutar', 'Para Birimi',
+         'Döviz Kuru', 'TL Karşılığı', 'Açıklama', 'İşlemi Yapan'],
+        satir_uret()
+    )
+
 @login_required
 def cari_hareket_ekle(request, pk=None):
     if pk:
@@ -1820,6 +2041,11 @@ def cari_hareket_sil(request, pk):
             else:
                 messages.success(request, 'Hareket silindi!')
                 return redirect('cari_hareket_list')
+        except DonemKilitli as e:
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+            messages.error(request, ' '.join(e.messages))
+            return redirect('cari_hareket_list')
         except Exception as e:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'message': str(e)}, status=400)
@@ -1831,50 +2057,132 @@ def cari_hareket_sil(request, pk):
 
 @login_required
 def cari_hareketler(request, cari_id):
+    """Cari hesap ekstresi: dönem başı devir ve para birimi bazında yürüyen bakiye"""
     cari = get_object_or_404(CariKart, pk=cari_id, silindi=False)
-    hareketler = cari.hareketler.filter(silindi=False).order_by('-tarih', '-id')
+    tum_hareketler, baslangic, bitis, (devir_tarihi, devir) = cari_ekstre_filtrele(request, cari)
+    hareketler = tum_hareketler.filter(tarih__gte=baslangic) if baslangic else tum_hareketler
     
-    # Özet bilgiler hesapla
-    toplam_borc = hareketler.filter(hareket_yonu='cikis').aggregate(
-        toplam=models.Sum('tutar')
-    )['toplam'] or 0
+    ozet = ekstre_ozeti(tum_hareketler, baslangic, bitis, devir=devir, devir_tarihi=devir_tarihi)
     
-    toplam_alacak = hareketler.filter(hareket_yonu='giris').aggregate(
-        toplam=models.Sum('tutar')
-    )['toplam'] or 0
+    # Ekstre kronolojik okunduğu için imleç sadece ileri gider; ilk sayfaya dönülebilir.
+    # İlk sayfa açılış bakiyesinden, sonrakiler imleçte taşınan bakiyelerden devam eder.
+    try:
+        sayfa_boyutu = min(max(int(request.GET.get('sayfa_boyutu', '100')), 1), 500)
+    except ValueError:
+        sayfa_boyutu = 100
+    imlec = ekstre_imleci_coz(request.GET['sonra']) if request.GET.get('sonra') else None
+    if imlec:
+        sonra, devir = imlec
+    else:
+        sonra, devir = None, {satir['para_birimi_id']: satir['acilis'] for satir in ozet}
+    hareketler, sonraki_var, bakiyeler = ekstre_sayfasi(hareketler, sayfa_boyutu, devir, sonra=sonra)
     
-    # Son hareket
-    son_hareket = hareketler.first()
+    sayfa_sorgusu = request.GET.copy()
+    sayfa_sorgusu.pop('sonra', None)
     
     context = {
         'cari': cari,
         'hareketler': hareketler,
-        'toplam_borc': toplam_borc,
-        'toplam_alacak': toplam_alacak,
-        'son_hareket': son_hareket,
+        'ozet': ozet,
+        'baslangic': baslangic,
+        'toplam_hareket': sum(satir['sayi'] for satir in ozet),
+        'sayfa': {
+            'ilk_sayfa': not sonra,
+            'sonraki': ekstre_imleci(hareketler[-1], bakiyeler) if sonraki_var else None,
+        },
+        'sayfa_sorgusu': sayfa_sorgusu.urlencode(),
+        'para_birimleri': ParaBirimi.objects.filter(silindi=False),
+        'filters': {
+            'tarih_bas': request.GET.get('tarih_bas', ''),
+            'tarih_son': request.GET.get('tarih_son', ''),
+            'para_birimi': request.GET.get('para_birimi', ''),
+        },
     }
     
     return render(request, 'cari_hareket/cari_hareketler.html', context)
 
+
+def cari_ekstre_filtrele(request, cari):
+    """Carinin tarih filtresiz (para birimi filtreli) hareketleri, dönemin [baslangic, bitis) sınırları ve devir.
+    
+    Başlangıçtan önce dönem kapanışı varsa devir (kapanış sınırı, {para_birimi_id: bakiye})
+    olur, yoksa (None, None). Açılış devirden (devir yoksa baştan) toplandığı için okunan
+    aralık arşive uzanıyorsa hareketler arşivle birleşik görünümden okunur.
+    """
+    baslangic, bitis = tarih_araligi(request.GET.get('tarih_bas'), request.GET.get('tarih_son'))
+    para_birimi = request.GET.get('para_birimi')
+    para_birimi = para_birimi if para_birimi and para_birimi.isdigit() else None
+    devir_tarihi, devir = cari_devri(cari.pk, baslangic, para_birimi) if baslangic else (None, None)
+    
+    hareketler = okuma_modeli(CariHareket, devir_tarihi, bitis).objects.filter(cari=cari, silindi=False)
+    if para_birimi:
+        hareketler = hareketler.filter(para_birimi_id=para_birimi)
+    if bitis:
+        hareketler = hareketler.filter(tarih__lt=bitis)
+    return hareketler, baslangic, bitis, (devir_tarihi, devir)
+
+
+@login_required
+def cari_ekstre_indir(request, cari_id):
+    """Cari hesap ekstresini PDF/CSV/XLSX olarak akış halinde indirir"""
+    from .disa_aktarim import disa_aktarim_yaniti, pdf_yanit
+    
+    cari = get_object_or_404(CariKart, pk=cari_id, silindi=False)
+    tum_hareketler, baslangic, bitis, (devir_tarihi, devir) = cari_ekstre_filtrele(request, cari)
+    hareketler = tum_hareketler.filter(tarih__gte=baslangic) if baslangic else tum_hareketler
+    
+    ozet = ekstre_ozeti(tum_hareketler, baslangic, bitis, devir=devir, devir_tarihi=devir_tarihi)
+    acilislar = {satir['para_birimi_id']: satir['acilis'] for satir in ozet}
+    islem_tipleri = dict(CariHareket.ISLEM_TIPLERI)
+    
+    def satir_uret():
+        # Önce para birimi başına devir, ardından dönem hareketleri
+        for satir in ozet:
+            if baslangic:
+                yield [baslangic, 'Devir', 'Önceki dönemden devir', None, None, satir['acilis'], satir['para_birimi']]
+        for tarih, islem_tipi, aciklama, yon, tutar, para_birimi, bakiye in ekstre_satirlari(
+            hareketler, acilislar,
+            ['tarih', 'islem_tipi', 'aciklama', 'hareket_yonu', 'tutar', 'para_birimi__kod']
+        ):
+            yield [
+                tarih, islem_tipleri.get(islem_tipi, islem_tipi), aciklama,
+                tutar if yon == 'cikis' else None, tutar if yon == 'giris' else None,
+                bakiye, para_birimi
+            ]
+    
+    basliklar = ['Tarih', 'İşlem Tipi', 'Açıklama', 'Borç', 'Alacak', 'Bakiye', 'Para Birimi']
+    dosya_adi = f"ekstre_{cari.kod}_{timezone.localdate():%Y%m%d}"
+    
+    if request.GET.get('bicim') == 'pdf':
+        donem = ' - '.join(
+            sinir.strftime('%d.%m.%Y') for sinir in (baslangic, bitis and bitis - timedelta(days=1)) if sinir
+        )
+        return pdf_yanit(
+            f'{dosya_adi}.pdf', basliklar, satir_uret(),
+            baslik=f"{cari.kod} - {cari.unvan}\nHesap Ekstresi {donem}".rstrip(),
+            genislikler=[2, 1.5, 5, 1.5, 1.5, 1.7, 1],
+        )
+    return disa_aktarim_yaniti(request.GET.get('bicim', 'xlsx'), dosya_adi, basliklar, satir_uret())
+
 # AJAX view'ları
 @login_required
 def cari_ara(request):
-    q = request.GET.get('q', '')
-    cariler = CariKart.objects.filter(
-        silindi=False,
-        aktif=True
-    ).filter(
-        Q(unvan__icontains=q) | Q(kod__icontains=q)
-    )[:20]
+    q = request.GET.get('q', '').strip()
+    sonuclar = CARI_INDEKSI.ara(q, limit=20)
+    
+    # TL bakiyeleri tüm sonuçlar için tek sorguda özet tablodan okunur
+    bakiyeler = dict(CariBakiye.objects.filter(
+        cari_id__in=[pk for pk, _ in sonuclar], para_birimi__kod='TL'
+    ).annotate(tl_bakiye=F('toplam_giris') - F('toplam_cikis')).values_list('cari_id', 'tl_bakiye'))
     
     data = []
-    for cari in cariler:
+    for pk, (kod, unvan) in sonuclar:
         data.append({
-            'id': cari.id,
-            'text': f"{cari.kod} - {cari.unvan}",
-            'kod': cari.kod,
-            'unvan': cari.unvan,
-            'bakiye': str(cari.bakiye)
+            'id': pk,
+            'text': f"{kod} - {unvan}",
+            'kod': kod,
+            'unvan': unvan,
+            'bakiye': str(bakiyeler.get(pk, Decimal('0')).quantize(Decimal('0.01')))
         })
     
     return JsonResponse({'results': data})
@@ -1882,18 +2190,16 @@ def cari_ara(request):
 
 @login_required
 def stok_ara(request):
-    q = request.GET.get('q', '')
+    q = request.GET.get('q', '').strip()
+    idler = [pk for pk, _ in STOK_INDEKSI.ara(q, limit=20)]
+    
+    # İndeks sıralaması korunarak güncel stok bilgileri tek sorguda alınır
     stoklar = StokKart.objects.filter(
-        silindi=False,
-        aktif=True
-    ).filter(
-        Q(ad__icontains=q) | 
-        Q(kod__icontains=q) | 
-        Q(barkod__icontains=q)
-    )[:20]
+        pk__in=idler, silindi=False, aktif=True
+    ).select_related('para_birimi').in_bulk()
     
     data = []
-    for stok in stoklar:
+    for stok in (stoklar[pk] for pk in idler if pk in stoklar):
         data.append({
             'id': stok.id,
             'text': f"{stok.kod} - {stok.ad}",
@@ -1971,39 +2277,16 @@ def cari_bakiye_detay(request):
     try:
         cari = CariKart.objects.get(id=cari_id)
         
-        # Tüm para birimlerini al
-        para_birimleri = ParaBirimi.objects.all()
-        
         bakiyeler = []
         
-        for pb in para_birimleri:
-            # Bu para birimindeki toplam giriş ve çıkışları hesapla
-            hareketler = CariHareket.objects.filter(
-                cari=cari,
-                para_birimi=pb,
-                silindi=False  # Soft delete kontrolü
-            )
-            
-            # Giriş hareketleri (cariden kasaya giriş = tahsilat)
-            toplam_giris = hareketler.filter(hareket_yonu='giris').aggregate(
-                toplam=Sum('tutar')
-            )['toplam'] or 0
-            
-            # Çıkış hareketleri (kasadan cariye çıkış = ödeme)
-            toplam_cikis = hareketler.filter(hareket_yonu='cikis').aggregate(
-                toplam=Sum('tutar')
-            )['toplam'] or 0
-            
-            bakiye = toplam_giris - toplam_cikis
-            
-            # Sadece hareketi olan para birimlerini göster
-            if toplam_giris > 0 or toplam_cikis > 0:
-                bakiyeler.append({
-                    'para_birimi': f"{pb.kod} - {pb.ad}",
-                    'toplam_giris': float(toplam_giris),
-                    'toplam_cikis': float(toplam_cikis),
-                    'bakiye': float(bakiye)
-                })
+        # Sadece hareketi olan para birimleri özet tablodan tek sorguda gelir
+        for ozet in cari.get_bakiye_detay():
+            bakiyeler.append({
+                'para_birimi': f"{ozet['para_birimi__kod']} - {ozet['para_birimi__ad']}",
+                'toplam_giris': float(ozet['toplam_giris']),
+                'toplam_cikis': float(ozet['toplam_cikis']),
+                'bakiye': float(ozet['bakiye'])
+            })
         
         return JsonResponse({
             'success': True,
@@ -2015,6 +2298,34 @@ def cari_bakiye_detay(request):
     
 
 
+@login_required
+def doviz_kuru_getir(request):
+    """Verilen tarihte geçerli TCMB kurunu döndürür (tarih boşsa bugün)"""
+    from .doviz import kur_getir
+    
+    kod = request.GET.get('kod', '').strip()
+    if not kod:
+        return JsonResponse({'success': False, 'error': 'Para birimi kodu gerekli'})
+    
+    tarih = request.GET.get('tarih')
+    try:
+        tarih = datetime.strptime(tarih, '%Y-%m-%d').date() if tarih else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Geçersiz tarih'})
+    
+    # Geçmiş bülten tabloda yoksa burada (hareket kaydedilmeden önce) arşivden çekilir
+    bulten_tarihi, kur = kur_getir(kod, tarih, arsivden=True)
+    if kur is None:
+        return JsonResponse({'success': False, 'error': 'Kur bulunamadı'})
+    
+    return JsonResponse({
+        'success': True,
+        'kod': kod.upper(),
+        'tarih': bulten_tarihi.isoformat(),
+        'kur': str(kur.quantize(Decimal('0.0001')))
+    })
+
+
 @login_required
 def genel_stok_secenek_ekle(request):
     if not request.user.is_superuser:
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'muhasebe.settings')
 
 application = get_wsgi_application()
+
+# Cari/stok arama öneri indeksleri ilk istekten önce arka planda yüklenir
+from muhasebe.oneri import on_yukle  # noqa: E402
+
+on_yukle()